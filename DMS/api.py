@@ -1,11 +1,37 @@
-from fastapi import FastAPI, WebSocket
+from fastapi import FastAPI, HTTPException, Query, Request, Response, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from utils.redis_client import get_redis
+from utils import lanes, metrics
+from utils.redis_client import get_async_redis, close_async_redis
+from utils.ratelimit import TokenBucket
+from utils.broadcaster import StateBroadcaster
+from utils.dashboard import DashboardAggregator
+from utils.state_channel import SNAKE_STATE_KEY, SNAKE_UPDATES_CHANNEL
+from utils.result_store import MAX_PAGE_SIZE, PAGE_SIZE, ResultStore, StreamIngester
+from utils.timeseries import HISTORY_DEFAULT_RANGE, NodeHistory
+from utils.logs import get_logger
+from ingest import AUDIO_TASKS_QUEUE
 import asyncio
 import json
+import math
+import os
+import time
 
 app = FastAPI()
-r = get_redis()
+r = get_async_redis()
+snake_broadcaster = StateBroadcaster(r, SNAKE_UPDATES_CHANNEL, SNAKE_STATE_KEY)
+dashboard = DashboardAggregator(r)
+results_store = ResultStore()
+results_ingester = StreamIngester(r, results_store)
+node_history_store = NodeHistory(r)
+# Movimientos por jugador: SNAKE_MOVE_RATE por segundo con ráfagas de SNAKE_MOVE_BURST
+move_limiter = TokenBucket(r, prefix="ratelimit:snake_move")
+log = get_logger("api")
+MOVES = metrics.Counter("moves_total", "Movimientos recibidos por resultado", ["outcome"])
+UNASSIGNED_TASKS_QUEUE = "global:unassigned_tasks"
+# Campos de un movimiento que se usan como claves (carril, token bucket) y
+# los tipos que se aceptan en ellos (igual que en ProyectoSnake/core/api.py)
+MOVE_FIELDS = ("type", "direction", "player_id", "game_id")
+MOVE_FIELD_TYPES = (str, int, type(None))
 
 app.add_middleware(
     CORSMiddleware,
@@ -19,68 +45,139 @@ app.add_middleware(
 
 
 @app.post("/snake/move")
-async def snake_move(move: dict):
+async def snake_move(move: dict, request: Request):
     # move = {"type": "snake_move", "player_id": "...", "direction": "..."}
-    r.lpush("global:unassigned_tasks", json.dumps(move))
+    if not all(isinstance(move.get(field), MOVE_FIELD_TYPES) for field in MOVE_FIELDS):
+        MOVES.labels("invalid").inc()
+        raise HTTPException(status_code=422, detail=f"{', '.join(MOVE_FIELDS)} deben ser texto o número")
+    # Token bucket por jugador (o IP); al agotarlo se responde 429
+    player = move.get("player_id") or (request.client.host if request.client else "anon")
+    with metrics.redis_timer("ratelimit"):
+        allowed, retry_ms = await move_limiter.allow_async(player)
+    MOVES.labels("accepted" if allowed else "rejected").inc()
+    if not allowed:
+        raise HTTPException(
+            status_code=429,
+            detail="Demasiados movimientos, intenta de nuevo en un momento",
+            headers={"Retry-After": str(max(1, math.ceil(retry_ms / 1000)))},
+        )
+    # Hora de entrada para medir la espera en cola en el nodo (task_wait_seconds)
+    move["enqueued_at"] = time.time()
+    pipe = r.pipeline(transaction=False)
+    lanes.push(pipe, UNASSIGNED_TASKS_QUEUE, json.dumps(move), move.get("type", "snake_move"))
+    with metrics.redis_timer("enqueue"):
+        await pipe.execute()
     return {"status": "ok"}
 
 
+@app.get("/results")
+async def list_results(
+    node: str = None,
+    file: str = None,
+    hash: str = None,
+    since: float = None,
+    until: float = None,
+    cursor: int = None,
+    limit: int = Query(PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    text: bool = False,
+):
+    """
+    Resultados del más nuevo al más viejo, filtrados por nodo, archivo, hash
+    o rango de fechas (epoch). Para la página siguiente se pasa el
+    next_cursor de la respuesta anterior.
+    """
+    rows, next_cursor = await asyncio.to_thread(
+        results_store.query, node=node, file=file, file_hash=hash, since=since, until=until,
+        cursor=cursor, limit=limit, with_text=text,
+    )
+    return {"results": rows, "next_cursor": next_cursor}
+
+
+@app.get("/results/{result_id}")
+async def get_result(result_id: int):
+    result = await asyncio.to_thread(results_store.get, result_id)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Resultado no encontrado")
+    return result
+
+
+@app.get("/nodes/{node_id}/history")
+async def node_history(node_id: str, since: float = None, until: float = None, resolution: int = None):
+    """
+    Historial de CPU, RAM y disco del nodo para gráficos. Sin `resolution`
+    se usa la más fina (1 s, 60 s o 3600 s) que cubre el rango pedido.
+    """
+    until = until or time.time()
+    since = since or until - HISTORY_DEFAULT_RANGE
+    if since >= until:
+        raise HTTPException(status_code=400, detail="since debe ser menor que until")
+    res, points = await node_history_store.read_async(node_id, since, until, resolution)
+    return {"node": node_id, "resolution": res, "points": points}
+
+
+@app.get("/metrics")
+async def metrics_endpoint():
+    """
+    Métricas del proceso en formato de texto de Prometheus, con la
+    profundidad de los carriles de la cola global y de los audios pendientes.
+    """
+    queues = [lanes.lane_key(UNASSIGNED_TASKS_QUEUE, lane) for lane in lanes.LANES] + [AUDIO_TASKS_QUEUE]
+    await metrics.record_queue_depth_async(r, queues, sorted_sets=[AUDIO_TASKS_QUEUE])
+    return Response(metrics.REGISTRY.expose(), media_type=metrics.CONTENT_TYPE)
+
+
+@app.on_event("startup")
+async def start_broadcasters():
+    # Primera vez con el store: se migra el historial de finalizadas.txt
+    if os.path.exists(dashboard.results.path) and await asyncio.to_thread(results_store.count) == 0:
+        imported = await asyncio.to_thread(results_store.import_text, dashboard.results.path)
+        print(f"📦 {imported} resultados migrados de {dashboard.results.path}")
+    await move_limiter.preload_async()
+    snake_broadcaster.start()
+    dashboard.start()
+    results_ingester.start()
+
+@app.on_event("shutdown")
+async def stop_broadcasters():
+    await snake_broadcaster.stop()
+    await dashboard.stop()
+    await results_ingester.stop()
+    results_store.close()
+    await close_async_redis()
+
 @app.websocket("/ws/snake")
 async def ws_snake(websocket: WebSocket):
+    """
+    Recibe el estado de Snake por push: un solo suscriptor por proceso
+    reenvía cada cambio publicado por los nodos a todos los sockets.
+    """
     await websocket.accept()
     try:
+        await snake_broadcaster.register(websocket)
+        # Solo se espera la desconexión; los envíos los hace el broadcaster
         while True:
-            state = r.get("snake:state")
-            if state:
-                # Si el estado está en bytes, decodifica
-                if isinstance(state, bytes):
-                    state = state.decode("utf-8")
-                await websocket.send_text(state)
-            await asyncio.sleep(0.1)
+            await websocket.receive_text()
+    except WebSocketDisconnect:
+        pass
     except Exception as e:
-        print(f"WebSocket Snake desconectado: {e}")
+        log.warning("WebSocket Snake desconectado: %s", e)
     finally:
-        await websocket.close()
+        snake_broadcaster.unregister(websocket)
 
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
+    """
+    Monitoreo de nodos, tareas y resultados. La foto la arma una sola vez por
+    tick el DashboardAggregator y todos los sockets reciben el mismo JSON.
+    """
     await websocket.accept()
     try:
+        await dashboard.register(websocket)
         while True:
-            nodes = {key.split(":")[1]: redis_client.hgetall(key) for key in redis_client.keys("node_stats:*")}
-            tasks = {key.split(":")[1]: redis_client.lrange(key, 0, -1) for key in redis_client.keys("task_queue:*")}
-            
-            for key in redis_client.keys("node_stats:*"):
-                node = key.split(":")[1]
-                stats = redis_client.hgetall(key)
-                active_tasks = [stats[k] for k in stats if k.startswith("current_task:")]
-                if active_tasks:
-                    if node not in tasks:
-                        tasks[node] = []
-                    tasks[node].extend(active_tasks)
-            
-            # Leer el archivo finalizadas.txt y agrupar por nodo
-            results = {}
-            try:
-                with open("finalizadas.txt", "r", encoding="utf-8") as f:
-                    for line in f:
-                        if line.strip():
-                            # Espera formato: Nodo nodeX terminó la tarea: path en X.XX s
-                            parts = line.split()
-                            if len(parts) > 2:
-                                node = parts[1]
-                                if node not in results:
-                                    results[node] = []
-                                results[node].append(line.strip())
-            except FileNotFoundError:
-                results = {}
-            await websocket.send_json({
-                "nodes": nodes,
-                "tasks": tasks,
-                "results": results,
-            })
-            await asyncio.sleep(2)
+            await websocket.receive_text()
+    except WebSocketDisconnect:
+        pass
     except Exception as e:
-        print(f"WebSocket desconectado: {e}")
+        log.warning("WebSocket desconectado: %s", e)
     finally:
-        await websocket.close()
\ No newline at end of file
+        dashboard.unregister(websocket)
@@ -0,0 +1,131 @@
+# DMS/bench/bench_chunking.py
+#
+# Compara transcribir cada audio entero en un nodo contra cortarlo en
+# segmentos repartidos entre N nodos (ver chunking.py).
+#
+# Proyección (por defecto): toma los tiempos reales de finalizadas.txt y la
+# duración de cada .mp3 (cabeceras, sin ffmpeg) y estima el tiempo de cada
+# segmento como tiempo_total * largo_segmento / duración + overhead fijo.
+# Reporta la latencia de un audio solo y el makespan de todo el lote.
+#
+# Con --run corta y transcribe de verdad (necesita ffmpeg; modelo stub salvo
+# que se defina WHISPER_MODEL):
+#   python -m bench.bench_chunking --nodes 1 2 4 8 [--run --workers 2]
+
+import argparse
+import glob
+import heapq
+import os
+import re
+import tempfile
+import time
+from collections import defaultdict
+
+import chunking
+from utils.audio import mp3_duration
+
+LINE_RE = re.compile(r"terminó la tarea: (.+?) en ([\d.]+) s")
+
+
+def load_times(path):
+    """Tiempo promedio por archivo en finalizadas.txt (las rutas pueden venir con \\)."""
+    times = defaultdict(list)
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            match = LINE_RE.search(line)
+            if match:
+                file_path = match.group(1).replace("\\", "/")
+                times[file_path].append(float(match.group(2)))
+    return {file_path: sum(values) / len(values) for file_path, values in times.items()}
+
+
+def makespan(durations, nodes):
+    """Reparto greedy (el trabajo más largo al nodo más libre), como hace la cola global."""
+    free = [0.0] * nodes
+    for duration in sorted(durations, reverse=True):
+        heapq.heapreplace(free, free[0] + duration)
+    return max(free)
+
+
+def chunk_times(total, duration, overhead, target):
+    segments = chunking.plan_segments(duration, [], target=target)
+    return [total * (s["end"] - s["start"]) / duration + overhead for s in segments]
+
+
+def project(args):
+    times = load_times(args.results)
+    jobs = []
+    for file_path, total in sorted(times.items()):
+        duration = mp3_duration(file_path) if os.path.exists(file_path) else None
+        if duration:
+            jobs.append((file_path, total, duration))
+    if not jobs:
+        print(f"⚠️ Ningún archivo de {args.results} existe en disco")
+        return
+    avg_duration = sum(d for _, _, d in jobs) / len(jobs)
+    avg_total = sum(t for _, t, _ in jobs) / len(jobs)
+    print(f"{len(jobs)} audios, {avg_duration:.1f} s de audio y {avg_total:.2f} s de transcripción en promedio")
+    print(f"segmentos de {args.chunk:.0f} s con {chunking.CHUNK_OVERLAP:.1f} s de solape, "
+          f"overhead {args.overhead:.2f} s por segmento + {args.split:.2f} s de corte por audio\n")
+
+    print(f"{'nodos':>5} | {'1 audio entero':>14} | {'1 audio cortado':>15} | {'lote entero':>11} | {'lote cortado':>12}")
+    for nodes in args.nodes:
+        whole_one = avg_total
+        chunks_one = chunk_times(avg_total, avg_duration, args.overhead, args.chunk)
+        split_one = args.split + makespan(chunks_one, nodes)
+        whole_batch = makespan([t for _, t, _ in jobs], nodes)
+        all_chunks = []
+        for _, total, duration in jobs:
+            all_chunks.extend(chunk_times(total, duration, args.overhead, args.chunk))
+        split_batch = args.split * len(jobs) / nodes + makespan(all_chunks, nodes)
+        print(f"{nodes:>5} | {whole_one:>12.2f} s | {split_one:>13.2f} s | {whole_batch:>9.2f} s | {split_batch:>10.2f} s")
+
+
+def run_real(args):
+    import transcription
+    from utils.worker_pool import WorkerPool
+
+    transcription.WHISPER_MODEL = os.getenv("WHISPER_MODEL", "stub")
+    files = sorted(glob.glob(os.path.join(args.audios, "*.mp3")))[: args.files]
+    pool = WorkerPool(1, args.workers, initializer=transcription.init_worker)
+    pool.warm_up()
+
+    start = time.perf_counter()
+    for future in [pool.cpu.submit(transcription.transcribe, path) for path in files]:
+        future.result()
+    whole = time.perf_counter() - start
+
+    start = time.perf_counter()
+    futures = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for n, path in enumerate(files):
+            silences, duration = chunking.detect_silences(path)
+            for segment in chunking.plan_segments(duration or mp3_duration(path), silences, target=args.chunk):
+                out = os.path.join(tmp, f"{n:03d}_{segment['index']:03d}.mp3")
+                chunking.cut_segment(path, segment["start"], segment["end"], out)
+                futures.append(pool.cpu.submit(transcription.transcribe, out))
+        texts = [future.result()["text"] for future in futures]
+    split = time.perf_counter() - start
+    pool.shutdown()
+    print(f"{len(files)} audios, {args.workers} procesos, modelo {transcription.WHISPER_MODEL}")
+    print(f"   enteros: {whole:>7.2f} s")
+    print(f"   cortados: {split:>6.2f} s ({len(texts)} segmentos)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Transcripción entera vs por segmentos")
+    parser.add_argument("--results", default="finalizadas.txt")
+    parser.add_argument("--audios", default="audios")
+    parser.add_argument("--nodes", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--chunk", type=float, default=chunking.CHUNK_SECONDS, help="Segundos por segmento")
+    parser.add_argument("--overhead", type=float, default=0.5, help="Costo fijo por segmento (cola, carga del archivo)")
+    parser.add_argument("--split", type=float, default=0.3, help="Costo de silencedetect + corte por audio")
+    parser.add_argument("--run", action="store_true", help="Corta y transcribe de verdad (necesita ffmpeg)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--files", type=int, default=4)
+    args = parser.parse_args()
+    run_real(args) if args.run else project(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+# DMS/bench/bench_ingest.py
+#
+# Throughput de la ingesta de audios (ver ingest.py) con miles de .mp3
+# pequeños generados en una carpeta temporal:
+#   1) detección: cuánto tarda cada watcher (inotify / polling) en ver todos
+#      los archivos escritos mientras vigila,
+#   2) tareas: sha256 por bloques + duración leída de la cabecera,
+#   3) encolado: script ENQUEUE_LUA en pipeline, con una fracción de
+#      duplicados que deben descartarse.
+#
+#   python -m bench.bench_ingest --files 5000 [--dup 0.1] [--fake]
+
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+
+import ingest
+from bench.common import base_parser, connect, timed
+
+# Cabecera MPEG-1 Layer III, 128 kbps, 44.1 kHz, estéreo
+FRAME_HEADER = b"\xff\xfb\x90\x64"
+
+
+def write_files(directory, count, size, dup, rng):
+    """Escribe `count` mp3 sintéticos; una fracción `dup` repite el contenido de otro."""
+    contents = []
+    for i in range(count):
+        if contents and rng.random() < dup:
+            data = rng.choice(contents)
+        else:
+            data = FRAME_HEADER + rng.randbytes(size - len(FRAME_HEADER))
+            contents.append(data)
+        tmp = os.path.join(directory, f".audio{i:06d}.tmp")
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, os.path.join(directory, f"audio{i:06d}.mp3"))  # llega completo (IN_MOVED_TO)
+    return len(contents)
+
+
+def detect(watcher_factory, count, size, dup, seed):
+    """Escribe los archivos mientras el watcher vigila; retorna (rutas, segundos hasta ver todas)."""
+    directory = tempfile.mkdtemp(prefix="ingest_")
+    try:
+        watcher = watcher_factory(directory)
+        seen = []
+        done = threading.Event()
+
+        def consume():
+            for batch in watcher.batches():
+                seen.extend(batch)
+                if len(seen) >= count:
+                    done.set()
+                    return
+
+        threading.Thread(target=consume, daemon=True).start()
+        start = time.perf_counter()
+        write_files(directory, count, size, dup, random.Random(seed))
+        done.wait()
+        elapsed = time.perf_counter() - start
+        return directory, seen, elapsed
+    except Exception:
+        shutil.rmtree(directory, ignore_errors=True)
+        raise
+
+
+def main():
+    parser = base_parser("Ingesta de miles de audios pequeños")
+    parser.add_argument("--files", type=int, default=5000)
+    parser.add_argument("--size", type=int, default=4096, help="Bytes por archivo")
+    parser.add_argument("--dup", type=float, default=0.1, help="Fracción de archivos repetidos")
+    parser.add_argument("--poll", type=float, default=0.2, help="Intervalo del PollingWatcher")
+    args = parser.parse_args()
+
+    watchers = {"polling": lambda d: ingest.PollingWatcher(d, interval=args.poll)}
+    try:
+        ingest.InotifyWatcher(tempfile.gettempdir()).close()
+        watchers = {"inotify": ingest.InotifyWatcher, **watchers}
+    except OSError as e:
+        print(f"⚠️ inotify no disponible: {e}")
+
+    print(f"{args.files} archivos de {args.size} bytes, {args.dup:.0%} repetidos\n")
+    directory, paths = None, []
+    for name, factory in watchers.items():
+        current, seen, elapsed = detect(factory, args.files, args.size, args.dup, seed=1)
+        print(f"   detección {name:>8}: {elapsed:>6.2f} s ({len(seen) / elapsed:>8.0f} archivos/s)")
+        if directory is None:
+            directory, paths = current, seen
+        else:
+            shutil.rmtree(current, ignore_errors=True)
+
+    try:
+        tasks, elapsed = timed(lambda: [ingest.build_task(path) for path in paths])
+        print(f"   tareas (hash + duración): {elapsed:>6.2f} s ({len(tasks) / elapsed:>8.0f} archivos/s)")
+
+        try:
+            r = connect(args.fake)
+            r.delete(ingest.INGESTED_HASHES_KEY, "bench:audio_tasks")
+        except ImportError as e:
+            print(f"⚠️ Sin cliente Redis ({e}); se omite el encolado")
+            return
+        ingestor = ingest.Ingestor(r, queue="bench:audio_tasks")
+        (added, duplicates), elapsed = timed(
+            lambda: [sum(x) for x in zip(*(ingestor.ingest(paths[i:i + ingest.INGEST_BATCH])
+                                           for i in range(0, len(paths), ingest.INGEST_BATCH)))]
+        )
+        print(f"   ingesta completa: {elapsed:>6.2f} s ({len(paths) / elapsed:>8.0f} archivos/s), "
+              f"{added} encolados, {duplicates} repetidos descartados")
+        r.delete(ingest.INGESTED_HASHES_KEY, "bench:audio_tasks")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+# DMS/bench/bench_resources.py
+#
+# Muestreo de recursos del nodo (utils/resources.py):
+#   1) costo de una pasada de update_node_status: antes, 3 lecturas de psutil
+#      más disk_usage("/"); ahora, leer el snapshot del sampler,
+#   2) estabilidad de la admisión: cuántas veces cambia la decisión
+#      "sobrecargado" con la CPU cruda y con el EWMA, bajo una carga a ráfagas.
+#
+#   python -m bench.bench_resources [--seconds 10]
+
+import argparse
+import multiprocessing
+import time
+
+import psutil
+
+from utils.resources import ResourceSampler
+
+THRESHOLD = 85.0
+
+
+def old_pass():
+    for _ in range(3):
+        psutil.cpu_percent()
+        psutil.virtual_memory()
+    psutil.disk_usage("/")
+
+
+def per_call_us(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def bursty_load(stop_at):
+    """Ráfagas de CPU de duración variable separadas por pausas."""
+    period = 0
+    while time.time() < stop_at:
+        busy_until = time.time() + (0.05 if period % 3 else 0.4)
+        while time.time() < busy_until:
+            pass
+        time.sleep(0.15)
+        period += 1
+
+
+def flips(decisions):
+    return sum(1 for a, b in zip(decisions, decisions[1:]) if a != b)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sampler de recursos con EWMA")
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--interval", type=float, default=0.1)
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    sampler = ResourceSampler(interval=args.interval)
+    sampler.sample()
+    print(f"   pasada anterior (3x cpu/ram + disco): {per_call_us(old_pass, args.repeat):>8.1f} µs")
+    print(f"   snapshot del sampler:                 {per_call_us(sampler.snapshot, args.repeat):>8.1f} µs")
+
+    workers = max(1, (psutil.cpu_count() or 1))
+    stop_at = time.time() + args.seconds
+    procs = [multiprocessing.Process(target=bursty_load, args=(stop_at,)) for _ in range(workers)]
+    for proc in procs:
+        proc.start()
+    raw, smooth = [], []
+    while time.time() < stop_at:
+        snapshot = sampler.sample()
+        raw.append(snapshot["cpu_raw"] > THRESHOLD)
+        smooth.append(snapshot["cpu"] > THRESHOLD)
+        time.sleep(args.interval)
+    for proc in procs:
+        proc.join()
+    print(f"\n   {len(raw)} muestras con carga a ráfagas (umbral {THRESHOLD:.0f}%)")
+    print(f"   cambios de decisión con CPU cruda: {flips(raw)}")
+    print(f"   cambios de decisión con EWMA:      {flips(smooth)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+# DMS/bench/bench_result_store.py
+#
+# Latencia de las consultas del store de resultados (utils/result_store.py)
+# con 1M de filas, contra el camino anterior: re-parsear finalizadas.txt
+# completo y filtrar en Python.
+#
+#   python -m bench.bench_result_store --rows 1000000 [--queries 200]
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from bench.bench_results_index import full_reparse, write_lines
+from bench.common import percentile, timed
+from utils.result_store import ResultStore
+
+BATCH = 20000
+
+
+def fill(store, rows, nodes, files, rng):
+    start_ts = time.time() - rows  # un resultado por segundo hacia atrás
+    for base in range(0, rows, BATCH):
+        entries = []
+        for i in range(base, min(rows, base + BATCH)):
+            entries.append((f"{1700000000000 + i}-0", {
+                "node": f"node{rng.randint(1, nodes)}",
+                "file": f"audios/audio{rng.randint(1, files)}.mp3",
+                "hash": f"{rng.getrandbits(64):016x}",
+                "elapsed": f"{rng.uniform(5, 30):.2f}",
+                "finished": f"{start_ts + i:.3f}",
+            }))
+        store.add_entries(entries)
+    return start_ts
+
+
+def hour_window(store, since):
+    return store.query(since=since, until=since + 3600)
+
+
+def measure(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return percentile(samples, 50), percentile(samples, 99)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Consultas al store de resultados con 1M de filas")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--nodes", type=int, default=20)
+    parser.add_argument("--files", type=int, default=500)
+    parser.add_argument("--queries", type=int, default=200, help="Repeticiones por consulta")
+    args = parser.parse_args()
+    rng = random.Random(7)
+
+    workdir = tempfile.mkdtemp(prefix="results_")
+    db_path = os.path.join(workdir, "results.db")
+    store = ResultStore(db_path)
+    start_ts, elapsed = timed(fill, store, args.rows, args.nodes, args.files, rng)
+    size = os.path.getsize(db_path) / 1e6
+    print(f"{args.rows} filas insertadas en {elapsed:.1f} s ({args.rows / elapsed:.0f}/s), {size:.0f} MB\n")
+
+    deep_cursor = store.query(limit=1)[0][0]["id"] - args.rows // 2
+    cases = {
+        "última página (50)": lambda: store.query(),
+        "por nodo": lambda: store.query(node=f"node{rng.randint(1, args.nodes)}"),
+        "por archivo": lambda: store.query(file=f"audios/audio{rng.randint(1, args.files)}.mp3"),
+        "rango de 1 h": lambda: hour_window(store, start_ts + rng.randint(0, max(0, args.rows - 3600))),
+        "nodo + rango 1 día": lambda: store.query(node=f"node{rng.randint(1, args.nodes)}",
+                                                   since=start_ts + args.rows - 86400),
+        "página a mitad (cursor)": lambda: store.query(cursor=deep_cursor),
+        "por id": lambda: store.get(rng.randint(1, args.rows)),
+    }
+    print(f"{'consulta':<26} | {'p50':>9} | {'p99':>9}")
+    for name, fn in cases.items():
+        p50, p99 = measure(fn, args.queries)
+        print(f"{name:<26} | {p50:>6.2f} ms | {p99:>6.2f} ms")
+    store.close()
+
+    # Camino anterior: cada consulta re-parsea el archivo de texto completo
+    text_path = os.path.join(workdir, "finalizadas.txt")
+    with open(text_path, "w", encoding="utf-8") as f:
+        write_lines(f, args.rows, args.nodes)
+    _, elapsed = timed(lambda: full_reparse(text_path).get("node1", [])[-50:])
+    print(f"{'texto: re-parseo + filtro':<26} | {elapsed * 1000:>6.0f} ms |")
+
+    for name in os.listdir(workdir):
+        os.remove(os.path.join(workdir, name))
+    os.rmdir(workdir)
+
+
+if __name__ == "__main__":
+    main()
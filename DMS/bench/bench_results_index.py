@@ -0,0 +1,74 @@
+# DMS/bench/bench_results_index.py
+#
+# Compara el parseo completo de finalizadas.txt en cada tick contra el índice
+# incremental (bootstrap con mmap + lectura de solo las líneas nuevas) sobre
+# un archivo sintético de 1M de líneas.
+#
+#   python -m bench.bench_results_index --lines 1000000 --append 100
+
+import argparse
+import os
+import random
+import tempfile
+
+from bench.common import timed
+from utils.results_index import ResultsIndex, parse_result_line
+
+
+def write_lines(f, count, nodes):
+    for _ in range(count):
+        node = random.randint(1, nodes)
+        audio = random.randint(1, 500)
+        f.write(f"Nodo node{node} terminó la tarea: audios\\audio{audio}.mp3 en {random.uniform(5, 30):.2f} s\n")
+
+
+def full_reparse(path):
+    """El camino anterior: abrir y parsear el archivo completo en cada tick."""
+    results = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            parsed = parse_result_line(line)
+            if parsed:
+                results.setdefault(parsed[0], []).append(parsed[1])
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del índice incremental de resultados")
+    parser.add_argument("--lines", type=int, default=1_000_000)
+    parser.add_argument("--append", type=int, default=100, help="Líneas agregadas entre ticks")
+    parser.add_argument("--ticks", type=int, default=5)
+    parser.add_argument("--nodes", type=int, default=10)
+    args = parser.parse_args()
+
+    fd, path = tempfile.mkstemp(suffix=".txt")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            write_lines(f, args.lines, args.nodes)
+        print(f"Archivo sintético: {args.lines:,} líneas, {os.path.getsize(path) / 1e6:.1f} MB")
+
+        index = ResultsIndex(path)
+        _, elapsed = timed(index.bootstrap)
+        print(f"bootstrap (mmap):        {elapsed * 1000:10.1f} ms")
+
+        reparse_times = []
+        poll_times = []
+        for _ in range(args.ticks):
+            with open(path, "a", encoding="utf-8") as f:
+                write_lines(f, args.append, args.nodes)
+            _, elapsed = timed(full_reparse, path)
+            reparse_times.append(elapsed)
+            (delta, _), elapsed = timed(index.poll)
+            poll_times.append(elapsed)
+            assert sum(len(lines) for lines in delta.values()) == args.append
+
+        reparse = sum(reparse_times) / len(reparse_times)
+        print(f"parseo completo por tick:{reparse * 1000:10.1f} ms")
+        poll = sum(poll_times) / len(poll_times)
+        print(f"poll incremental por tick:{poll * 1000:9.3f} ms")
+    finally:
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
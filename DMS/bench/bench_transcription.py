@@ -0,0 +1,71 @@
+# DMS/bench/bench_transcription.py
+#
+# Transcribe los audios de audios/ con el pool de procesos de los nodos:
+#   1) en frío: cada tarea carga el modelo (lo que pasaría sin init_worker),
+#   2) en caliente: el modelo queda cargado en cada proceso,
+#   3) segunda pasada: todo sale del cache por sha256 en Redis.
+#
+# Por defecto usa el modelo stub (sin red ni torch); con Whisper instalado:
+#   WHISPER_MODEL=tiny python -m bench.bench_transcription --workers 2 [--fake]
+
+import glob
+import multiprocessing
+import os
+import time
+
+import transcription
+from bench.common import base_parser, connect, timed
+from utils.worker_pool import WorkerPool
+
+
+def cold_transcribe(path):
+    transcription._model = None
+    return transcription.transcribe(path)
+
+
+def run(pool, fn, files):
+    futures = [pool.cpu.submit(fn, path) for path in files]
+    return [future.result() for future in futures]
+
+
+def main():
+    parser = base_parser("Whisper en frío, en caliente y con cache por hash")
+    parser.add_argument("--audios", default="audios", help="Carpeta con los .mp3")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    # Sin WHISPER_MODEL explícito se usa el stub (los procesos lo heredan por fork)
+    transcription.WHISPER_MODEL = os.getenv("WHISPER_MODEL", "stub")
+    files = sorted(glob.glob(os.path.join(args.audios, "*.mp3")))
+    if not files:
+        print(f"⚠️ No hay .mp3 en {args.audios}")
+        return
+    print(f"{len(files)} audios, {args.workers} procesos, modelo {transcription.WHISPER_MODEL}")
+
+    cold = WorkerPool(1, args.workers)
+    _, elapsed = timed(run, cold, cold_transcribe, files)
+    cold.shutdown()
+    print(f"   en frío: {elapsed:>7.2f} s ({elapsed / len(files):.2f} s por audio)")
+
+    warm = WorkerPool(1, args.workers, initializer=transcription.init_worker,
+                      initargs=(multiprocessing.Value("i", 0), args.workers))
+    _, startup = timed(warm.warm_up)
+    _, elapsed = timed(run, warm, transcription.transcribe, files)
+    print(f"en caliente: {elapsed:>7.2f} s ({elapsed / len(files):.2f} s por audio, "
+          f"+{startup:.2f} s de carga al arrancar)")
+
+    r = connect(args.fake)
+    hashes = [transcription.file_hash(path) for path in files]
+    r.delete(*[transcription.cache_key(digest) for digest in hashes])
+    run_cpu = lambda path: warm.run_cpu(transcription.transcribe, path)
+    for label in ("primera pasada", "segunda pasada"):
+        start = time.perf_counter()
+        hits = sum(transcription.cached_transcribe(r, path, run_cpu, "bench", digest)[1]
+                   for path, digest in zip(files, hashes))
+        print(f"{label:>14}: {time.perf_counter() - start:>7.2f} s, {hits}/{len(files)} desde el cache")
+    r.delete(*[transcription.cache_key(digest) for digest in hashes])
+    warm.shutdown()
+
+
+if __name__ == "__main__":
+    main()
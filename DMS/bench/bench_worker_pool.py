@@ -0,0 +1,117 @@
+# DMS/bench/bench_worker_pool.py
+#
+# Modelo anterior (un threading.Thread nuevo por tarea, hasta 5 a la vez, con
+# el trabajo de CPU corriendo dentro del hilo) contra WorkerPool (hilos fijos
+# + procesos para CPU). Carga mixta de tareas de CPU (bucle en Python, como
+# la transcripción) y de I/O (sleep). No usa Redis.
+#
+#   python -m bench.bench_worker_pool --tasks 200 --cpu-ratio 0.5
+
+import random
+import threading
+import time
+
+from bench.common import base_parser, percentile
+from utils.worker_pool import WorkerPool
+
+MAX_TASKS = 5
+
+
+def cpu_work(iterations):
+    total = 0
+    for i in range(iterations):
+        total += i * i
+    return total
+
+
+def make_tasks(args):
+    rng = random.Random(args.seed)
+    return [("cpu" if rng.random() < args.cpu_ratio else "io") for _ in range(args.tasks)]
+
+
+def run_thread_per_task(tasks, args):
+    """Como el task_processor anterior: un hilo por tarea y espera si hay 5 corriendo."""
+    latencies = []
+    lock = threading.Lock()
+    slots = threading.Semaphore(MAX_TASKS)
+
+    def work(kind, arrived):
+        try:
+            if kind == "cpu":
+                cpu_work(args.cpu_iterations)
+            else:
+                time.sleep(args.io_ms / 1000.0)
+            with lock:
+                latencies.append((kind, time.perf_counter() - arrived))
+        finally:
+            slots.release()
+
+    threads = []
+    for kind in tasks:
+        arrived = time.perf_counter()
+        slots.acquire()
+        thread = threading.Thread(target=work, args=(kind, arrived), daemon=True)
+        threads.append(thread)
+        thread.start()
+        time.sleep(args.interval_ms / 1000.0)
+    for thread in threads:
+        thread.join()
+    return latencies
+
+
+def run_pool(tasks, args):
+    pool = WorkerPool(MAX_TASKS, args.cpu_workers)
+    pool.warm_up()
+    latencies = []
+    lock = threading.Lock()
+
+    def work(kind, arrived):
+        if kind == "cpu":
+            pool.run_cpu(cpu_work, args.cpu_iterations)
+        else:
+            time.sleep(args.io_ms / 1000.0)
+        with lock:
+            latencies.append((kind, time.perf_counter() - arrived))
+
+    futures = []
+    for kind in tasks:
+        arrived = time.perf_counter()
+        future = pool.try_submit(work, kind, arrived)
+        while future is None:
+            pool.limit.wait_for_slot()
+            future = pool.try_submit(work, kind, arrived)
+        futures.append(future)
+        time.sleep(args.interval_ms / 1000.0)
+    for future in futures:
+        future.result()
+    pool.shutdown()
+    return latencies
+
+
+def main():
+    parser = base_parser("Hilo por tarea vs WorkerPool: throughput y latencia de cola")
+    parser.add_argument("--tasks", type=int, default=200)
+    parser.add_argument("--cpu-ratio", type=float, default=0.5, help="Fracción de tareas de CPU")
+    parser.add_argument("--cpu-iterations", type=int, default=2_000_000)
+    parser.add_argument("--io-ms", type=float, default=50)
+    parser.add_argument("--interval-ms", type=float, default=5, help="Separación entre llegadas")
+    parser.add_argument("--cpu-workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=3)
+    args = parser.parse_args()
+
+    tasks = make_tasks(args)
+    print(f"{len(tasks)} tareas ({tasks.count('cpu')} de CPU, {tasks.count('io')} de I/O), "
+          f"hasta {MAX_TASKS} simultáneas")
+    for name, runner in (("hilo por tarea", run_thread_per_task), ("WorkerPool", run_pool)):
+        start = time.perf_counter()
+        latencies = runner(tasks, args)
+        elapsed = time.perf_counter() - start
+        overall = [latency for _, latency in latencies]
+        io_only = [latency for kind, latency in latencies if kind == "io"]
+        print(f"{name:>15}: {len(latencies) / elapsed:>7.1f} tareas/seg | "
+              f"p50 {percentile(overall, 50) * 1000:>8.1f} ms | p99 {percentile(overall, 99) * 1000:>8.1f} ms | "
+              f"p99 I/O {percentile(io_only, 99) * 1000:>8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
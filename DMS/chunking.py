@@ -0,0 +1,198 @@
+# chunking.py
+#
+# Transcripción por segmentos de audios largos. En lugar de que un solo nodo
+# se quede con todo el archivo:
+#   1) el nodo que recibe la tarea lo corta en segmentos de ~CHUNK_SECONDS,
+#      eligiendo como punto de corte el silencio más cercano (ffmpeg
+#      silencedetect) y solapando CHUNK_OVERLAP segundos con los vecinos,
+#   2) encola un sub-tarea "transcribe_chunk" por segmento en la cola global,
+#      que cualquier nodo puede tomar,
+#   3) el nodo que completa el último segmento une los textos en orden,
+#      quitando las palabras repetidas por el solapamiento.
+#
+# El estado del trabajo vive en Redis (chunkjob:{id} y chunkjob:{id}:parts).
+# Los segmentos se escriben en CHUNK_DIR, que debe ser visible para todos los
+# nodos (igual que audios/).
+
+import json
+import os
+import re
+import shutil
+import subprocess
+import time
+import uuid
+
+from utils import lanes
+from utils.audio import mp3_duration
+
+CHUNK_SECONDS = float(os.getenv("CHUNK_SECONDS", "30"))
+CHUNK_OVERLAP = float(os.getenv("CHUNK_OVERLAP", "1.0"))
+# Solo se dividen archivos de al menos este largo (0 = nunca dividir)
+CHUNK_MIN_SECONDS = float(os.getenv("CHUNK_MIN_SECONDS", str(2 * CHUNK_SECONDS)))
+CHUNK_DIR = os.getenv("CHUNK_DIR", os.path.join("audios", "segments"))
+SILENCE_NOISE_DB = os.getenv("SILENCE_NOISE_DB", "-35")
+SILENCE_MIN_SECONDS = os.getenv("SILENCE_MIN_SECONDS", "0.4")
+# Qué tan lejos del corte ideal (fracción de CHUNK_SECONDS) se busca un silencio
+SILENCE_SEARCH = 0.3
+JOB_TTL = 24 * 3600
+# Palabras que se comparan al quitar el texto repetido entre segmentos
+MERGE_WINDOW = 30
+
+_SILENCE_RE = re.compile(r"silence_(start|end): (-?[\d.]+)")
+_DURATION_RE = re.compile(r"Duration: (\d+):(\d+):([\d.]+)")
+
+
+def job_key(job_id):
+    return f"chunkjob:{job_id}"
+
+
+def parts_key(job_id):
+    return f"chunkjob:{job_id}:parts"
+
+
+def should_split(path, duration=None):
+    if CHUNK_MIN_SECONDS <= 0:
+        return False
+    duration = duration if duration is not None else mp3_duration(path)
+    return bool(duration and duration >= CHUNK_MIN_SECONDS)
+
+
+def detect_silences(path):
+    """Retorna ([(inicio, fin), ...], duración) usando ffmpeg silencedetect."""
+    proc = subprocess.run(
+        ["ffmpeg", "-hide_banner", "-nostats", "-i", path,
+         "-af", f"silencedetect=noise={SILENCE_NOISE_DB}dB:d={SILENCE_MIN_SECONDS}", "-f", "null", "-"],
+        capture_output=True, text=True, check=True,
+    )
+    silences = []
+    start = None
+    for kind, value in _SILENCE_RE.findall(proc.stderr):
+        if kind == "start":
+            start = max(0.0, float(value))
+        elif start is not None:
+            silences.append((start, float(value)))
+            start = None
+    duration = None
+    match = _DURATION_RE.search(proc.stderr)
+    if match:
+        hours, minutes, seconds = match.groups()
+        duration = int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+    return silences, duration
+
+
+def plan_segments(duration, silences, target=CHUNK_SECONDS, overlap=CHUNK_OVERLAP):
+    """
+    Elige los cortes (en el medio del silencio más cercano a cada múltiplo de
+    `target`, o en el múltiplo exacto si no hay silencios cerca) y retorna los
+    segmentos solapados [{"index", "start", "end"}, ...].
+    """
+    middles = [(a + b) / 2 for a, b in silences]
+    cuts = []
+    position = 0.0
+    # El último segmento puede medir hasta 1.5 * target para no dejar uno muy corto
+    while duration - position > target * 1.5:
+        ideal = position + target
+        window = target * SILENCE_SEARCH
+        near = [m for m in middles if abs(m - ideal) <= window and m > position]
+        cut = min(near, key=lambda m: abs(m - ideal)) if near else ideal
+        cuts.append(cut)
+        position = cut
+    bounds = [0.0] + cuts + [duration]
+    return [
+        {"index": i, "start": max(0.0, a - overlap), "end": min(duration, b + overlap)}
+        for i, (a, b) in enumerate(zip(bounds, bounds[1:]))
+    ]
+
+
+def cut_segment(path, start, end, out_path):
+    """Copia [start, end) a out_path sin recodificar."""
+    subprocess.run(
+        ["ffmpeg", "-v", "error", "-y", "-ss", f"{start:.3f}", "-t", f"{end - start:.3f}",
+         "-i", path, "-c", "copy", out_path],
+        check=True,
+    )
+
+
+def split_job(r, path, digest, queue, owner=""):
+    """
+    Corta `path` y encola un transcribe_chunk por segmento en `queue`.
+    Retorna (job_id, cantidad de segmentos).
+    """
+    silences, duration = detect_silences(path)
+    duration = duration or mp3_duration(path)
+    segments = plan_segments(duration, silences)
+    job_id = uuid.uuid4().hex[:12]
+    job_dir = os.path.join(CHUNK_DIR, job_id)
+    os.makedirs(job_dir, exist_ok=True)
+    ext = os.path.splitext(path)[1] or ".mp3"
+    for segment in segments:
+        segment["file"] = os.path.join(job_dir, f"{segment['index']:03d}{ext}")
+        cut_segment(path, segment["start"], segment["end"], segment["file"])
+
+    pipe = r.pipeline()
+    pipe.hset(job_key(job_id), mapping={
+        "file": path,
+        "hash": digest,
+        "total": len(segments),
+        "created": time.time(),
+        "splitter": owner,
+        "dir": job_dir,
+    })
+    pipe.expire(job_key(job_id), JOB_TTL)
+    now = time.time()
+    for segment in segments:
+        task = {"type": "transcribe_chunk", "job": job_id, "enqueued_at": now, **segment}
+        lanes.push(pipe, queue, json.dumps(task), "transcribe_chunk")
+    pipe.execute()
+    return job_id, len(segments)
+
+
+def record_chunk(r, task, result):
+    """Guarda el texto de un segmento. Retorna True si con él se completó el trabajo."""
+    job_id = task["job"]
+    part = {"text": result["text"], "start": task["start"], "end": task["end"], "elapsed": result["elapsed"]}
+    pipe = r.pipeline()  # MULTI: el conteo y el total se leen junto con la escritura
+    pipe.hset(parts_key(job_id), task["index"], json.dumps(part))
+    pipe.expire(parts_key(job_id), JOB_TTL)
+    pipe.hlen(parts_key(job_id))
+    pipe.hget(job_key(job_id), "total")
+    _, _, count, total = pipe.execute()
+    return total is not None and count >= int(total)
+
+
+def _normalize(word):
+    return re.sub(r"[^\w]", "", word.lower())
+
+
+def merge_texts(texts, window=MERGE_WINDOW):
+    """Une los textos quitando al inicio de cada uno lo que repite el final del anterior."""
+    merged = []
+    for text in texts:
+        words = text.split()
+        tail = [_normalize(w) for w in merged[-window:]]
+        head = [_normalize(w) for w in words[:window]]
+        skip = 0
+        for k in range(min(len(tail), len(head)), 0, -1):
+            if tail[-k:] == head[:k]:
+                skip = k
+                break
+        merged.extend(words[skip:])
+    return " ".join(merged)
+
+
+def merge_job(r, job_id, owner=""):
+    """
+    Une los segmentos de un trabajo completo. Solo el primer nodo que llega
+    lo hace (HSETNX merged); los demás reciben None.
+    Retorna (archivo, hash, {"text", "elapsed", "segments"}) o None.
+    """
+    if not r.hsetnx(job_key(job_id), "merged", owner or "node"):
+        return None
+    job = r.hgetall(job_key(job_id))
+    parts = r.hgetall(parts_key(job_id))
+    ordered = [json.loads(parts[index]) for index in sorted(parts, key=int)]
+    text = merge_texts(part["text"] for part in ordered)
+    elapsed = time.time() - float(job.get("created", time.time()))
+    r.delete(parts_key(job_id))
+    shutil.rmtree(job.get("dir", ""), ignore_errors=True)
+    return job.get("file"), job.get("hash"), {"text": text, "elapsed": elapsed, "segments": len(ordered)}
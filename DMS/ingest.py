@@ -0,0 +1,235 @@
+# ingest.py
+#
+# Ingesta de audios: vigila la carpeta audios/ y encola una tarea
+# "transcribe" por cada .mp3 nuevo.
+#   - Detecta archivos terminados de escribir con inotify (IN_CLOSE_WRITE /
+#     IN_MOVED_TO); si inotify no está disponible (Windows, macOS, volúmenes
+#     de red) revisa la carpeta cada INGEST_POLL segundos y toma un archivo
+#     cuando su tamaño dejó de cambiar entre dos revisiones.
+#   - Calcula el sha256 leyendo por bloques y descarta los audios ya
+#     encolados (ingest:hashes), aunque lleguen con otro nombre.
+#   - Lee la duración de las cabeceras del mp3 y la agrega a la tarea.
+#   - Encola en un sorted set (global:audio_tasks) cuyo score define el orden:
+#       sjf       primero el audio más corto (menor tiempo promedio de espera)
+#       deadline  primero el plazo más cercano: llegada + INGEST_SLACK +
+#                 INGEST_DEADLINE_FACTOR * duración
+#       fifo      orden de llegada
+#
+# Se ejecuta solo (python ingest.py) o como hilo dentro de main.py.
+
+import ctypes
+import ctypes.util
+import json
+import os
+import select
+import struct
+import time
+
+import transcription
+from utils.audio import mp3_duration
+
+AUDIO_TASKS_QUEUE = "global:audio_tasks"
+INGESTED_HASHES_KEY = "ingest:hashes"
+
+INGEST_DIR = os.getenv("INGEST_DIR", "audios")
+INGEST_ORDER = os.getenv("INGEST_ORDER", "sjf")
+INGEST_POLL = float(os.getenv("INGEST_POLL", "1"))
+INGEST_SLACK = float(os.getenv("INGEST_SLACK", "60"))
+INGEST_DEADLINE_FACTOR = float(os.getenv("INGEST_DEADLINE_FACTOR", "0.5"))
+INGEST_BATCH = int(os.getenv("INGEST_BATCH", "200"))
+AUDIO_EXTENSIONS = (".mp3",)
+
+# Encola la tarea solo si el hash no estaba; todo en una sola llamada.
+# KEYS[1] = INGESTED_HASHES_KEY, KEYS[2] = cola, ARGV[1] = hash,
+# ARGV[2] = score, ARGV[3] = tarea
+ENQUEUE_LUA = """
+if redis.call('SADD', KEYS[1], ARGV[1]) == 0 then
+  return 0
+end
+redis.call('ZADD', KEYS[2], ARGV[2], ARGV[3])
+return 1
+"""
+
+
+def _is_audio(name):
+    return name.lower().endswith(AUDIO_EXTENSIONS) and not name.startswith(".")
+
+
+def build_task(path, now=None):
+    """Tarea de transcripción con hash y metadatos leídos sin decodificar el audio."""
+    now = time.time() if now is None else now
+    return {
+        "type": "transcribe",
+        "file": path,
+        "hash": transcription.file_hash(path),
+        "size": os.path.getsize(path),
+        "duration": mp3_duration(path) or 0.0,
+        "ingested": now,
+    }
+
+
+def task_score(task, order=INGEST_ORDER):
+    if order == "sjf":
+        return task["duration"]
+    if order == "deadline":
+        return task["ingested"] + INGEST_SLACK + INGEST_DEADLINE_FACTOR * task["duration"]
+    if order == "fifo":
+        return task["ingested"]
+    raise ValueError(f"Orden de ingesta desconocido: {order} (opciones: sjf, deadline, fifo)")
+
+
+class Ingestor:
+    """Convierte rutas en tareas y las encola sin repetir audios."""
+
+    def __init__(self, r, queue=AUDIO_TASKS_QUEUE, order=INGEST_ORDER):
+        task_score({"duration": 0.0, "ingested": 0.0}, order)  # valida el orden
+        self.r = r
+        self.queue = queue
+        self.order = order
+        self._enqueue = r.register_script(ENQUEUE_LUA)
+
+    def ingest(self, paths):
+        """Encola los audios nuevos de `paths`; retorna (encolados, duplicados)."""
+        tasks = []
+        for path in paths:
+            try:
+                tasks.append(build_task(path))
+            except OSError as e:
+                print(f"⚠️ No se pudo leer {path}: {e}")
+        if not tasks:
+            return 0, 0
+        pipe = self.r.pipeline(transaction=False)
+        for task in tasks:
+            self._enqueue(
+                keys=[INGESTED_HASHES_KEY, self.queue],
+                args=[task["hash"], task_score(task, self.order), json.dumps(task)],
+                client=pipe,
+            )
+        added = sum(pipe.execute())
+        return added, len(tasks) - added
+
+
+class PollingWatcher:
+    """Revisa la carpeta cada `interval` segundos; emite un archivo cuando su tamaño se estabiliza."""
+
+    def __init__(self, directory, interval=INGEST_POLL):
+        self.directory = directory
+        self.interval = interval
+        self._pending = {}   # ruta -> (tamaño, mtime) de la revisión anterior
+        self._seen = set()
+
+    def scan(self):
+        ready = []
+        current = {}
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if not entry.is_file() or not _is_audio(entry.name) or entry.path in self._seen:
+                    continue
+                stat = entry.stat()
+                current[entry.path] = (stat.st_size, stat.st_mtime)
+                if self._pending.get(entry.path) == current[entry.path]:
+                    ready.append(entry.path)
+        for path in ready:
+            self._seen.add(path)
+            current.pop(path)
+        self._pending = current
+        return ready
+
+    def batches(self):
+        while True:
+            ready = self.scan()
+            for i in range(0, len(ready), INGEST_BATCH):
+                yield ready[i:i + INGEST_BATCH]
+            time.sleep(self.interval)
+
+
+# struct inotify_event { int wd; uint32_t mask, cookie, len; char name[]; }
+_EVENT = struct.Struct("iIII")
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+
+class InotifyWatcher:
+    """inotify de Linux vía ctypes (sin dependencias). Lanza OSError si no está disponible."""
+
+    def __init__(self, directory, timeout=INGEST_POLL):
+        libc_name = ctypes.util.find_library("c")
+        if not hasattr(select, "poll") or not libc_name:
+            raise OSError("inotify no disponible")
+        libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(libc, "inotify_init1"):
+            raise OSError("inotify no disponible")
+        self.directory = directory
+        self.timeout = timeout
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1")
+        mask = IN_CLOSE_WRITE | IN_MOVED_TO
+        if libc.inotify_add_watch(self.fd, os.fsencode(directory), mask) < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, f"inotify_add_watch {directory}")
+        self._poller = select.poll()
+        self._poller.register(self.fd, select.POLLIN)
+
+    def _read_events(self):
+        paths = []
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                return paths
+            offset = 0
+            while offset < len(data):
+                _, _, _, length = _EVENT.unpack_from(data, offset)
+                offset += _EVENT.size
+                name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+                offset += length
+                if _is_audio(name):
+                    paths.append(os.path.join(self.directory, name))
+
+    def batches(self):
+        # Lo que ya estaba en la carpeta antes de empezar a vigilar
+        with os.scandir(self.directory) as entries:
+            existing = [e.path for e in entries if e.is_file() and _is_audio(e.name)]
+        for i in range(0, len(existing), INGEST_BATCH):
+            yield existing[i:i + INGEST_BATCH]
+        while True:
+            if self._poller.poll(self.timeout * 1000):
+                paths = self._read_events()
+                for i in range(0, len(paths), INGEST_BATCH):
+                    yield paths[i:i + INGEST_BATCH]
+
+    def close(self):
+        os.close(self.fd)
+
+
+def open_watcher(directory, polling=False):
+    """InotifyWatcher si se puede, PollingWatcher si no."""
+    if not polling:
+        try:
+            return InotifyWatcher(directory)
+        except OSError as e:
+            print(f"⚠️ inotify no disponible ({e}), revisando {directory} cada {INGEST_POLL} s")
+    return PollingWatcher(directory)
+
+
+def run(r, directory=INGEST_DIR, order=INGEST_ORDER, polling=False):
+    """Bucle de ingesta; no retorna."""
+    os.makedirs(directory, exist_ok=True)
+    ingestor = Ingestor(r, order=order)
+    watcher = open_watcher(directory, polling)
+    print(f"👀 Vigilando {directory} ({type(watcher).__name__}, orden {order})")
+    for batch in watcher.batches():
+        added, duplicates = ingestor.ingest(batch)
+        if added:
+            print(f"📥 {added} audios encolados en {ingestor.queue}")
+        if duplicates:
+            print(f"♻️ {duplicates} audios repetidos descartados")
+
+
+if __name__ == "__main__":
+    from utils import redis_client
+    run(redis_client.get_redis(), polling=os.getenv("INGEST_POLLING", "0") == "1")
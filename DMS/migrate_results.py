@@ -0,0 +1,17 @@
+# migrate_results.py
+#
+# Importa un finalizadas.txt al store de resultados (SQLite). Se puede correr
+# más de una vez sobre el mismo archivo: las líneas ya importadas se ignoran.
+#   python migrate_results.py [finalizadas.txt] [results.db]
+
+import sys
+
+from utils.result_store import RESULTS_DB, ResultStore
+
+if __name__ == "__main__":
+    source = sys.argv[1] if len(sys.argv) > 1 else "finalizadas.txt"
+    target = sys.argv[2] if len(sys.argv) > 2 else RESULTS_DB
+    store = ResultStore(target)
+    added = store.import_text(source)
+    print(f"📦 {added} resultados importados de {source} a {target} ({store.count()} en total)")
+    store.close()
@@ -1,21 +1,28 @@
-import time
 import json
-import threading
-from queue import Queue
 from utils import redis_client
+from utils.state_channel import save_state
+from utils.lanes import lane_queue
+from utils.queues import reap_expired
+from utils.heartbeat import HeartbeatTimer
+from utils.logs import get_logger
+from utils import metrics
 import os
 import sys
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-PROYECTO_SNAKE_PATH = os.path.join(BASE_DIR, "ProyectoSnake")
+# La lógica del juego vive en ProyectoSnake/core/logic
+PROYECTO_SNAKE_PATH = os.path.join(BASE_DIR, "ProyectoSnake", "core")
 if PROYECTO_SNAKE_PATH not in sys.path:
     sys.path.append(PROYECTO_SNAKE_PATH)
 
-from Logic import create_game_state
+from logic.game_state import create_game_state
 
 r = redis_client.get_redis()
 node_id = "nodoMovimiento"
 print(f"🔧 Nodo de movimiento registrado como ID: {node_id}")
+log = get_logger(node_id)
+# Solo el carril de movimientos de la cola global (ver utils/lanes.py)
+incoming = lane_queue(r, "global:unassigned_tasks", node_id, lanes=("moves",))
 
 def move_snake(snake, direction):
     new_snake = [list(pos) for pos in snake]
@@ -34,11 +41,16 @@ def move_snake(snake, direction):
 
 def process_task(data):
     task = json.loads(data)
+    metrics.observe_wait(task.get("type"), task)
+    with metrics.task_timer(task.get("type")):
+        apply_task(task)
+
+def apply_task(task):
     if task.get("type") != "snake_move":
-        print(f"⚠️ Tipo de tarea no soportado: {task.get('type')}")
+        log.warning("⚠️ Tipo de tarea no soportado: %s", task.get("type"))
         return
 
-    print(f"🐍 Nodo de movimiento procesando tarea Snake: {task}")
+    log.debug("🐍 Nodo de movimiento procesando tarea Snake: %s", task)
     state_json = r.get("snake:state")
     if state_json:
         if isinstance(state_json, bytes):
@@ -68,7 +80,7 @@ def process_task(data):
 
     # Pasa [food] para que objectives sea una lista de listas
     new_state = create_game_state(snake, [food], obstacles, score, game_over)
-    r.set("snake:state", json.dumps(new_state))
+    save_state(r, json.dumps(new_state))
 
 def main():
     print(f"🎤 Nodo de movimiento {node_id} iniciando...")
@@ -78,14 +90,21 @@ def main():
         initial_objectives = [[10, 10]]
         initial_obstacles = []
         initial_state = create_game_state(initial_snake, initial_objectives, initial_obstacles)
-        r.set("snake:state", json.dumps(initial_state))
+        save_state(r, json.dumps(initial_state))
 
+    incoming.recover()
+    metrics.track_queue(r, incoming)
+    metrics.start_exporter()
+    # Este nodo no reporta heartbeat; el temporizador solo reentrega tareas vencidas
+    HeartbeatTimer(lambda: reap_expired(r, node_id)).start()
     while True:
-        task = r.blpop("global:unassigned_tasks", timeout=1)
-        if task:
-            _, data = task
-            process_task(data)
-        time.sleep(0.1)
+        for source, data in incoming.claim():
+            try:
+                process_task(data)
+            except Exception as e:
+                log.error("❌ Error al procesar tarea: %s", e)
+            finally:
+                incoming.ack(source, data)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,146 @@
+# transcription.py
+#
+# Motor de transcripción de los nodos DMS. Cada proceso del pool de CPU carga
+# el modelo de Whisper una sola vez al arrancar (init_worker) y lo reutiliza
+# en todas sus tareas, opcionalmente fijado a un núcleo y con los hilos de
+# torch ajustados a los núcleos que le tocan.
+#
+# Configuración del nodo (variables de entorno):
+#   WHISPER_MODEL         tiny, base, small, ... o "stub" (sin red ni torch)
+#   WHISPER_DEVICE        cpu o cuda
+#   WHISPER_COMPUTE_TYPE  float32 o float16 (float16 solo tiene sentido en cuda)
+#   TORCH_THREADS         hilos de torch por proceso (0 = núcleos / procesos)
+#   PIN_CORES             1 para fijar cada proceso a un núcleo distinto
+#
+# Antes de transcribir, el nodo calcula el sha256 del archivo y busca la
+# transcripción en Redis (transcripts:{hash}); un mismo audio no se
+# transcribe dos veces aunque llegue con otro nombre.
+
+import hashlib
+import os
+import time
+
+from utils.resources import measure_task
+
+WHISPER_MODEL = os.getenv("WHISPER_MODEL", "base")
+WHISPER_DEVICE = os.getenv("WHISPER_DEVICE", "cpu")
+WHISPER_COMPUTE_TYPE = os.getenv("WHISPER_COMPUTE_TYPE", "float32")
+TORCH_THREADS = int(os.getenv("TORCH_THREADS", "0"))
+PIN_CORES = os.getenv("PIN_CORES", "0") == "1"
+# Segundos que simula tardar el modelo stub por archivo
+STUB_DELAY = float(os.getenv("WHISPER_STUB_DELAY", "0"))
+
+CACHE_PREFIX = "transcripts:"
+CACHE_TTL = int(os.getenv("TRANSCRIPT_CACHE_TTL", str(30 * 24 * 3600)))
+# Mientras otro nodo transcribe el mismo audio se espera su resultado
+CACHE_LOCK_TTL = 600
+CACHE_WAIT = 0.5
+
+HASH_CHUNK = 1024 * 1024
+
+_model = None
+
+
+class StubModel:
+    """Modelo falso para pruebas: no descarga pesos ni necesita torch."""
+
+    def transcribe(self, path, **kwargs):
+        if STUB_DELAY:
+            time.sleep(STUB_DELAY)
+        size = os.path.getsize(path)
+        return {"text": f"[stub] {os.path.basename(path)} ({size} bytes)", "segments": []}
+
+
+def load_model(name=None, device=None):
+    name = name or WHISPER_MODEL
+    device = device or WHISPER_DEVICE
+    if name == "stub":
+        return StubModel()
+    import whisper  # Se importa solo en los procesos que transcriben
+    return whisper.load_model(name, device=device)
+
+
+def _pin_to_core(index):
+    """Fija el proceso a un núcleo; retorna cuántos núcleos le quedan."""
+    if not hasattr(os, "sched_getaffinity"):
+        return os.cpu_count() or 1
+    cores = sorted(os.sched_getaffinity(0))
+    if PIN_CORES and cores:
+        os.sched_setaffinity(0, {cores[index % len(cores)]})
+        return 1
+    return len(cores)
+
+
+def init_worker(counter=None, workers=1):
+    """
+    Initializer de cada proceso del pool: fija núcleo, ajusta los hilos de
+    torch y deja el modelo cargado antes de la primera tarea.
+    """
+    global _model
+    index = 0
+    if counter is not None:
+        with counter.get_lock():
+            index = counter.value
+            counter.value += 1
+    cores = _pin_to_core(index)
+    if WHISPER_MODEL != "stub":
+        import torch
+        torch.set_num_threads(TORCH_THREADS or max(1, cores // (1 if PIN_CORES else workers)))
+    _model = load_model()
+    print(f"🧠 Proceso {os.getpid()} listo con Whisper {WHISPER_MODEL} ({WHISPER_DEVICE}, {WHISPER_COMPUTE_TYPE})")
+
+
+def transcribe(path):
+    """
+    Transcribe un archivo con el modelo del proceso (se carga si hace falta).
+    Retorna el texto, el tiempo real, el tiempo de CPU y el RSS del proceso.
+    """
+    global _model
+    if _model is None:
+        _model = load_model()
+    start = time.time()
+    with measure_task() as usage:
+        result = _model.transcribe(path, fp16=(WHISPER_COMPUTE_TYPE == "float16"))
+    # cpu_time es del proceso completo: incluye los hilos de torch
+    return {"text": result.get("text", "").strip(), "elapsed": time.time() - start, **usage.as_dict()}
+
+
+def file_hash(path):
+    """sha256 del archivo leído por bloques (no lo carga entero en memoria)."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def cache_key(digest):
+    return f"{CACHE_PREFIX}{digest}"
+
+
+def cached_transcribe(r, path, run, owner="", digest=None):
+    """
+    Retorna la transcripción de `path` desde el cache o la calcula con
+    run(path) (normalmente pool.run_cpu(transcribe, path)) y la guarda.
+    Retorna (resultado, hit_de_cache).
+    """
+    digest = digest or file_hash(path)
+    key = cache_key(digest)
+    lock = f"{key}:lock"
+    deadline = time.time() + CACHE_LOCK_TTL
+    while True:
+        text = r.get(key)
+        if text is not None:
+            return {"text": text, "elapsed": 0.0, "hash": digest}, True
+        # Solo un nodo transcribe cada audio; los demás esperan su resultado
+        if r.set(lock, owner or "node", nx=True, ex=CACHE_LOCK_TTL) or time.time() > deadline:
+            break
+        time.sleep(CACHE_WAIT)
+
+    try:
+        result = run(path)
+        r.set(key, result["text"], ex=CACHE_TTL)
+    finally:
+        r.delete(lock)
+    result["hash"] = digest
+    return result, False
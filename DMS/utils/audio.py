@@ -0,0 +1,102 @@
+# utils/audio.py
+#
+# Duración de un .mp3 leyendo solo sus cabeceras (ID3v2, primer frame y, si
+# existe, la cabecera Xing/Info/VBRI de los archivos VBR). No decodifica el
+# audio ni necesita ffmpeg, así que sirve para planificar tareas al instante.
+
+import os
+
+_BITRATES = {
+    # (versión MPEG 1 o 2, capa) -> kbps por índice; MPEG 2.5 usa la tabla de MPEG 2
+    (1, 1): [0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448],
+    (1, 2): [0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384],
+    (1, 3): [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    (2, 1): [0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256],
+    (2, 2): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+    (2, 3): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+_SAMPLE_RATES = {
+    3: [44100, 48000, 32000],  # MPEG 1
+    2: [22050, 24000, 16000],  # MPEG 2
+    0: [11025, 12000, 8000],   # MPEG 2.5
+}
+
+# Bytes que alcanzan para el tag ID3v2 típico más el primer frame
+HEADER_READ = 64 * 1024
+
+
+def _id3v2_size(data):
+    if data[:3] != b"ID3" or len(data) < 10:
+        return 0
+    size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+    footer = 10 if data[5] & 0x10 else 0
+    return 10 + size + footer
+
+
+def _parse_frame_header(data, i):
+    """Retorna (kbps, sample_rate, muestras por frame, versión, mono) o None."""
+    if i + 4 > len(data) or data[i] != 0xFF or (data[i + 1] & 0xE0) != 0xE0:
+        return None
+    version_bits = (data[i + 1] >> 3) & 0x03
+    layer_bits = (data[i + 1] >> 1) & 0x03
+    bitrate_index = (data[i + 2] >> 4) & 0x0F
+    rate_index = (data[i + 2] >> 2) & 0x03
+    if version_bits == 1 or layer_bits == 0 or bitrate_index in (0, 15) or rate_index == 3:
+        return None
+    version = 1 if version_bits == 3 else 2
+    layer = 4 - layer_bits
+    kbps = _BITRATES[(version, layer)][bitrate_index]
+    sample_rate = _SAMPLE_RATES[version_bits][rate_index]
+    if layer == 1:
+        samples = 384
+    elif layer == 2 or version == 1:
+        samples = 1152
+    else:
+        samples = 576
+    mono = ((data[i + 3] >> 6) & 0x03) == 3
+    return kbps, sample_rate, samples, version, mono
+
+
+def mp3_duration(path):
+    """Duración en segundos (float) o None si no se encontró un frame MP3 válido."""
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        head = f.read(HEADER_READ)
+        offset = _id3v2_size(head)
+        if offset + 4 > len(head):
+            f.seek(offset)
+            head = f.read(HEADER_READ)
+            base = offset
+        else:
+            base = 0
+        f.seek(max(0, size - 128))
+        has_id3v1 = f.read(3) == b"TAG"
+
+    data = head
+    i = offset - base
+    frame = None
+    while i + 4 <= len(data):
+        frame = _parse_frame_header(data, i)
+        if frame:
+            break
+        i += 1
+    if not frame:
+        return None
+    kbps, sample_rate, samples, version, mono = frame
+
+    # VBR: la cabecera Xing/Info o VBRI trae la cantidad de frames
+    side_info = (17 if mono else 32) if version == 1 else (9 if mono else 17)
+    xing = i + 4 + side_info
+    if data[xing:xing + 4] in (b"Xing", b"Info"):
+        flags = int.from_bytes(data[xing + 4:xing + 8], "big")
+        if flags & 0x01:
+            frames = int.from_bytes(data[xing + 8:xing + 12], "big")
+            return frames * samples / sample_rate
+    vbri = i + 4 + 32
+    if data[vbri:vbri + 4] == b"VBRI":
+        frames = int.from_bytes(data[vbri + 14:vbri + 18], "big")
+        return frames * samples / sample_rate
+
+    # CBR: bytes de audio / bitrate
+    audio_bytes = size - (base + i) - (128 if has_id3v1 else 0)
+    return audio_bytes * 8 / (kbps * 1000)
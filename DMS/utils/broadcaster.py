@@ -0,0 +1,80 @@
+# utils/broadcaster.py
+#
+# Un único suscriptor async por proceso de API que reenvía cada cambio de
+# estado publicado por los nodos a todos los WebSockets conectados.
+
+import asyncio
+import time
+
+from utils.metrics import WS_DROPPED, WS_FANOUT
+
+
+class StateBroadcaster:
+    def __init__(self, redis_async, channel, state_key):
+        self.r = redis_async
+        self.channel = channel
+        self.state_key = state_key
+        self.clients = set()
+        self.last_state = None
+        self._task = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def register(self, websocket):
+        """Agrega el socket y le envía el último estado conocido."""
+        self.clients.add(websocket)
+        if self.last_state is None:
+            self.last_state = await self.r.get(self.state_key)
+        if self.last_state:
+            await websocket.send_text(self.last_state)
+
+    def unregister(self, websocket):
+        self.clients.discard(websocket)
+
+    async def publish(self, state):
+        """Reenvía el estado a todos los sockets; ignora estados repetidos."""
+        if state == self.last_state:
+            return
+        self.last_state = state
+        if self.clients:
+            start = time.perf_counter()
+            await asyncio.gather(*(self._send(ws, state) for ws in list(self.clients)))
+            WS_FANOUT.observe(time.perf_counter() - start)
+
+    async def _send(self, websocket, state):
+        try:
+            await websocket.send_text(state)
+        except Exception:
+            # El socket se cerró; su handler lo terminará de limpiar
+            WS_DROPPED.inc()
+            self.clients.discard(websocket)
+
+    async def _listen(self):
+        while True:
+            pubsub = self.r.pubsub()
+            try:
+                await pubsub.subscribe(self.channel)
+                while True:
+                    # Timeout corto en lugar de listen(): el pool tiene
+                    # socket_timeout y una lectura bloqueante lo dispararía
+                    message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                    if message and message["type"] == "message":
+                        await self.publish(message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️ Suscriptor de {self.channel} desconectado: {e}. Reintentando...")
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.close()
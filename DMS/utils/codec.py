@@ -0,0 +1,98 @@
+# utils/codec.py
+#
+# Serialización de snake:state, tareas y mensajes de los sockets. Usa orjson
+# si está instalado y si no el json de la librería estándar; las dos producen
+# el mismo JSON compacto, así que procesos con y sin orjson conviven.
+# Todo lo que se guarda en Redis sigue siendo JSON porque los scripts Lua lo
+# leen con cjson y los navegadores lo reciben tal cual.
+#
+# pack()/unpack() son para canales binarios: el primer byte indica el formato
+# (FORMAT_MSGPACK si msgpack está instalado, FORMAT_JSON si no), así un
+# receptor sin msgpack rechaza el mensaje en lugar de leer basura.
+#
+# peek_field() lee un campo string de primer nivel sin decodificar el resto,
+# para rutear tareas sin el ciclo loads + dumps (solo en tareas planas; las
+# que traen objetos anidados se decodifican).
+
+import json
+import re
+
+try:
+    import orjson
+except ImportError:  # Dependencia opcional
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # Dependencia opcional
+    msgpack = None
+
+JSON_BACKEND = "orjson" if orjson else "json"
+
+FORMAT_JSON = b"J"
+FORMAT_MSGPACK = b"M"
+
+
+if orjson:
+    _OPTIONS = orjson.OPT_NON_STR_KEYS
+
+    def dumpb(obj):
+        """Objeto -> JSON compacto en bytes (UTF-8)."""
+        return orjson.dumps(obj, option=_OPTIONS)
+
+    def dumps(obj):
+        """Objeto -> JSON compacto como str."""
+        return orjson.dumps(obj, option=_OPTIONS).decode()
+
+    def loads(data):
+        """JSON en str o bytes -> objeto."""
+        return orjson.loads(data)
+else:
+    def dumpb(obj):
+        return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode()
+
+    def dumps(obj):
+        return json.dumps(obj, separators=(",", ":"), ensure_ascii=False)
+
+    def loads(data):
+        return json.loads(data)
+
+
+def pack(obj):
+    """Objeto -> bytes con el formato en el primer byte."""
+    if msgpack:
+        return FORMAT_MSGPACK + msgpack.packb(obj, use_bin_type=True)
+    return FORMAT_JSON + dumpb(obj)
+
+
+def unpack(data):
+    tag, body = data[:1], data[1:]
+    if tag == FORMAT_JSON:
+        return loads(body)
+    if tag == FORMAT_MSGPACK:
+        if msgpack is None:
+            raise ValueError("Mensaje en msgpack pero msgpack no está instalado")
+        return msgpack.unpackb(body, raw=False)
+    raise ValueError(f"Formato de mensaje desconocido: {tag!r}")
+
+
+_FIELD_PATTERNS = {}
+
+
+def peek_field(data, field):
+    """
+    Valor string de `field` sin decodificar todo el mensaje. La búsqueda solo
+    es confiable en objetos planos: si el mensaje tiene objetos anidados (más
+    de una llave, por ejemplo un movimiento con {"meta": {"type": ...}}) o el
+    campo no está como string, se decodifica el mensaje completo.
+    """
+    pattern = _FIELD_PATTERNS.get(field)
+    if pattern is None:
+        pattern = _FIELD_PATTERNS[field] = re.compile(r'"%s"\s*:\s*(?:"([^"\\]*)"|null)' % re.escape(field))
+    text = data.decode() if isinstance(data, bytes) else data
+    if text.count("{") == 1:
+        match = pattern.search(text)
+        if match:
+            return match.group(1)
+    value = loads(data).get(field)
+    return value if isinstance(value, str) or value is None else str(value)
@@ -0,0 +1,75 @@
+# utils/ratelimit.py
+#
+# Límite de tasa por cliente con un token bucket atómico en Redis. Cada
+# cliente tiene un hash {tokens, ts}; el script repone `rate` tokens por
+# segundo hasta `burst`, descuenta el costo si alcanza y si no retorna
+# cuántos milisegundos faltan. Al ser un solo script, todas las instancias
+# de la API comparten el mismo límite sin carreras. take() admite una parte
+# del costo (lotes de movimientos: se aceptan los que entran).
+
+import os
+import time
+
+SNAKE_MOVE_RATE = float(os.getenv("SNAKE_MOVE_RATE", "10"))
+SNAKE_MOVE_BURST = float(os.getenv("SNAKE_MOVE_BURST", "20"))
+
+# KEYS[1] = bucket del cliente
+# ARGV[1] = tokens por segundo, ARGV[2] = capacidad, ARGV[3] = ahora, ARGV[4] = costo,
+# ARGV[5] = '1' para conceder una parte del costo si no alcanza para todo
+# Retorna {tokens concedidos, ms hasta tener tokens para el resto}
+TOKEN_BUCKET_LUA = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local cost = tonumber(ARGV[4])
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or burst
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local granted, retry = 0, 0
+if tokens >= cost then
+  granted = cost
+elseif ARGV[5] == '1' then
+  granted = math.floor(tokens)
+end
+tokens = tokens - granted
+if granted < cost then
+  retry = math.ceil((cost - granted - tokens) / rate * 1000)
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', ARGV[3])
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst / rate * 1000) + 1000)
+return {granted, retry}
+"""
+
+
+class TokenBucket:
+    """Token bucket por cliente; funciona con un cliente Redis sync o async."""
+
+    def __init__(self, r, rate=SNAKE_MOVE_RATE, burst=SNAKE_MOVE_BURST, prefix="ratelimit"):
+        self.rate = rate
+        self.burst = burst
+        self.prefix = prefix
+        self._script = r.register_script(TOKEN_BUCKET_LUA)
+
+    def _call(self, client_id, cost, now, partial=False):
+        now = time.time() if now is None else now
+        args = [self.rate, self.burst, now, cost, int(partial)]
+        return self._script(keys=[f"{self.prefix}:{client_id}"], args=args)
+
+    def allow(self, client_id, cost=1, now=None):
+        """Retorna (permitido, ms hasta poder reintentar)."""
+        granted, retry_ms = self._call(client_id, cost, now)
+        return granted == cost, int(retry_ms)
+
+    async def allow_async(self, client_id, cost=1, now=None):
+        granted, retry_ms = await self._call(client_id, cost, now)
+        return granted == cost, int(retry_ms)
+
+    async def preload_async(self):
+        """SCRIPT LOAD al arrancar, para que el primer EVALSHA no falle con NOSCRIPT."""
+        await self._script.registered_client.script_load(TOKEN_BUCKET_LUA)
+
+    async def take_async(self, client_id, cost, now=None):
+        """Concede hasta `cost` tokens; retorna (concedidos, ms hasta tener el resto)."""
+        granted, retry_ms = await self._call(client_id, cost, now, partial=True)
+        return int(granted), int(retry_ms)
@@ -0,0 +1,119 @@
+# utils/resources.py
+#
+# Muestreo de recursos del nodo en un hilo propio. En lugar de llamar a
+# psutil en cada decisión (varias veces por heartbeat y por vuelta del loop),
+# el sampler toma una muestra cada RESOURCE_SAMPLE_INTERVAL segundos, la
+# suaviza con un promedio móvil exponencial (EWMA) y la deja en un snapshot
+# con timestamp que todos leen sin bloquear. Así un pico aislado de
+# cpu_percent no hace oscilar la admisión de tareas. disk_usage() se mide
+# con menos frecuencia (RESOURCE_DISK_INTERVAL).
+#
+# measure_task() mide el tiempo de CPU y la memoria residente de una tarea.
+
+import os
+import threading
+import time
+
+import psutil
+
+RESOURCE_SAMPLE_INTERVAL = float(os.getenv("RESOURCE_SAMPLE_INTERVAL", "0.5"))
+# Peso de la muestra nueva en el EWMA (1 = sin suavizar)
+RESOURCE_EWMA_ALPHA = float(os.getenv("RESOURCE_EWMA_ALPHA", "0.3"))
+RESOURCE_DISK_INTERVAL = float(os.getenv("RESOURCE_DISK_INTERVAL", "30"))
+
+
+class ResourceSampler:
+    def __init__(self, interval=RESOURCE_SAMPLE_INTERVAL, alpha=RESOURCE_EWMA_ALPHA,
+                 disk_interval=RESOURCE_DISK_INTERVAL, disk_path="/"):
+        self.interval = interval
+        self.alpha = alpha
+        self.disk_interval = disk_interval
+        self.disk_path = disk_path
+        self._snapshot = None
+        self._disk_at = 0.0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        psutil.cpu_percent()  # la primera llamada sin intervalo siempre da 0
+
+    def _smooth(self, previous, value):
+        if previous is None:
+            return value
+        return previous + self.alpha * (value - previous)
+
+    def sample(self, now=None):
+        """Toma una muestra (sin bloquear) y actualiza el snapshot suavizado."""
+        now = time.time() if now is None else now
+        cpu = psutil.cpu_percent()
+        ram = psutil.virtual_memory().percent
+        previous = self._snapshot or {}
+        disk = previous.get("disk")
+        if disk is None or now - self._disk_at >= self.disk_interval:
+            disk = psutil.disk_usage(self.disk_path).percent
+            self._disk_at = now
+        snapshot = {
+            "cpu": round(self._smooth(previous.get("cpu"), cpu), 2),
+            "ram": round(self._smooth(previous.get("ram"), ram), 2),
+            "disk": disk,
+            "cpu_raw": cpu,
+            "ram_raw": ram,
+            "ts": now,
+        }
+        with self._lock:
+            self._snapshot = snapshot
+        return snapshot
+
+    def snapshot(self):
+        """Último snapshot; si el hilo todavía no midió, mide una vez ahora."""
+        with self._lock:
+            snapshot = self._snapshot
+        return snapshot if snapshot is not None else self.sample()
+
+    def overloaded(self, threshold):
+        snapshot = self.snapshot()
+        return snapshot["cpu"] > threshold or snapshot["ram"] > threshold
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="resources", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 1)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.sample()
+            except Exception as e:
+                print(f"⚠️ Error midiendo recursos: {e}")
+            self._stop.wait(self.interval)
+
+
+class measure_task:
+    """
+    Context manager que mide una tarea: tiempo de CPU y RSS al terminar.
+    Con per_thread=True cuenta solo el hilo actual (tareas en hilos); si no,
+    el proceso completo (un proceso del pool corre una tarea a la vez).
+    """
+
+    def __init__(self, per_thread=False):
+        self._clock = time.thread_time if per_thread else time.process_time
+        self.cpu_time = 0.0
+        self.rss_mb = 0.0
+
+    def __enter__(self):
+        self._start = self._clock()
+        return self
+
+    def __exit__(self, *exc):
+        self.cpu_time = self._clock() - self._start
+        self.rss_mb = psutil.Process().memory_info().rss / (1024 * 1024)
+        return False
+
+    def as_dict(self):
+        return {"cpu_time": round(self.cpu_time, 3), "rss_mb": round(self.rss_mb, 1)}
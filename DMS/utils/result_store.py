@@ -0,0 +1,219 @@
+# utils/result_store.py
+#
+# Resultados con esquema fijo en lugar de líneas de texto libre.
+#   - Los nodos publican cada resultado en un Redis Stream acotado
+#     (results:stream, XADD MAXLEN ~ RESULTS_STREAM_MAXLEN).
+#   - La API lo consume y lo guarda en un SQLite local con índices por nodo,
+#     archivo, hash y fecha; las consultas se paginan por cursor (id), así una
+#     página profunda cuesta lo mismo que la primera.
+#   - import_text() migra el finalizadas.txt existente (idempotente).
+
+import asyncio
+import os
+import re
+import sqlite3
+import threading
+import time
+
+RESULTS_STREAM = "results:stream"
+RESULTS_STREAM_MAXLEN = int(os.getenv("RESULTS_STREAM_MAXLEN", "100000"))
+RESULTS_DB = os.getenv("RESULTS_DB", "results.db")
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+# Campos del stream y columnas de la tabla
+FIELDS = ("node", "file", "hash", "elapsed", "finished", "cached", "segments", "text")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY,
+    source_id TEXT NOT NULL UNIQUE,
+    node TEXT NOT NULL,
+    file TEXT NOT NULL,
+    hash TEXT,
+    elapsed REAL NOT NULL,
+    finished REAL,
+    cached INTEGER NOT NULL DEFAULT 0,
+    segments INTEGER NOT NULL DEFAULT 0,
+    text TEXT
+);
+CREATE INDEX IF NOT EXISTS results_node ON results (node, id);
+CREATE INDEX IF NOT EXISTS results_file ON results (file, id);
+CREATE INDEX IF NOT EXISTS results_hash ON results (hash);
+CREATE INDEX IF NOT EXISTS results_finished ON results (finished, id);
+"""
+
+LINE_RE = re.compile(r"^Nodo (\S+) terminó la tarea: (.+) en ([\d.]+) s\s*$")
+
+
+def stream_fields(result):
+    """Campos para XADD a partir del dict de resultado de un nodo."""
+    return {
+        "node": result.get("node", ""),
+        "file": result.get("file", ""),
+        "hash": result.get("hash", ""),
+        "elapsed": f"{float(result.get('elapsed', 0.0)):.3f}",
+        "finished": f"{float(result.get('finished', time.time())):.3f}",
+        "cached": 1 if result.get("cached") else 0,
+        "segments": int(result.get("segments", 0)),
+        "text": result.get("text", ""),
+    }
+
+
+def publish_result(r, result, maxlen=RESULTS_STREAM_MAXLEN):
+    """XADD del resultado (r puede ser un pipeline); el stream se recorta de forma aproximada."""
+    return r.xadd(RESULTS_STREAM, stream_fields(result), maxlen=maxlen, approximate=True)
+
+
+def _row(source_id, fields):
+    return (
+        source_id,
+        fields.get("node", ""),
+        fields.get("file", "").replace("\\", "/"),
+        fields.get("hash") or None,
+        float(fields.get("elapsed") or 0.0),
+        float(fields["finished"]) if fields.get("finished") else None,
+        int(fields.get("cached") or 0),
+        int(fields.get("segments") or 0),
+        fields.get("text") or None,
+    )
+
+
+class ResultStore:
+    """SQLite de resultados; seguro para usar desde varios hilos."""
+
+    def __init__(self, path=RESULTS_DB):
+        self.path = path
+        self._lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.row_factory = sqlite3.Row
+        if path != ":memory:":
+            self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self.db.close()
+
+    def add_entries(self, entries):
+        """Guarda [(stream_id, campos), ...]; los ya guardados se ignoran. Retorna cuántos entraron."""
+        rows = [_row(source_id, fields) for source_id, fields in entries]
+        with self._lock, self.db:
+            before = self.db.total_changes
+            self.db.executemany(
+                f"INSERT OR IGNORE INTO results (source_id, {', '.join(FIELDS)}) "
+                f"VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            return self.db.total_changes - before
+
+    def last_stream_id(self):
+        """Último id de stream guardado ('0' si no hay), para retomar el XREAD."""
+        with self._lock:
+            row = self.db.execute(
+                "SELECT source_id FROM results WHERE source_id NOT LIKE 'text:%' ORDER BY id DESC LIMIT 1"
+            ).fetchone()
+        return row[0] if row else "0"
+
+    def count(self):
+        with self._lock:
+            return self.db.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    def query(self, node=None, file=None, file_hash=None, since=None, until=None,
+              cursor=None, limit=PAGE_SIZE, with_text=False):
+        """
+        Resultados del más nuevo al más viejo. `cursor` es el id del último
+        resultado de la página anterior. Retorna (filas, cursor_siguiente o None).
+        """
+        limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+        where, params = [], []
+        for column, value in (("node", node), ("file", file), ("hash", file_hash)):
+            if value is not None:
+                where.append(f"{column} = ?")
+                params.append(value)
+        if since is not None:
+            where.append("finished >= ?")
+            params.append(since)
+        if until is not None:
+            where.append("finished < ?")
+            params.append(until)
+        if cursor is not None:
+            where.append("id < ?")
+            params.append(cursor)
+        columns = "id, " + ", ".join(FIELDS if with_text else FIELDS[:-1])
+        sql = f"SELECT {columns} FROM results"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY id DESC LIMIT ?"
+        with self._lock:
+            rows = [dict(row) for row in self.db.execute(sql, params + [limit + 1])]
+        next_cursor = rows[limit - 1]["id"] if len(rows) > limit else None
+        return rows[:limit], next_cursor
+
+    def get(self, result_id):
+        with self._lock:
+            row = self.db.execute(
+                f"SELECT id, {', '.join(FIELDS)} FROM results WHERE id = ?", (result_id,)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def import_text(self, path, batch=10000):
+        """
+        Migra un finalizadas.txt: cada línea queda con source_id text:{n}, así
+        volver a importarlo no duplica nada. Retorna cuántas líneas entraron.
+        """
+        added = 0
+        entries = []
+        with open(path, encoding="utf-8", errors="replace") as f:
+            for n, line in enumerate(f):
+                match = LINE_RE.match(line)
+                if not match:
+                    continue
+                node, file, elapsed = match.groups()
+                entries.append((f"text:{n}", {"node": node, "file": file, "elapsed": elapsed}))
+                if len(entries) >= batch:
+                    added += self.add_entries(entries)
+                    entries = []
+        return added + self.add_entries(entries)
+
+
+class StreamIngester:
+    """Tarea async de la API que pasa results:stream al ResultStore."""
+
+    def __init__(self, redis_async, store, count=500, block_ms=1000):
+        self.r = redis_async
+        self.store = store
+        self.count = count
+        self.block_ms = block_ms
+        self._task = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        last_id = await asyncio.to_thread(self.store.last_stream_id)
+        while True:
+            try:
+                # block menor que el socket_timeout del pool async
+                reply = await self.r.xread({RESULTS_STREAM: last_id}, count=self.count, block=self.block_ms)
+                if not reply:
+                    continue
+                entries = reply[0][1]
+                await asyncio.to_thread(self.store.add_entries, entries)
+                last_id = entries[-1][0]
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️ Error leyendo {RESULTS_STREAM}: {e}")
+                await asyncio.sleep(1)
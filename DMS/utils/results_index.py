@@ -0,0 +1,99 @@
+# utils/results_index.py
+#
+# Índice incremental de finalizadas.txt. Guarda el offset en bytes del último
+# salto de línea leído, así cada tick solo procesa lo que se agregó al final
+# del archivo en lugar de volver a parsearlo completo.
+
+import mmap
+import os
+
+# Tamaño de los bloques del mmap que se parsean de una vez en el bootstrap
+BOOTSTRAP_CHUNK = 8 * 1024 * 1024
+
+
+def parse_result_line(line):
+    """Retorna (nodo, línea) para 'Nodo nodeX terminó la tarea: ...' o None."""
+    line = line.strip()
+    if not line:
+        return None
+    parts = line.split()
+    if len(parts) > 2:
+        return parts[1], line
+    return None
+
+
+class ResultsIndex:
+    def __init__(self, path):
+        self.path = path
+        self.offset = 0
+        self.by_node = {}
+        self._file_id = None
+
+    def _add_block(self, data, delta=None):
+        """Agrega un bloque de líneas completas (bytes) al índice y al delta."""
+        by_node = self.by_node
+        for raw in data.decode("utf-8", errors="replace").splitlines():
+            parsed = parse_result_line(raw)
+            if parsed:
+                node, line = parsed
+                by_node.setdefault(node, []).append(line)
+                if delta is not None:
+                    delta.setdefault(node, []).append(line)
+
+    def _reset(self):
+        self.offset = 0
+        self.by_node = {}
+        self._file_id = None
+
+    def bootstrap(self):
+        """Carga el historial completo recorriendo un mmap del archivo."""
+        self._reset()
+        try:
+            with open(self.path, "rb") as f:
+                stat = os.fstat(f.fileno())
+                self._file_id = (stat.st_dev, stat.st_ino)
+                if stat.st_size == 0:
+                    return
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    end = mm.rfind(b"\n") + 1  # una línea a medio escribir se lee después
+                    pos = 0
+                    while pos < end:
+                        # Bloques cortados en un salto de línea: memoria acotada
+                        # sin pagar un readline() por cada línea
+                        cut = mm.rfind(b"\n", pos, min(pos + BOOTSTRAP_CHUNK, end)) + 1
+                        if cut <= pos:
+                            cut = mm.find(b"\n", pos, end) + 1
+                        self._add_block(mm[pos:cut])
+                        pos = cut
+                    self.offset = end
+        except FileNotFoundError:
+            pass
+
+    def poll(self):
+        """
+        Lee solo las líneas nuevas. Retorna (delta_por_nodo, reset); reset es
+        True si el archivo se truncó o reemplazó y el historial se recargó.
+        """
+        try:
+            with open(self.path, "rb") as f:
+                stat = os.fstat(f.fileno())
+                replaced = (stat.st_dev, stat.st_ino) != self._file_id or stat.st_size < self.offset
+                data = b""
+                if not replaced and stat.st_size > self.offset:
+                    f.seek(self.offset)
+                    data = f.read(stat.st_size - self.offset)
+        except FileNotFoundError:
+            if self.offset or self.by_node:
+                self._reset()
+                return {}, True
+            return {}, False
+
+        if replaced:
+            self.bootstrap()
+            return {}, True
+
+        end = data.rfind(b"\n") + 1
+        delta = {}
+        self._add_block(data[:end], delta)
+        self.offset += end
+        return delta, False
@@ -0,0 +1,15 @@
+# utils/state_channel.py
+#
+# Claves y canal compartidos por los nodos que escriben el estado de Snake y
+# la API que lo difunde a los navegadores.
+
+SNAKE_STATE_KEY = "snake:state"
+SNAKE_UPDATES_CHANNEL = "snake:updates"
+
+
+def save_state(r, state_json, key=SNAKE_STATE_KEY, channel=SNAKE_UPDATES_CHANNEL):
+    """Guarda el estado y lo publica a los suscriptores en una sola transacción."""
+    pipe = r.pipeline()
+    pipe.set(key, state_json)
+    pipe.publish(channel, state_json)
+    pipe.execute()
@@ -0,0 +1,135 @@
+# utils/timeseries.py
+#
+# Historial de CPU, RAM y disco por nodo para gráficos y planificación de
+# capacidad. Cada heartbeat agrega su muestra, en el mismo pipeline, a tres
+# buffers circulares (1 s, 1 min y 1 h). Cada buffer es un string de
+# registros de ancho fijo (64 bytes de texto):
+#
+#   bucket | muestras | (suma, máximo) de cpu, ram y disco
+#
+# El registro de un bucket vive en la posición bucket % capacidad, así que la
+# memoria por nodo es constante (~200 KB con las capacidades por defecto) y
+# los datos viejos se pisan solos. La escritura es un script Lua con
+# GETRANGE/SETRANGE; la lectura, uno o dos GETRANGE del tramo pedido.
+
+import os
+import time
+
+# (segundos por bucket, cantidad de buckets): 15 min a 1 s, 1 día a 1 min, 30 días a 1 h
+RESOLUTIONS = ((1, 900), (60, 1440), (3600, 720))
+METRICS = ("cpu", "ram", "disk")
+RECORD_SIZE = 64
+HISTORY_DEFAULT_RANGE = float(os.getenv("HISTORY_DEFAULT_RANGE", "900"))
+HISTORY_MAX_POINTS = 1500
+
+# KEYS = un buffer por resolución
+# ARGV[1] = ahora, ARGV[2..4] = cpu, ram, disco, luego (resolución, capacidad) por KEY
+RECORD_LUA = """
+local now = tonumber(ARGV[1])
+local v = {tonumber(ARGV[2]), tonumber(ARGV[3]), tonumber(ARGV[4])}
+local size = 64
+for i = 1, #KEYS do
+  local res = tonumber(ARGV[3 + 2 * i])
+  local cap = tonumber(ARGV[4 + 2 * i])
+  local bucket = math.floor(now / res)
+  local offset = (bucket % cap) * size
+  local count, s, m = 0, {0, 0, 0}, {v[1], v[2], v[3]}
+  local raw = redis.call('GETRANGE', KEYS[i], offset, offset + size - 1)
+  if #raw == size and tonumber(string.sub(raw, 1, 10)) == bucket then
+    count = tonumber(string.sub(raw, 11, 15))
+    for j = 1, 3 do
+      local base = 16 + (j - 1) * 16
+      s[j] = tonumber(string.sub(raw, base, base + 9))
+      m[j] = math.max(tonumber(string.sub(raw, base + 10, base + 15)), v[j])
+    end
+  end
+  redis.call('SETRANGE', KEYS[i], offset, string.format(
+    '%10d%5d%10.1f%6.1f%10.1f%6.1f%10.1f%6.1f\\n', bucket, math.min(count + 1, 99999),
+    s[1] + v[1], m[1], s[2] + v[2], m[2], s[3] + v[3], m[3]))
+end
+return 1
+"""
+
+
+def series_key(node_id, resolution):
+    return f"metrics:{node_id}:{resolution}s"
+
+
+def parse_record(record, resolution):
+    """Un registro de 64 bytes -> punto con promedio y máximo por métrica (None si está vacío)."""
+    try:
+        bucket, count = int(record[0:10]), int(record[10:15])
+    except ValueError:
+        return None  # hueco todavía sin escribir (bytes en cero)
+    point = {"t": bucket * resolution, "samples": count}
+    for j, metric in enumerate(METRICS):
+        base = 15 + j * 16
+        point[metric] = round(float(record[base:base + 10]) / count, 2)
+        point[f"{metric}_max"] = float(record[base + 10:base + 16])
+    return bucket, point
+
+
+class NodeHistory:
+    """Escribe y lee los buffers con un cliente Redis sync o async."""
+
+    def __init__(self, r, resolutions=RESOLUTIONS):
+        self.r = r
+        self.resolutions = resolutions
+        self._record = r.register_script(RECORD_LUA)
+
+    def record(self, node_id, cpu, ram, disk=0.0, now=None, client=None):
+        """Agrega la muestra; pasar el pipeline del heartbeat en `client`."""
+        now = time.time() if now is None else now
+        keys = [series_key(node_id, res) for res, _ in self.resolutions]
+        args = [now, cpu, ram, disk]
+        for res, capacity in self.resolutions:
+            args += [res, capacity]
+        return self._record(keys=keys, args=args, client=client)
+
+    def pick_resolution(self, since, until, now=None, max_points=HISTORY_MAX_POINTS):
+        """La resolución más fina que todavía cubre `since` sin pasar de max_points."""
+        now = time.time() if now is None else now
+        for res, capacity in self.resolutions:
+            if since >= now - res * capacity and (until - since) / res <= max_points:
+                return res, capacity
+        return self.resolutions[-1]
+
+    def _plan(self, node_id, since, until, resolution):
+        if resolution is None:
+            res, capacity = self.pick_resolution(since, until)
+        else:
+            res, capacity = next((rc for rc in self.resolutions if rc[0] == resolution), self.resolutions[-1])
+        last = int(until // res)
+        first = max(int(since // res), last - capacity + 1)
+        # Tramo contiguo de slots; si da la vuelta al buffer son dos GETRANGE
+        start, end = first % capacity, last % capacity
+        if end >= start and last - first < capacity:
+            ranges = [(start, end)]
+        else:
+            ranges = [(start, capacity - 1), (0, end)]
+        return series_key(node_id, res), res, first, last, ranges
+
+    def _points(self, chunks, res, first, last):
+        points = []
+        for chunk in chunks:
+            for i in range(0, len(chunk) - RECORD_SIZE + 1, RECORD_SIZE):
+                parsed = parse_record(chunk[i:i + RECORD_SIZE], res)
+                if parsed and first <= parsed[0] <= last:
+                    points.append(parsed[1])
+        points.sort(key=lambda point: point["t"])
+        return points
+
+    def read(self, node_id, since, until, resolution=None):
+        """Retorna (resolución, puntos) del rango [since, until]."""
+        key, res, first, last, ranges = self._plan(node_id, since, until, resolution)
+        pipe = self.r.pipeline(transaction=False)
+        for a, b in ranges:
+            pipe.getrange(key, a * RECORD_SIZE, (b + 1) * RECORD_SIZE - 1)
+        return res, self._points(pipe.execute(), res, first, last)
+
+    async def read_async(self, node_id, since, until, resolution=None):
+        key, res, first, last, ranges = self._plan(node_id, since, until, resolution)
+        pipe = self.r.pipeline(transaction=False)
+        for a, b in ranges:
+            pipe.getrange(key, a * RECORD_SIZE, (b + 1) * RECORD_SIZE - 1)
+        return res, self._points(await pipe.execute(), res, first, last)
@@ -0,0 +1,104 @@
+# utils/worker_pool.py
+#
+# Ejecución acotada de tareas en un nodo. En lugar de un hilo nuevo por tarea:
+#   - un ThreadPoolExecutor de tamaño fijo corre cada tarea (I/O, Redis),
+#   - un ProcessPoolExecutor corre el trabajo de CPU (transcripción) fuera del
+#     GIL; los hilos solo esperan su resultado,
+#   - un AdaptiveLimit decide cuántas tareas pueden estar en curso según el
+#     CPU y la RAM del nodo (sube de a una, baja a la mitad).
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+
+class AdaptiveLimit:
+    """Límite de concurrencia AIMD alimentado con el uso de recursos del nodo."""
+
+    def __init__(self, maximum, minimum=1, high=85.0, low=60.0):
+        self.maximum = maximum
+        self.minimum = minimum
+        self.high = high
+        self.low = low
+        self.limit = maximum
+        self.running = 0
+        self._cond = threading.Condition()
+
+    def available(self):
+        with self._cond:
+            return max(0, self.limit - self.running)
+
+    def try_acquire(self):
+        with self._cond:
+            if self.running >= self.limit:
+                return False
+            self.running += 1
+            return True
+
+    def release(self):
+        with self._cond:
+            self.running -= 1
+            self._cond.notify_all()
+
+    def wait_for_slot(self, timeout=None):
+        """Bloquea hasta que haya un lugar libre; retorna False si venció timeout."""
+        with self._cond:
+            return self._cond.wait_for(lambda: self.running < self.limit, timeout)
+
+    def adjust(self, cpu, ram):
+        """Sobrecarga: baja el límite a la mitad. Holgura: lo sube en uno."""
+        with self._cond:
+            if cpu > self.high or ram > self.high:
+                self.limit = max(self.minimum, self.limit // 2)
+            elif cpu < self.low and ram < self.low:
+                self.limit = min(self.maximum, self.limit + 1)
+                self._cond.notify_all()
+            return self.limit
+
+
+def _noop():
+    return os.getpid()
+
+
+class WorkerPool:
+    def __init__(self, max_tasks, cpu_workers=None, initializer=None, initargs=()):
+        self.limit = AdaptiveLimit(max_tasks)
+        self.io = ThreadPoolExecutor(max_workers=max_tasks, thread_name_prefix="task")
+        cpu_workers = cpu_workers or os.cpu_count() or 1
+        # fork: los procesos hijos no vuelven a importar el script principal
+        # (que registra el nodo en Redis al importarse)
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context("fork" if "fork" in methods else None)
+        self.cpu_workers = cpu_workers
+        self.cpu = ProcessPoolExecutor(
+            max_workers=cpu_workers, mp_context=context, initializer=initializer, initargs=initargs,
+        )
+
+    def warm_up(self):
+        """Arranca todos los procesos ahora, antes de que el nodo lance sus hilos."""
+        futures = [self.cpu.submit(_noop) for _ in range(self.cpu_workers)]
+        return {future.result() for future in futures}
+
+    def try_submit(self, fn, *args):
+        """
+        Corre fn(*args) en el pool de hilos si el límite lo permite. Retorna el
+        Future o None si el nodo está lleno (la tarea debe devolverse a la cola).
+        """
+        if not self.limit.try_acquire():
+            return None
+        try:
+            future = self.io.submit(fn, *args)
+        except Exception:
+            self.limit.release()
+            raise
+        future.add_done_callback(lambda _: self.limit.release())
+        return future
+
+    def run_cpu(self, fn, *args):
+        """Corre fn en un proceso del pool y espera el resultado (se llama desde un hilo de tarea)."""
+        return self.cpu.submit(fn, *args).result()
+
+    def shutdown(self, wait=True):
+        self.io.shutdown(wait=wait)
+        self.cpu.shutdown(wait=wait)
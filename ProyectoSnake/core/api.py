@@ -1,11 +1,30 @@
-from fastapi import FastAPI, WebSocket
+from fastapi import FastAPI, HTTPException, Request, Response, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from utils.redis_client import get_redis
-import asyncio
-import json
+from utils import codec, lanes, metrics
+from utils.redis_client import get_async_redis, close_async_redis
+from utils.broadcaster import SnakeHub
+from utils.dashboard import DashboardAggregator
+from utils.sharding import PLAYER_TASKS_QUEUE, ShardRouter, player_queue
+from utils.ratelimit import TokenBucket
+from utils.ticks import store_input, tick_mode
+from utils.timeseries import HISTORY_DEFAULT_RANGE, NodeHistory
+from utils.logs import get_logger
+import math
+import os
+import time
 
 app = FastAPI()
-r = get_redis()
+r = get_async_redis()
+snake_hub = SnakeHub(r)
+router = ShardRouter()
+dashboard = DashboardAggregator(r)
+node_history_store = NodeHistory(r)
+# Movimientos por jugador: SNAKE_MOVE_RATE por segundo con ráfagas de SNAKE_MOVE_BURST
+move_limiter = TokenBucket(r, prefix="ratelimit:snake_move")
+log = get_logger("api")
+# Movimientos recibidos por vía de entrada (post, batch, ws) y resultado
+MOVES = metrics.Counter("moves_total", "Movimientos recibidos por vía y resultado", ["path", "outcome"])
+GLOBAL_TASKS_QUEUE = "global:unassigned_tasks"
 
 app.add_middleware(
     CORSMiddleware,
@@ -15,73 +34,254 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Movimientos por request en /snake/moves o por mensaje {"type": "moves"} en /ws/snake
+MAX_BATCH_MOVES = int(os.getenv("SNAKE_MAX_BATCH_MOVES", "256"))
+# Campos de un movimiento que se usan como claves (carril, token bucket,
+# partida) y los tipos que se aceptan en ellos
+MOVE_FIELDS = ("type", "direction", "player_id", "game_id")
+MOVE_FIELD_TYPES = (str, int, type(None))
+
+def too_many_moves(retry_ms):
+    return HTTPException(
+        status_code=429,
+        detail="Demasiados movimientos, intenta de nuevo en un momento",
+        headers={"Retry-After": str(max(1, math.ceil(retry_ms / 1000)))},
+    )
+
+def valid_move(move):
+    return all(isinstance(move.get(field), MOVE_FIELD_TYPES) for field in MOVE_FIELDS)
+
+async def enqueue_moves(moves):
+    """
+    Encola movimientos ya admitidos en un solo pipeline. En modo tick los
+    snake_move solo guardan la última dirección de su partida; el resto va
+    a la cola del player_node dueño con un LPUSH por cola y carril.
+    """
+    await router.refresh_async(r)
+    pipe = r.pipeline(transaction=False)
+    by_queue = {}
+    for move in moves:
+        task_type = move["type"]
+        if tick_mode() and task_type == "snake_move":
+            store_input(pipe, move.get("game_id"), move.get("direction"))
+        else:
+            by_queue.setdefault(router.queue_for(move.get("game_id")), []).append((codec.dumps(move), task_type))
+    for queue, items in by_queue.items():
+        lanes.push_many(pipe, queue, items)
+    with metrics.redis_timer("enqueue"):
+        await pipe.execute()
+
+async def submit_moves(moves, connection, game_id=None, path="post"):
+    """
+    Camino común de las tres entradas (POST, lote y WebSocket). Cada jugador
+    (player_id, o la IP si no viene) tiene un token bucket en Redis que se
+    cobra por movimiento: se encolan los que entran y se descarta el resto.
+    Retorna (aceptados, rechazados, ms hasta poder reintentar).
+    """
+    anonymous = connection.client.host if connection.client else "anon"
+    now = time.time()
+    by_player = {}
+    for move in moves:
+        if game_id and not move.get("game_id"):
+            move["game_id"] = game_id
+        move.setdefault("type", "snake_move")
+        # Hora de entrada para medir la espera en cola en el nodo (task_wait_seconds)
+        move["enqueued_at"] = now
+        by_player.setdefault(move.get("player_id") or anonymous, []).append(move)
+    accepted, retry_ms = [], 0
+    for player, player_moves in by_player.items():
+        with metrics.redis_timer("ratelimit"):
+            granted, wait_ms = await move_limiter.take_async(player, len(player_moves))
+        accepted.extend(player_moves[:granted])
+        retry_ms = max(retry_ms, wait_ms)
+    if accepted:
+        await enqueue_moves(accepted)
+    rejected = len(moves) - len(accepted)
+    MOVES.labels(path, "accepted").inc(len(accepted))
+    if rejected:
+        MOVES.labels(path, "rejected").inc(rejected)
+    return len(accepted), rejected, retry_ms
+
 @app.post("/snake/move")
-async def snake_move(move: dict):
+async def snake_move(move: dict, request: Request, game_id: str = None):
     """
     Encola un movimiento de Snake para ser procesado por el sistema distribuido.
-    Espera un dict con {type, player_id, direction}
+    Espera un dict con {type, player_id, direction} y opcionalmente game_id
+    (en el cuerpo o como ?game_id=). La cola es la del player_node dueño de
+    la partida según el anillo de hashing consistente.
+
+    En modo tick (SNAKE_TICK_RATE > 0) el movimiento no se encola: se guarda
+    como la última dirección pendiente de la partida y el player_node la
+    aplica en el próximo tick.
+
+    Si el jugador agotó su token bucket recibe 429 con Retry-After; si type,
+    direction, player_id o game_id no son valores simples, 422.
     """
-    r.lpush("player_tasks", json.dumps(move))  # <-- Cambia aquí la cola
+    if not valid_move(move):
+        MOVES.labels("post", "invalid").inc()
+        raise HTTPException(status_code=422, detail=f"{', '.join(MOVE_FIELDS)} deben ser texto o número")
+    accepted, _, retry_ms = await submit_moves([move], request, game_id)
+    if not accepted:
+        raise too_many_moves(retry_ms)
     return {"status": "ok"}
 
+@app.post("/snake/moves")
+async def snake_moves(moves: list[dict], request: Request, game_id: str = None):
+    """
+    Varios movimientos en un solo request, con el formato de /snake/move,
+    encolados en un solo pipeline. Si el token bucket del jugador no alcanza
+    para todos se encolan los primeros y se informa cuántos se rechazaron
+    (los inválidos, como en /snake/move, también cuentan como rechazados);
+    si no entra ninguno de los válidos, 429.
+    """
+    if len(moves) > MAX_BATCH_MOVES:
+        raise HTTPException(status_code=413, detail=f"Máximo {MAX_BATCH_MOVES} movimientos por lote")
+    valid = [move for move in moves if valid_move(move)]
+    invalid = len(moves) - len(valid)
+    if invalid:
+        MOVES.labels("batch", "invalid").inc(invalid)
+    accepted, rejected, retry_ms = await submit_moves(valid, request, game_id, path="batch")
+    if valid and not accepted:
+        raise too_many_moves(retry_ms)
+    return {"status": "ok", "accepted": accepted, "rejected": rejected + invalid}
+
+@app.get("/nodes/{node_id}/history")
+async def node_history(node_id: str, since: float = None, until: float = None, resolution: int = None):
+    """
+    Historial de CPU, RAM y disco del nodo para gráficos. Sin `resolution`
+    se usa la más fina (1 s, 60 s o 3600 s) que cubre el rango pedido.
+    """
+    until = until or time.time()
+    since = since or until - HISTORY_DEFAULT_RANGE
+    if since >= until:
+        raise HTTPException(status_code=400, detail="since debe ser menor que until")
+    res, points = await node_history_store.read_async(node_id, since, until, resolution)
+    return {"node": node_id, "resolution": res, "points": points}
+
+def monitored_queues():
+    """Carriles de la cola global, la compartida de movimientos y la de cada player_node vivo."""
+    queues = [GLOBAL_TASKS_QUEUE, PLAYER_TASKS_QUEUE, *(player_queue(node) for node in sorted(router.ring.nodes))]
+    return [lanes.lane_key(queue, lane) for queue in queues for lane in lanes.LANES]
+
+@app.get("/metrics")
+async def metrics_endpoint():
+    """
+    Métricas del proceso en formato de texto de Prometheus: movimientos,
+    latencia a Redis, fan-out de WebSockets y profundidad de las colas
+    (leída en este momento con un solo pipeline).
+    """
+    await router.refresh_async(r)
+    await metrics.record_queue_depth_async(r, monitored_queues())
+    return Response(metrics.REGISTRY.expose(), media_type=metrics.CONTENT_TYPE)
+
+@app.on_event("startup")
+async def start_broadcasters():
+    await move_limiter.preload_async()
+    snake_hub.start()
+    dashboard.start()
+
+@app.on_event("shutdown")
+async def stop_broadcasters():
+    await snake_hub.stop()
+    await dashboard.stop()
+    await close_async_redis()
+
+def ws_moves(request):
+    """
+    Mensaje del socket -> (movimientos, inválidos): {"type": "move", "direction": ...}
+    o {"type": "moves", "moves": [...]}. Los elementos que no son una dirección
+    ni un objeto con direction/player_id/game_id simples se descartan y se
+    cuentan como inválidos, sin cerrar el socket.
+    """
+    if request.get("type") == "moves":
+        items = request.get("moves") or []
+        if not isinstance(items, list):
+            return [], 1
+    else:
+        items = [request]
+    moves, invalid = [], 0
+    for item in items[:MAX_BATCH_MOVES]:
+        if isinstance(item, str):
+            move = {"direction": item}
+        elif isinstance(item, dict):
+            move = dict(item)
+        else:
+            invalid += 1
+            continue
+        move.pop("seq", None)
+        move["type"] = "snake_move"
+        if request.get("player_id") and not move.get("player_id"):
+            move["player_id"] = request["player_id"]
+        if not valid_move(move):
+            invalid += 1
+            continue
+        moves.append(move)
+    return moves, invalid
+
 @app.websocket("/ws/snake")
-async def ws_snake(websocket: WebSocket):
+async def ws_snake(websocket: WebSocket, game_id: str = None, protocol: str = "full", encoding: str = "json"):
+    """
+    Recibe el estado de la partida ?game_id= (por defecto la original) por push:
+    un solo suscriptor por proceso reenvía cada cambio publicado por los nodos.
+    Con ?protocol=delta se usa el protocolo de utils/snake_protocol.py
+    (foto inicial + deltas numerados); ?encoding=binary lo empaqueta en binario.
+
+    El mismo socket sirve de entrada, sin un POST por tecla:
+      {"type": "resync"}                            pide una foto nueva
+      {"type": "move", "direction": "up"}            un movimiento
+      {"type": "moves", "moves": ["up", "left"]}     varios en un mensaje
+    Los movimientos van a la partida del socket y pasan por el mismo token
+    bucket que /snake/move. Si el mensaje trae "seq" se responde
+    {"type": "ack", "seq", "accepted", "rejected"} (rejected incluye los
+    elementos inválidos, que no cierran el socket); si el token bucket rechazó alguno
+    llega además {"type": "rate_limited", "retry_after_ms"}.
+    """
     await websocket.accept()
     try:
+        broadcaster = await snake_hub.register(websocket, game_id, protocol, binary=(encoding == "binary"))
+        # Los envíos de estado los hace el broadcaster; aquí se atiende lo que manda el cliente
         while True:
-            state = r.get("snake:state")
-            if state:
-                if isinstance(state, bytes):
-                    state = state.decode("utf-8")
-                await websocket.send_text(state)
-            await asyncio.sleep(0.1)
+            message = await websocket.receive_text()
+            try:
+                request = codec.loads(message)
+            except ValueError:
+                continue
+            if not isinstance(request, dict):
+                continue
+            kind = request.get("type")
+            if kind == "resync":
+                await broadcaster.resync(websocket)
+            elif kind in ("move", "moves", "snake_move"):
+                moves, invalid = ws_moves(request)
+                if invalid:
+                    MOVES.labels("ws", "invalid").inc(invalid)
+                accepted, rejected, retry_ms = await submit_moves(moves, websocket, game_id, path="ws")
+                if "seq" in request:
+                    await websocket.send_text(codec.dumps(
+                        {"type": "ack", "seq": request["seq"], "accepted": accepted, "rejected": rejected + invalid}))
+                if rejected:
+                    await websocket.send_text(codec.dumps({"type": "rate_limited", "retry_after_ms": retry_ms}))
+    except WebSocketDisconnect:
+        pass
     except Exception as e:
-        print(f"WebSocket Snake desconectado: {e}")
+        log.warning("WebSocket Snake desconectado: %s", e)
     finally:
-        await websocket.close()
-
+        await snake_hub.unregister(websocket, game_id)
 
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
+    """
+    Monitoreo de nodos, tareas y resultados. La foto la arma una sola vez por
+    tick el DashboardAggregator y todos los sockets reciben el mismo JSON.
+    """
     await websocket.accept()
     try:
+        await dashboard.register(websocket)
         while True:
-            # Info de nodos
-            node_keys = list(r.scan_iter("node_stats:*"))
-            nodes = {key.split(":")[1]: r.hgetall(key) for key in node_keys}
-            # Tareas activas por nodo
-            task_keys = list(r.scan_iter("task_queue:*"))
-            tasks = {key.split(":")[1]: r.lrange(key, 0, -1) for key in task_keys}
-            # También agregamos tareas activas embebidas (current_task)
-            for key in node_keys:
-                node = key.split(":")[1]
-                stats = r.hgetall(key)
-                active_tasks = [stats[k] for k in stats if k.startswith("current_task:")]
-                if active_tasks:
-                    if node not in tasks:
-                        tasks[node] = []
-                    tasks[node].extend(active_tasks)
-            # Leer resultados finalizados por nodo desde archivo (si existe)
-            results = {}
-            try:
-                with open("finalizadas.txt", "r", encoding="utf-8") as f:
-                    for line in f:
-                        if line.strip():
-                            parts = line.split()
-                            if len(parts) > 2:
-                                node = parts[1]
-                                if node not in results:
-                                    results[node] = []
-                                results[node].append(line.strip())
-            except FileNotFoundError:
-                results = {}
-            await websocket.send_json({
-                "nodes": nodes,
-                "tasks": tasks,
-                "results": results,
-            })
-            await asyncio.sleep(2)
+            await websocket.receive_text()
+    except WebSocketDisconnect:
+        pass
     except Exception as e:
-        print(f"WebSocket desconectado: {e}")
+        log.warning("WebSocket desconectado: %s", e)
     finally:
-        await websocket.close()
+        dashboard.unregister(websocket)
@@ -0,0 +1,108 @@
+# core/bench/bench_board.py
+#
+# Microbenchmark del motor de tablero (logic/board.py) contra las operaciones
+# sobre listas que usaba player_node: copia de la serpiente en cada
+# movimiento, `head in snake[1:]` y random_position con `pos not in exclude`.
+#
+#   python -m bench.bench_board --size 500 --length 20000
+
+import argparse
+import random
+
+from bench.common import timed
+from logic.board import SnakeBoard
+
+
+def zigzag(size, start, moves):
+    """Direcciones que recorren filas libres hacia abajo sin cruzarse nunca."""
+    x, y = start
+    going_right = True
+    directions = []
+    while len(directions) < moves:
+        if (going_right and x == size - 1) or (not going_right and x == 0):
+            directions.append("down")
+            y += 1
+            going_right = not going_right
+        else:
+            directions.append("right" if going_right else "left")
+            x += 1 if going_right else -1
+    return directions
+
+
+def make_state(size, length):
+    # Serpiente en zigzag ocupando las primeras filas; cabeza en la fila de abajo
+    snake = []
+    for i in range(length):
+        row, col = divmod(i, size)
+        snake.append([col if row % 2 == 0 else size - 1 - col, row])
+    snake.reverse()
+    head_row = snake[0][1] + 2
+    snake.insert(0, [size // 2, head_row])
+    return {"snake": snake, "food": [0, size - 1], "score": 0, "game_over": False,
+            "obstacles": [], "direction": "right"}
+
+
+def legacy_moves(state, directions):
+    snake = state["snake"]
+    for direction in directions:
+        new_snake = [list(pos) for pos in snake]
+        head = new_snake[0].copy()
+        if direction == "up":
+            head[1] -= 1
+        elif direction == "down":
+            head[1] += 1
+        elif direction == "left":
+            head[0] -= 1
+        else:
+            head[0] += 1
+        new_snake.insert(0, head)
+        assert head not in new_snake[1:]
+        new_snake.pop()
+        snake = new_snake
+
+
+def board_moves(board, directions):
+    for direction in directions:
+        status, _ = board.step(direction)
+        assert status == "ok"
+
+
+def legacy_spawn(state, size, spawns):
+    exclude = state["snake"] + state["obstacles"]
+    for _ in range(spawns):
+        while True:
+            pos = [random.randint(0, size - 1), random.randint(0, size - 1)]
+            if pos not in exclude:
+                break
+
+
+def board_spawn(board, spawns):
+    for _ in range(spawns):
+        board.place_food()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Motor de tablero vs listas")
+    parser.add_argument("--size", type=int, default=500)
+    parser.add_argument("--length", type=int, default=20000)
+    parser.add_argument("--moves", type=int, default=2000)
+    parser.add_argument("--spawns", type=int, default=2000)
+    args = parser.parse_args()
+
+    state = make_state(args.size, args.length)
+    board, build = timed(SnakeBoard.from_state, state, args.size, args.size)
+    print(f"tablero {args.size}x{args.size}, serpiente de {args.length} celdas "
+          f"(from_state: {build * 1000:.1f} ms)")
+
+    directions = zigzag(args.size, state["snake"][0], args.moves)
+    _, legacy = timed(legacy_moves, state, directions)
+    _, engine = timed(board_moves, board, directions)
+    print(f"movimiento   listas: {legacy / args.moves * 1e6:10.1f} µs   motor: {engine / args.moves * 1e6:8.2f} µs")
+
+    _, legacy = timed(legacy_spawn, state, args.size, args.spawns)
+    _, engine = timed(board_spawn, board, args.spawns)
+    print(f"spawn comida listas: {legacy / args.spawns * 1e6:10.1f} µs   motor: {engine / args.spawns * 1e6:8.2f} µs")
+
+
+if __name__ == "__main__":
+    main()
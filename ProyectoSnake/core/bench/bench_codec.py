@@ -0,0 +1,77 @@
+# core/bench/bench_codec.py
+#
+# Costo de serializar snake:state y las tareas (utils/codec.py):
+#   1) dumps/loads del estado con serpientes de 3, 100 y 400 celdas (tablero
+#      de 20x20 lleno) y obstáculos, con json de la librería estándar,
+#      orjson y msgpack (los dos últimos si están instalados),
+#   2) ruteo de una tarea en el main: loads + dumps contra peek_field.
+#
+#   python -m bench.bench_codec [--repeat 20000]
+
+import argparse
+import json
+import time
+
+from bench.bench_snake_protocol import make_state
+from utils import codec
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+TASK = json.dumps({"type": "snake_move", "player_id": "player1", "direction": "up",
+                   "game_id": "partida-42", "timestamp": 1760000000.0})
+
+
+def backends():
+    yield "json", lambda obj: json.dumps(obj), json.loads
+    if orjson:
+        yield "orjson", orjson.dumps, orjson.loads
+    if msgpack:
+        yield "msgpack", msgpack.packb, msgpack.unpackb
+
+
+def per_call_us(fn, arg, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(arg)
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def route_old(raw):
+    task = json.loads(raw)
+    return task.get("type"), json.dumps(task)
+
+
+def route_new(raw):
+    return codec.peek_field(raw, "type"), raw
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Codec de estado y tareas")
+    parser.add_argument("--repeat", type=int, default=20000)
+    args = parser.parse_args()
+
+    print(f"   backend JSON de utils/codec.py: {codec.JSON_BACKEND}")
+    for length, obstacles in ((3, 0), (100, 20), (400, 0)):
+        state = make_state(length, obstacles, 20)
+        repeat = max(200, args.repeat // max(1, length // 10))
+        print(f"\n   serpiente de {length} celdas, {obstacles} obstáculos")
+        for name, dump, load in backends():
+            data = dump(state)
+            print(f"   {name:>8}: {len(data):>6} bytes | dumps {per_call_us(dump, state, repeat):>7.2f} µs"
+                  f" | loads {per_call_us(load, data, repeat):>7.2f} µs")
+
+    print(f"\n   ruteo de una tarea ({len(TASK)} bytes)")
+    print(f"   loads + dumps: {per_call_us(route_old, TASK, args.repeat):>6.2f} µs")
+    print(f"   peek_field:    {per_call_us(route_new, TASK, args.repeat):>6.2f} µs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+# core/bench/bench_dispatch_policies.py
+#
+# Simulación de eventos discretos (sin Redis) de nodos heterogéneos atendidos
+# por el Dispatcher de utils/dispatch.py. Los nodos publican su estado cada
+# --heartbeat segundos, igual que los reales; entre heartbeats el dispatcher
+# solo conoce lo que él mismo asignó. Compara el tiempo de finalización
+# (espera + servicio) p50/p99 de cada política.
+#
+#   python -m bench.bench_dispatch_policies --tasks 50000 --load 0.85
+#   python -m bench.bench_dispatch_policies --kill-at 100   # un nodo deja de latir
+
+import heapq
+import random
+from collections import deque
+
+from bench.common import base_parser, percentile
+from utils.dispatch import POLICIES, Dispatcher, NodeView
+
+# (velocidad relativa, tareas simultáneas) de cada nodo simulado
+DEFAULT_NODES = [(1.0, 1), (1.0, 2), (0.5, 1), (0.25, 4), (2.0, 1), (0.75, 2)]
+
+
+class SimNode:
+    def __init__(self, node_id, speed, slots):
+        self.node_id = node_id
+        self.speed = speed
+        self.slots = slots
+        self.running = 0
+        self.queue = deque()
+        self.avg_time = 0.0
+        self.alive = True
+
+    def stats(self, now):
+        return {
+            "role": "scenario",
+            "status": "available",
+            "cpu": 0,
+            "ram": 0,
+            "tasks": self.running,
+            "max_tasks": self.slots,
+            "avg_time": self.avg_time,
+            "last_heartbeat": now,
+        }
+
+
+def simulate(policy, args, node_specs, seed):
+    rng = random.Random(seed)
+    nodes = [SimNode(f"sim{i}", speed, slots) for i, (speed, slots) in enumerate(node_specs)]
+    view = NodeView(timeout=args.timeout)
+    dispatcher = Dispatcher(view, policy, rng=random.Random(seed + 1))
+
+    capacity = sum(node.speed * node.slots for node in nodes) / args.service
+    arrival_rate = args.load * capacity
+
+    events = []
+    seq = 0
+
+    def push(t, kind, data=None):
+        nonlocal seq
+        seq += 1
+        heapq.heappush(events, (t, seq, kind, data))
+
+    def start_next(node, now):
+        while node.alive and node.running < node.slots and node.queue:
+            arrived = node.queue.popleft()
+            node.running += 1
+            push(now + rng.expovariate(1.0 / args.service) / node.speed, "finish", (node, arrived, now))
+
+    for node in nodes:
+        push(rng.uniform(0, args.heartbeat), "heartbeat", node)
+        view.update(node.node_id, node.stats(0.0))
+    push(rng.expovariate(arrival_rate), "arrival", 0)
+    if args.kill_at is not None:
+        push(args.kill_at, "kill", nodes[0])
+
+    completions = []
+    lost = 0
+    while events:
+        now, _, kind, data = heapq.heappop(events)
+        if kind == "arrival":
+            choice = dispatcher.pick("scenario", now=now)
+            node = next(n for n in nodes if n.node_id == choice.node_id)
+            if not node.alive:
+                lost += 1
+            else:
+                node.queue.append(now)
+                start_next(node, now)
+            if data + 1 < args.tasks:
+                push(now + rng.expovariate(arrival_rate), "arrival", data + 1)
+        elif kind == "finish":
+            node, arrived, started = data
+            node.running -= 1
+            elapsed = now - started
+            node.avg_time = elapsed if node.avg_time == 0 else 0.8 * node.avg_time + 0.2 * elapsed
+            completions.append(now - arrived)
+            start_next(node, now)
+        elif kind == "heartbeat":
+            node = data
+            if node.alive:
+                view.update(node.node_id, node.stats(now), queued=len(node.queue))
+                if len(completions) + lost < args.tasks:
+                    push(now + args.heartbeat, "heartbeat", node)
+        elif kind == "kill":
+            data.alive = False
+            lost += len(data.queue) + data.running
+            data.queue.clear()
+    return completions, lost
+
+
+def main():
+    parser = base_parser("Simulación de políticas de reparto con nodos heterogéneos")
+    parser.add_argument("--tasks", type=int, default=50000)
+    parser.add_argument("--load", type=float, default=0.85, help="Utilización objetivo del clúster")
+    parser.add_argument("--service", type=float, default=0.05, help="Segundos por tarea en un nodo de velocidad 1")
+    parser.add_argument("--heartbeat", type=float, default=1.0)
+    parser.add_argument("--timeout", type=float, default=5.0, help="Heartbeat vencido: sale de rotación")
+    parser.add_argument("--kill-at", type=float, default=None, help="Segundo en que el primer nodo muere")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    print(f"{len(DEFAULT_NODES)} nodos (velocidad, lugares): {DEFAULT_NODES} | carga {args.load:.0%}")
+    print(f"{'política':>14} {'p50 ms':>9} {'p99 ms':>10} {'media ms':>9} {'perdidas':>9}")
+    for policy in POLICIES:
+        completions, lost = simulate(policy, args, DEFAULT_NODES, args.seed)
+        mean = sum(completions) / len(completions) if completions else 0.0
+        print(f"{policy:>14} {percentile(completions, 50) * 1000:>9.1f} "
+              f"{percentile(completions, 99) * 1000:>10.1f} {mean * 1000:>9.1f} {lost:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+# core/bench/bench_heartbeat.py
+#
+# Carga que los heartbeats ponen sobre Redis con 100 y 1000 nodos simulados:
+#   antes: HSET con todos los campos + SADD por nodo y por segundo, y el main
+#          listando con SCAN node_stats:* y dos HGETALL por nodo,
+#   ahora: HeartbeatPublisher (solo campos que cambiaron + presencia con TTL
+#          + ZADD nodes:last_seen) y el main con un ZRANGE y un pipeline.
+#
+# Cuenta los comandos enviados y mide el tiempo de cada escenario; contra un
+# redis-server real también reporta las llamadas de INFO commandstats.
+#
+#   python -m bench.bench_heartbeat --nodes 100 1000 --rounds 30 [--fake]
+
+import random
+import time
+
+from bench.common import base_parser, connect
+from utils.dashboard import NODE_INDEX_KEY
+from utils.heartbeat import LAST_SEEN_KEY, HeartbeatPublisher, presence_key
+
+STATUS_EVERY = 2  # el main muestra los nodos cada 2 s (STATUS_INTERVAL)
+
+
+def node_ids(count):
+    return [f"bench-hb{i}" for i in range(count)]
+
+
+def simulated_stats(rng, previous):
+    """CPU/RAM con deriva lenta; el resto de los campos casi no cambia."""
+    cpu = min(100.0, max(0.0, previous.get("cpu", 40.0) + rng.gauss(0, 0.5)))
+    ram = min(100.0, max(0.0, previous.get("ram", 60.0) + rng.gauss(0, 0.05)))
+    tasks = previous.get("tasks", 0)
+    if rng.random() < 0.05:
+        tasks = rng.randint(0, 2)
+    return {"cpu": cpu, "ram": ram, "disk": 50.0, "status": "available",
+            "tasks": tasks, "max_tasks": 2, "task_cpu_time": 1.2, "task_rss_mb": 310.0}
+
+
+def total_calls(r):
+    """Llamadas acumuladas según INFO commandstats, o None si el servidor no lo soporta."""
+    try:
+        stats = r.info("commandstats")
+    except Exception:
+        return None
+    return sum(entry.get("calls", 0) for entry in stats.values() if isinstance(entry, dict)) or None
+
+
+def run_old(r, ids, stats, rng, rounds):
+    commands = 0
+    now = time.time()
+    for tick in range(rounds):
+        pipe = r.pipeline()
+        for node_id in ids:
+            stats[node_id] = simulated_stats(rng, stats[node_id])
+            pipe.hset(f"node_stats:{node_id}", mapping=dict(stats[node_id], last_heartbeat=now + tick))
+            pipe.sadd(NODE_INDEX_KEY, node_id)
+        commands += len(pipe.command_stack)
+        pipe.execute()
+        if tick % STATUS_EVERY == 0:
+            keys = list(r.scan_iter("node_stats:bench-hb*", count=100))
+            commands += max(1, len(ids) // 100)  # SCAN con COUNT 100
+            for key in keys:
+                r.hgetall(key)  # show_node_statuses
+                r.hgetall(key)  # check_node_status
+            commands += 2 * len(keys)
+    return commands
+
+
+def run_new(r, ids, stats, rng, rounds):
+    publishers = {node_id: HeartbeatPublisher(r, node_id) for node_id in ids}
+    commands = fields = 0
+    now = time.time()
+    for tick in range(rounds):
+        pipe = r.pipeline()
+        for node_id in ids:
+            stats[node_id] = simulated_stats(rng, stats[node_id])
+            fields += len(publishers[node_id].send(stats[node_id], client=pipe, now=now + tick))
+        commands += len(pipe.command_stack)
+        pipe.execute()
+        if tick % STATUS_EVERY == 0:
+            seen = r.zrangebyscore(LAST_SEEN_KEY, now + tick - 5, "+inf", withscores=True)
+            read = r.pipeline(transaction=False)
+            for node_id, _ in seen:
+                read.hgetall(f"node_stats:{node_id}")
+            commands += 1 + len(read.command_stack)
+            read.execute()
+    return commands, fields / (rounds * len(ids))
+
+
+def cleanup(r, ids):
+    r.delete(*[f"node_stats:{n}" for n in ids], *[presence_key(n) for n in ids])
+    r.srem(NODE_INDEX_KEY, *ids)
+    r.zrem(LAST_SEEN_KEY, *ids)
+
+
+def main():
+    parser = base_parser("Heartbeat con envío de diferencias y presencia por TTL")
+    parser.add_argument("--nodes", type=int, nargs="+", default=[100, 1000])
+    parser.add_argument("--rounds", type=int, default=30, help="Segundos simulados (un heartbeat por nodo y segundo)")
+    args = parser.parse_args()
+
+    r = connect(args.fake)
+    for count in args.nodes:
+        ids = node_ids(count)
+        print(f"\n   {count} nodos, {args.rounds} s simulados")
+        for label, runner in (("antes", run_old), ("ahora", run_new)):
+            cleanup(r, ids)
+            rng = random.Random(7)
+            stats = {node_id: {} for node_id in ids}
+            calls_before = total_calls(r)
+            start = time.perf_counter()
+            result = runner(r, ids, stats, rng, args.rounds)
+            elapsed = time.perf_counter() - start
+            calls_after = total_calls(r)
+            commands, per_beat = result if isinstance(result, tuple) else (result, len(stats[ids[0]]) + 1)
+            line = (f"   {label}: {commands / args.rounds:>8.0f} comandos/s de carga | "
+                    f"{per_beat:.1f} campos por heartbeat | {elapsed:.2f} s")
+            if calls_before is not None and calls_after is not None:
+                line += f" | commandstats: {(calls_after - calls_before) / args.rounds:.0f} llamadas/s"
+            print(line)
+        cleanup(r, ids)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+# core/bench/bench_lanes.py
+#
+# Simulación de carga mixta sobre las colas con tiempo virtual: un consumidor
+# que atiende --capacity tareas/s, tráfico normal (jugadores, comida,
+# reset_game, transcripciones) y un cliente que inunda la cola con
+# movimientos durante unos segundos. Compara la latencia por carril de:
+#   una lista     una sola lista (como global:unassigned_tasks antes)
+#   lanes         carriles con round robin ponderado (utils/lanes.py)
+#   lanes+limit   carriles y token bucket por jugador en /snake/move
+#
+#   python -m bench.bench_lanes [--seconds 10] [--capacity 300] [--fake]
+
+import json
+
+from bench.common import base_parser, connect, percentile
+from utils import lanes
+from utils.queues import ReliableQueue
+from utils.ratelimit import TokenBucket
+
+QUEUE = "bench:lanes:unassigned"
+STEP = 0.01  # segundos virtuales por vuelta
+
+# (tipo, quién, tareas por segundo)
+NORMAL_LOAD = [("snake_move", f"player{i}", 2.0) for i in range(20)] + [
+    ("scenario_update", "scenario", 10.0),
+    ("reset_game", "control", 1.0),
+    ("transcribe_chunk", "dms", 20.0),
+]
+FLOOD = ("snake_move", "abuser", 2000.0)
+
+
+def cleanup(r):
+    keys = list(r.scan_iter("bench:lanes:*"))
+    if keys:
+        r.delete(*keys)
+
+
+def arrivals(load, credit, start, end, now):
+    """Tareas que llegan en esta vuelta (acumulando la fracción de cada fuente)."""
+    for kind, who, rate in load:
+        if who == FLOOD[1] and not start <= now < end:
+            continue
+        credit[who] = credit.get(who, 0.0) + rate * STEP
+        while credit[who] >= 1:
+            credit[who] -= 1
+            yield kind, who
+
+
+def simulate(r, mode, seconds, capacity, flood_window):
+    cleanup(r)
+    if mode == "una lista":
+        consumer = ReliableQueue(r, QUEUE, "bench")
+    else:
+        consumer = lanes.lane_queue(r, QUEUE, "bench")
+    limiter = TokenBucket(r, rate=10, burst=20, prefix="bench:lanes:ratelimit") if mode == "lanes+limit" else None
+
+    credit, latencies, rejected = {}, {}, 0
+    per_step = capacity * STEP
+    budget = 0.0
+    seq = 0
+    steps = int(seconds / STEP)
+    for step in range(steps):
+        now = step * STEP
+        pipe = r.pipeline(transaction=False)
+        for kind, who in arrivals(NORMAL_LOAD + [FLOOD], credit, *flood_window, now):
+            if limiter and kind == "snake_move" and not limiter.allow(who, now=now)[0]:
+                rejected += 1
+                continue
+            seq += 1
+            raw = json.dumps({"type": kind, "who": who, "ts": now, "seq": seq})
+            if mode == "una lista":
+                pipe.lpush(QUEUE, raw)
+            else:
+                lanes.push(pipe, QUEUE, raw, kind)
+        pipe.execute()
+
+        budget += per_step
+        count = int(budget)
+        if count:
+            budget -= count
+            batch = consumer.claim(count, timeout=None)
+            for _, raw in batch:
+                task = json.loads(raw)
+                group = "moves (abuser)" if task["who"] == FLOOD[1] else lanes.lane_for(task["type"])
+                latencies.setdefault(group, []).append((now - task["ts"]) * 1000)
+            consumer.ack_many(batch)
+
+    pending = sum(r.llen(key) for key in consumer.sources)
+    cleanup(r)
+    return latencies, rejected, pending
+
+
+def main():
+    parser = base_parser("Latencia por carril con carga mixta")
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--capacity", type=float, default=300, help="Tareas por segundo que atiende el consumidor")
+    parser.add_argument("--flood", type=float, nargs=2, default=[1.0, 4.0], metavar=("DESDE", "HASTA"))
+    args = parser.parse_args()
+
+    r = connect(args.fake)
+    groups = ("control", "scenario", "moves", "batch", "moves (abuser)")
+    for mode in ("una lista", "lanes", "lanes+limit"):
+        latencies, rejected, pending = simulate(r, mode, args.seconds, args.capacity, args.flood)
+        print(f"\n   {mode}: {pending} tareas sin atender al final, {rejected} movimientos rechazados (429)")
+        for group in groups:
+            values = latencies.get(group, [])
+            if values:
+                print(f"   {group:>15}: {len(values):>5} tareas | p50 {percentile(values, 50):>7.0f} ms"
+                      f" | p99 {percentile(values, 99):>7.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
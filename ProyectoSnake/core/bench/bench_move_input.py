@@ -0,0 +1,178 @@
+# core/bench/bench_move_input.py
+#
+# Prueba de carga de las tres formas de mandar movimientos a la API:
+#   post    un POST /snake/move por movimiento (keep-alive)
+#   batch   POST /snake/moves con --batch movimientos por request
+#   ws      mensajes {"type": "move", "seq": n} por /ws/snake, esperando el ack
+# Reporta movimientos/seg, p50/p99 de la latencia hasta la respuesta (en
+# batch, la del request que lleva el movimiento) y, si se conoce el proceso
+# de la API, los µs de CPU del servidor por movimiento.
+#
+# Con --spawn levanta la API (uvicorn) con el límite de tasa desactivado y,
+# con --fake, un servidor fakeredis por TCP en lugar de redis-server:
+#   python -m bench.bench_move_input --spawn --fake --concurrency 16 --duration 5
+# Contra una API ya levantada (con SNAKE_MOVE_RATE alto):
+#   python -m bench.bench_move_input --port 8000 --pid <pid de uvicorn>
+
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+import psutil
+import websockets
+
+from bench.common import base_parser, percentile
+
+LOOP = ["right", "down", "left", "up"]
+CORE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_fake_redis():
+    """Servidor fakeredis por TCP en un hilo; retorna el puerto."""
+    from fakeredis import TcpFakeServer
+    port = free_port()
+    server = TcpFakeServer(("127.0.0.1", port), server_type="redis")
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return port
+
+
+def spawn_api(port, redis_port):
+    env = dict(os.environ, REDIS_PORT=str(redis_port), SNAKE_MOVE_RATE="1e9", SNAKE_MOVE_BURST="1e9")
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "api:app", "--port", str(port), "--log-level", "warning"],
+        cwd=CORE_DIR, env=env,
+    )
+    deadline = time.time() + 15
+    while time.time() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return proc
+        except OSError:
+            time.sleep(0.1)
+    proc.kill()
+    raise RuntimeError("La API no arrancó")
+
+
+async def http_post(reader, writer, host, path, body):
+    writer.write((
+        f"POST {path} HTTP/1.1\r\nHost: {host}\r\n"
+        f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n"
+    ).encode() + body)
+    await writer.drain()
+    headers = await reader.readuntil(b"\r\n\r\n")
+    length = 0
+    for line in headers.split(b"\r\n"):
+        if line.lower().startswith(b"content-length:"):
+            length = int(line.split(b":")[1])
+    await reader.readexactly(length)
+    return headers.split(b" ", 2)[1]
+
+
+async def post_client(i, args, deadline, latencies):
+    reader, writer = await asyncio.open_connection(args.host, args.port)
+    done = 0
+    while time.perf_counter() < deadline:
+        body = json.dumps({"type": "snake_move", "player_id": f"bench{i}", "game_id": f"bench{i}",
+                           "direction": LOOP[done % 4]}).encode()
+        sent = time.perf_counter()
+        await http_post(reader, writer, args.host, "/snake/move", body)
+        latencies.append((time.perf_counter() - sent) * 1000)
+        done += 1
+    writer.close()
+    return done
+
+
+async def batch_client(i, args, deadline, latencies):
+    reader, writer = await asyncio.open_connection(args.host, args.port)
+    done = 0
+    while time.perf_counter() < deadline:
+        body = json.dumps([{"type": "snake_move", "player_id": f"bench{i}", "game_id": f"bench{i}",
+                            "direction": LOOP[(done + k) % 4]} for k in range(args.batch)]).encode()
+        sent = time.perf_counter()
+        await http_post(reader, writer, args.host, "/snake/moves", body)
+        latencies.extend([(time.perf_counter() - sent) * 1000] * args.batch)
+        done += args.batch
+    writer.close()
+    return done
+
+
+async def ws_client(i, args, deadline, latencies):
+    url = f"ws://{args.host}:{args.port}/ws/snake?game_id=bench{i}"
+    done = 0
+    async with websockets.connect(url, max_size=None) as ws:
+        while time.perf_counter() < deadline:
+            sent = time.perf_counter()
+            await ws.send(json.dumps({"type": "move", "direction": LOOP[done % 4],
+                                      "player_id": f"bench{i}", "seq": done}))
+            # Entre medio pueden llegar estados de la partida; se espera el ack
+            while True:
+                message = json.loads(await ws.recv())
+                if isinstance(message, dict) and message.get("type") == "ack":
+                    break
+            latencies.append((time.perf_counter() - sent) * 1000)
+            done += 1
+    return done
+
+
+CLIENTS = {"post": post_client, "batch": batch_client, "ws": ws_client}
+
+
+async def run(path, args, process):
+    latencies = []
+    cpu_before = sum(process.cpu_times()[:2]) if process else 0.0
+    start = time.perf_counter()
+    deadline = start + args.duration
+    counts = await asyncio.gather(*(CLIENTS[path](i, args, deadline, latencies) for i in range(args.concurrency)))
+    elapsed = time.perf_counter() - start
+    cpu = sum(process.cpu_times()[:2]) - cpu_before if process else None
+    return sum(counts), elapsed, latencies, cpu
+
+
+def main():
+    parser = base_parser("Movimientos/seg y latencia por vía de entrada")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--pid", type=int, help="PID de la API para medir su CPU")
+    parser.add_argument("--spawn", action="store_true", help="Levanta la API con uvicorn")
+    parser.add_argument("--paths", nargs="+", default=list(CLIENTS), choices=list(CLIENTS))
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--batch", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=5.0)
+    args = parser.parse_args()
+
+    proc = None
+    if args.spawn:
+        redis_port = start_fake_redis() if args.fake else int(os.getenv("REDIS_PORT", 6379))
+        args.port = free_port()
+        proc = spawn_api(args.port, redis_port)
+        args.pid = proc.pid
+    process = psutil.Process(args.pid) if args.pid else None
+
+    try:
+        print(f"   {args.concurrency} conexiones, {args.duration:g} s por vía (lotes de {args.batch})")
+        print(f"   {'vía':>6} {'mov/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'CPU µs/mov':>11}")
+        for path in args.paths:
+            moves, elapsed, latencies, cpu = asyncio.run(run(path, args, process))
+            cpu_text = f"{cpu / moves * 1e6:>11.0f}" if cpu is not None and moves else f"{'-':>11}"
+            print(f"   {path:>6} {moves / elapsed:>9.0f} {percentile(latencies, 50):>8.2f}"
+                  f" {percentile(latencies, 99):>8.2f} {cpu_text}")
+    finally:
+        if proc:
+            proc.terminate()
+            proc.wait(timeout=10)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+# core/bench/bench_move_throughput.py
+#
+# Mide requests/seg de POST /snake/move con varias conexiones keep-alive
+# concurrentes. Para comparar antes/después se corre contra la API de cada
+# versión (por ejemplo la del commit anterior en otro puerto):
+#
+#   python -m bench.bench_move_throughput --port 8000 --concurrency 1 16 64
+#
+# Usa un cliente HTTP/1.1 mínimo sobre asyncio para no agregar dependencias.
+
+import argparse
+import asyncio
+import json
+import time
+
+from bench.common import percentile
+
+MOVE = json.dumps({"type": "snake_move", "player_id": "bench", "direction": "right"})
+
+
+async def client(host, port, deadline, latencies):
+    reader, writer = await asyncio.open_connection(host, port)
+    body = MOVE.encode()
+    request = (
+        f"POST /snake/move HTTP/1.1\r\nHost: {host}\r\n"
+        f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n"
+    ).encode() + body
+    done = 0
+    while time.perf_counter() < deadline:
+        sent = time.perf_counter()
+        writer.write(request)
+        await writer.drain()
+        headers = await reader.readuntil(b"\r\n\r\n")
+        length = 0
+        for line in headers.split(b"\r\n"):
+            if line.lower().startswith(b"content-length:"):
+                length = int(line.split(b":")[1])
+        await reader.readexactly(length)
+        latencies.append((time.perf_counter() - sent) * 1000)
+        done += 1
+    writer.close()
+    return done
+
+
+async def run(host, port, concurrency, duration):
+    latencies = []
+    deadline = time.perf_counter() + duration
+    start = time.perf_counter()
+    counts = await asyncio.gather(*(client(host, port, deadline, latencies) for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return sum(counts) / elapsed, latencies
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Throughput de POST /snake/move")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 16, 64])
+    parser.add_argument("--duration", type=float, default=10.0)
+    args = parser.parse_args()
+
+    print(f"{'conexiones':>10} {'req/s':>10} {'p50 ms':>8} {'p99 ms':>8}")
+    for concurrency in args.concurrency:
+        rps, latencies = await run(args.host, args.port, concurrency, args.duration)
+        print(f"{concurrency:>10} {rps:>10.0f} {percentile(latencies, 50):>8.2f} {percentile(latencies, 99):>8.2f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
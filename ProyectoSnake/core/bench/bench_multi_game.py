@@ -0,0 +1,102 @@
+# core/bench/bench_multi_game.py
+#
+# Generador de carga con miles de partidas simultáneas. Enruta cada
+# movimiento con el mismo ShardRouter que usa la API y mide cuántos
+# movimientos/seg drenan los player_nodes corriendo, y cómo se reparten
+# las partidas entre ellos.
+#
+# Levantar antes N player_nodes con IDs distintos, por ejemplo:
+#   NODE_ID=p1 python player_node.py & NODE_ID=p2 python player_node.py &
+#   python -m bench.bench_multi_game --games 5000 --moves-per-game 8
+
+import argparse
+import json
+import time
+from collections import Counter
+
+from bench.common import connect
+from utils.sharding import PLAYER_TASKS_QUEUE, ShardRouter, state_key
+
+# Recorrido en cuadrado de 2x2: la serpiente inicial nunca choca ni come
+LOOP = ["right", "down", "left", "up"]
+
+
+def pending(r, queues):
+    pipe = r.pipeline(transaction=False)
+    for queue in queues:
+        pipe.llen(queue)
+    return sum(pipe.execute())
+
+
+def wait_drained(r, queues, timeout):
+    deadline = time.time() + timeout
+    while pending(r, queues):
+        if time.time() > deadline:
+            raise TimeoutError("Las colas no se vaciaron a tiempo")
+        time.sleep(0.05)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Carga con muchas partidas de Snake")
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--moves-per-game", type=int, default=8)
+    parser.add_argument("--batch", type=int, default=500, help="Movimientos por pipeline")
+    parser.add_argument("--timeout", type=float, default=300)
+    args = parser.parse_args()
+
+    r = connect()
+    router = ShardRouter(refresh_every=0)
+    router.refresh(r)
+    if not router.ring.nodes:
+        print("⚠️ No hay player_nodes registrados; todo irá a la cola compartida")
+
+    games = [f"bench{i}" for i in range(args.games)]
+    owners = Counter(router.queue_for(game) for game in games)
+    for queue, count in sorted(owners.items()):
+        print(f"  {queue}: {count} partidas")
+    queues = set(owners) | {PLAYER_TASKS_QUEUE}
+
+    pipe = r.pipeline(transaction=False)
+    for game in games:
+        pipe.lpush(router.queue_for(game), json.dumps({"type": "reset_game", "game_id": game}))
+    pipe.execute()
+    wait_drained(r, queues, args.timeout)
+
+    total = args.games * args.moves_per_game
+    start = time.perf_counter()
+    pipe = r.pipeline(transaction=False)
+    queued = 0
+    for step in range(args.moves_per_game):
+        for game in games:
+            pipe.lpush(router.queue_for(game), json.dumps({
+                "type": "snake_move",
+                "player_id": game,
+                "game_id": game,
+                "direction": LOOP[step % len(LOOP)],
+            }))
+            queued += 1
+            if queued % args.batch == 0:
+                pipe.execute()
+    pipe.execute()
+    wait_drained(r, queues, args.timeout)
+    elapsed = time.perf_counter() - start
+
+    print(f"{total:,} movimientos en {args.games:,} partidas: {total / elapsed:,.0f} movimientos/seg")
+
+    alive = 0
+    pipe = r.pipeline(transaction=False)
+    for game in games:
+        pipe.get(state_key(game))
+    for raw in pipe.execute():
+        if raw and not json.loads(raw)["game_over"]:
+            alive += 1
+    print(f"partidas sin game over: {alive}/{args.games}")
+
+    pipe = r.pipeline(transaction=False)
+    for game in games:
+        pipe.delete(state_key(game))
+    pipe.execute()
+
+
+if __name__ == "__main__":
+    main()
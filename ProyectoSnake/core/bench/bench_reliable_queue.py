@@ -0,0 +1,140 @@
+# core/bench/bench_reliable_queue.py
+#
+# 1) Costo de la entrega confiable: tareas/seg de un worker con BLPOP + LPOP
+#    (pop_batch) contra ReliableQueue con ack por tarea y ack por lote.
+# 2) Caída de workers: W procesos consumen N tareas y se matan con SIGKILL
+#    cada cierto tiempo (reemplazándolos por otros). Al final se verifica que
+#    ninguna tarea se perdió y cuántas se reentregaron.
+#
+# Necesita un redis-server real (los workers son procesos aparte):
+#   python -m bench.bench_reliable_queue --tasks 20000 --workers 4 --kill-every 1
+
+import json
+import multiprocessing
+import random
+import time
+
+from bench.common import base_parser, connect, timed
+from utils.queues import ReliableQueue, pop_batch, reap_expired
+
+QUEUE_KEY = "bench:reliable_queue"
+DONE_KEY = "bench:reliable_done"
+PROCESSED_KEY = "bench:reliable_processed"
+
+
+def fill(r, tasks):
+    pipe = r.pipeline(transaction=False)
+    for i in range(tasks):
+        pipe.lpush(QUEUE_KEY, json.dumps({"type": "bench", "i": i}))
+        if i % 1000 == 999:
+            pipe.execute()
+    pipe.execute()
+
+
+def run_plain(r, tasks):
+    done = 0
+    while done < tasks:
+        for data in pop_batch(r, QUEUE_KEY):
+            json.loads(data)
+            done += 1
+
+
+def run_reliable(r, tasks, per_task_ack):
+    queue = ReliableQueue(r, QUEUE_KEY, "bench_throughput")
+    done = 0
+    while done < tasks:
+        batch = queue.claim()
+        for source, data in batch:
+            json.loads(data)
+            done += 1
+            if per_task_ack:
+                queue.ack(source, data)
+        if not per_task_ack:
+            queue.ack_many(batch)
+
+
+def worker(node_id, work_ms, visibility_timeout):
+    r = connect()
+    queue = ReliableQueue(r, QUEUE_KEY, node_id, visibility_timeout=visibility_timeout)
+    while True:
+        for source, data in queue.claim(count=10):
+            time.sleep(work_ms / 1000.0)
+            pipe = r.pipeline(transaction=False)
+            pipe.sadd(DONE_KEY, json.loads(data)["i"])
+            pipe.incr(PROCESSED_KEY)
+            pipe.execute()
+            queue.ack(source, data)
+
+
+def start_worker(n, args):
+    proc = multiprocessing.Process(
+        target=worker, args=(f"bench_worker{n}", args.work_ms, args.visibility_timeout), daemon=True,
+    )
+    proc.start()
+    return proc
+
+
+def chaos(r, args):
+    r.delete(DONE_KEY, PROCESSED_KEY)
+    fill(r, args.tasks)
+    workers = [start_worker(n, args) for n in range(args.workers)]
+    spawned = len(workers)
+    kills = 0
+    start = time.perf_counter()
+    next_kill = start + args.kill_every
+    while r.scard(DONE_KEY) < args.tasks:
+        now = time.perf_counter()
+        if now - start > args.timeout:
+            print("⚠️ Tiempo agotado")
+            break
+        if now >= next_kill:
+            victim = workers.pop(random.randrange(len(workers)))
+            victim.kill()
+            kills += 1
+            workers.append(start_worker(spawned, args))
+            spawned += 1
+            next_kill = now + args.kill_every
+        reap_expired(r, "bench", visibility_timeout=args.visibility_timeout, interval=1)
+        time.sleep(0.1)
+    elapsed = time.perf_counter() - start
+    for proc in workers:
+        proc.kill()
+
+    done = r.scard(DONE_KEY)
+    processed = int(r.get(PROCESSED_KEY) or 0)
+    print(f"workers matados: {kills} | tareas completadas: {done:,}/{args.tasks:,} "
+          f"| perdidas: {args.tasks - done:,} | reentregadas: {processed - done:,} "
+          f"| {done / elapsed:,.0f} tareas/seg")
+    r.delete(DONE_KEY, PROCESSED_KEY, QUEUE_KEY)
+
+
+def main():
+    parser = base_parser("Entrega confiable: costo frente a BLPOP y caída de workers")
+    parser.add_argument("--tasks", type=int, default=20000)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--kill-every", type=float, default=1.0, help="Segundos entre SIGKILL")
+    parser.add_argument("--work-ms", type=float, default=1.0, help="Trabajo simulado por tarea")
+    parser.add_argument("--visibility-timeout", type=float, default=2.0)
+    parser.add_argument("--timeout", type=float, default=300)
+    args = parser.parse_args()
+
+    r = connect(args.fake)
+    r.delete(QUEUE_KEY)
+    runs = (
+        ("BLPOP + LPOP count", lambda: run_plain(r, args.tasks)),
+        ("confiable, ack por tarea", lambda: run_reliable(r, args.tasks, True)),
+        ("confiable, ack por lote", lambda: run_reliable(r, args.tasks, False)),
+    )
+    for name, runner in runs:
+        fill(r, args.tasks)
+        _, elapsed = timed(runner)
+        print(f"{name:>26}: {args.tasks / elapsed:>10,.0f} tareas/seg")
+
+    if args.fake:
+        print("La prueba de caída de workers necesita un redis-server real; se omite con --fake")
+        return
+    chaos(r, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+# core/bench/bench_snake_move.py
+#
+# Compara movimientos/seg del camino anterior (GET + json.loads + SET desde
+# Python) contra el script Lua atómico de utils/scripts.py. Ambos caminos
+# publican el estado igual que los nodos.
+#
+#   python -m bench.bench_snake_move --moves 20000
+#   python -m bench.bench_snake_move --fake   # requiere fakeredis[lua]
+
+import json
+
+from bench.common import base_parser, connect, timed
+from logic.game_state import create_game_state
+from utils.lanes import doorbell_key
+from utils.scripts import register_move_script, preload_scripts
+
+BOARD_WIDTH = 20
+BOARD_HEIGHT = 20
+STATE_KEY = "bench:snake:state"
+QUEUE_KEY = "bench:unassigned_tasks"
+CHANNEL = "bench:snake:updates"
+
+# Recorre un cuadrado de 2x2 para que la serpiente nunca choque ni coma
+LOOP = ["right", "down", "left", "up"]
+
+
+def reset(r):
+    state = create_game_state(
+        snake=[[5, 5], [5, 4], [5, 3]],
+        food=[[15, 15]],
+        obstacles=[]
+    )
+    state["direction"] = "right"
+    r.set(STATE_KEY, json.dumps(state))
+    r.delete(QUEUE_KEY, doorbell_key(QUEUE_KEY))
+
+
+def legacy_move(r, direction):
+    """Replica el process_task original: dos round trips y un ciclo leer-modificar-escribir."""
+    game_state = json.loads(r.get(STATE_KEY))
+    snake = [list(pos) for pos in game_state["snake"]]
+    head = snake[0].copy()
+    if direction == "up":
+        head[1] -= 1
+    elif direction == "down":
+        head[1] += 1
+    elif direction == "left":
+        head[0] -= 1
+    elif direction == "right":
+        head[0] += 1
+    snake.insert(0, head)
+    game_over = (
+        head[0] < 0 or head[0] >= BOARD_WIDTH or
+        head[1] < 0 or head[1] >= BOARD_HEIGHT or
+        head in snake[1:]
+    )
+    if not game_over:
+        snake.pop()
+    new_state = create_game_state(snake, [game_state["food"]], game_state["obstacles"],
+                                  game_state["score"], game_over)
+    new_state["direction"] = direction
+    state_json = json.dumps(new_state)
+    r.set(STATE_KEY, state_json)
+    r.publish(CHANNEL, state_json)
+
+
+def run_legacy(r, moves):
+    for i in range(moves):
+        legacy_move(r, LOOP[i % len(LOOP)])
+
+
+def run_lua(r, moves):
+    script = register_move_script(r)
+    for i in range(moves):
+        script(keys=[STATE_KEY, QUEUE_KEY, CHANNEL, doorbell_key(QUEUE_KEY)], args=[LOOP[i % len(LOOP)], BOARD_WIDTH, BOARD_HEIGHT])
+
+
+def main():
+    parser = base_parser("Benchmark de movimientos de Snake: Python vs Lua")
+    parser.add_argument("--moves", type=int, default=10000)
+    args = parser.parse_args()
+
+    r = connect(args.fake)
+    preload_scripts(r)
+
+    results = {}
+    for name, runner in (("legacy", run_legacy), ("lua", run_lua)):
+        reset(r)
+        _, elapsed = timed(runner, r, args.moves)
+        state = json.loads(r.get(STATE_KEY))
+        assert not state["game_over"], f"{name}: la serpiente murió durante el benchmark"
+        results[name] = args.moves / elapsed
+        print(f"{name:>7}: {results[name]:,.0f} movimientos/seg ({elapsed:.2f} s)")
+
+    print(f"speedup: {results['lua'] / results['legacy']:.2f}x")
+    r.delete(STATE_KEY, QUEUE_KEY, doorbell_key(QUEUE_KEY))
+
+
+if __name__ == "__main__":
+    main()
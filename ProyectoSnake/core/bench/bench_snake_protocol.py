@@ -0,0 +1,78 @@
+# core/bench/bench_snake_protocol.py
+#
+# Bytes y CPU por frame de /ws/snake: JSON completo contra el protocolo delta
+# (JSON y binario) con serpientes largas y tableros con muchos obstáculos.
+#
+#   python -m bench.bench_snake_protocol --lengths 10 1000 10000 --obstacles 0 5000
+
+import argparse
+import json
+import time
+
+from utils.snake_protocol import DeltaEncoder
+
+
+def make_state(length, obstacles, width):
+    # Serpiente en zigzag que ocupa filas completas del tablero
+    snake = []
+    for i in range(length):
+        row, col = divmod(i, width)
+        x = col if row % 2 == 0 else width - 1 - col
+        snake.append([x, row])
+    snake.reverse()
+    obstacle_cells = [[i % width, width + i // width] for i in range(obstacles)]
+    return {
+        "snake": snake,
+        "food": [0, width * 4],
+        "score": 0,
+        "game_over": False,
+        "obstacles": obstacle_cells,
+        "direction": "right",
+    }
+
+
+def states(length, obstacles, frames, width):
+    """Genera estados sucesivos: una cabeza nueva y una cola menos por frame."""
+    state = make_state(length, obstacles, width)
+    for _ in range(frames):
+        head = state["snake"][0]
+        state = dict(state, snake=[[head[0], head[1] - 1]] + state["snake"][:-1])
+        yield json.dumps(state)
+
+
+def measure(length, obstacles, frames, width):
+    payloads = list(states(length, obstacles, frames, width))
+    encoder = DeltaEncoder()
+    encoder.push(payloads[0])
+
+    full_bytes = sum(len(p.encode()) for p in payloads[1:]) / (frames - 1)
+
+    start = time.perf_counter()
+    delta_bytes = 0
+    binary_bytes = 0
+    for payload in payloads[1:]:
+        frame = encoder.push(payload)
+        delta_bytes += len(frame.encode().encode())
+        binary_bytes += len(frame.encode(binary=True))
+    cpu = (time.perf_counter() - start) / (frames - 1) * 1e6
+    return full_bytes, delta_bytes / (frames - 1), binary_bytes / (frames - 1), cpu
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tamaño y CPU por frame del protocolo delta")
+    parser.add_argument("--lengths", type=int, nargs="+", default=[10, 1000, 10000])
+    parser.add_argument("--obstacles", type=int, nargs="+", default=[0, 5000])
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--width", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'largo':>7} {'obst':>6} {'full B':>9} {'delta B':>8} {'bin B':>6} {'µs/frame':>9}")
+    for length in args.lengths:
+        for obstacles in args.obstacles:
+            full, delta, binary, cpu = measure(length, obstacles, args.frames, args.width)
+            print(f"{length:>7} {obstacles:>6} {full:>9.0f} {delta:>8.0f} {binary:>6.0f} {cpu:>9.1f}")
+    print("µs/frame incluye json.loads del estado publicado, el diff y ambas codificaciones.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+# core/bench/bench_tick_loop.py
+#
+# Inunda de entradas muchas partidas en modo tick y verifica que las entradas
+# pendientes nunca superen una por partida. Al final lee de node_stats el
+# jitter del tick y la latencia p99 entrada -> estado que reporta cada nodo.
+#
+# Levantar antes player_nodes con SNAKE_TICK_RATE, por ejemplo:
+#   SNAKE_TICK_RATE=20 NODE_ID=p1 python player_node.py &
+#   python -m bench.bench_tick_loop --games 2000 --rate 20000 --seconds 10
+
+import random
+import time
+
+from bench.common import base_parser, connect
+from utils.sharding import PLAYER_NODES_KEY, state_key
+from utils.ticks import ACTIVE_GAMES_KEY, INPUTS_KEY, store_input
+
+DIRECTIONS = ["up", "down", "left", "right"]
+METRICS = ("ticks", "tick_overruns", "tick_jitter_p50_ms", "tick_jitter_p99_ms",
+           "input_latency_p50_ms", "input_latency_p99_ms")
+
+
+def main():
+    parser = base_parser("Entradas coalescidas y métricas del modo tick")
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--rate", type=int, default=10000, help="Entradas por segundo")
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--batch", type=int, default=200, help="Entradas por pipeline")
+    args = parser.parse_args()
+
+    r = connect(args.fake)
+    games = [f"tick{i}" for i in range(args.games)]
+    sent = 0
+    max_pending = 0
+    start = time.perf_counter()
+    deadline = start + args.seconds
+    while time.perf_counter() < deadline:
+        pipe = r.pipeline(transaction=False)
+        for _ in range(args.batch):
+            store_input(pipe, random.choice(games), random.choice(DIRECTIONS))
+        pipe.execute()
+        sent += args.batch
+        max_pending = max(max_pending, r.hlen(INPUTS_KEY))
+        # Mantener la tasa pedida
+        ahead = sent / args.rate - (time.perf_counter() - start)
+        if ahead > 0:
+            time.sleep(ahead)
+
+    print(f"{sent:,} entradas en {args.seconds:g} s para {args.games:,} partidas")
+    print(f"máximo de entradas pendientes: {max_pending:,} (cota: una por partida)")
+
+    for node in r.zrange(PLAYER_NODES_KEY, 0, -1):
+        stats = r.hgetall(f"node_stats:{node}")
+        if "ticks" in stats:
+            print(f"  {node}: " + " | ".join(f"{name}={stats.get(name)}" for name in METRICS))
+
+    pipe = r.pipeline(transaction=False)
+    for game in games:
+        pipe.delete(state_key(game))
+        pipe.hdel(INPUTS_KEY, game)
+        pipe.srem(ACTIVE_GAMES_KEY, game)
+    pipe.execute()
+
+
+if __name__ == "__main__":
+    main()
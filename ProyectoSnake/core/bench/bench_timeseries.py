@@ -0,0 +1,82 @@
+# core/bench/bench_timeseries.py
+#
+# Costo del historial de métricas (utils/timeseries.py) en el heartbeat:
+#   1) latencia del pipeline del heartbeat con y sin la muestra de historial,
+#   2) memoria por nodo después de simular días de heartbeats (debe quedar
+#      constante: los buffers circulares se pisan),
+#   3) latencia de leer la última hora y el último día.
+#
+#   python -m bench.bench_timeseries --nodes 50 --beats 3000 [--fake]
+
+import random
+import time
+
+from bench.common import base_parser, connect, percentile
+from utils.timeseries import NodeHistory, RESOLUTIONS, series_key
+
+
+def heartbeat(r, history, node_id, now, with_history):
+    pipe = r.pipeline()
+    pipe.hset(f"bench:node_stats:{node_id}", mapping={"cpu": 10.0, "ram": 20.0, "last_heartbeat": now})
+    if with_history:
+        history.record(node_id, random.uniform(0, 100), random.uniform(0, 100), 50.0, now=now, client=pipe)
+    pipe.execute()
+
+
+def memory(r, node_ids):
+    total = 0
+    for node_id in node_ids:
+        total += sum(r.strlen(series_key(node_id, res)) for res, _ in RESOLUTIONS)
+    return total / len(node_ids)
+
+
+def main():
+    parser = base_parser("Historial de CPU/RAM/disco en el heartbeat")
+    parser.add_argument("--nodes", type=int, default=50)
+    parser.add_argument("--beats", type=int, default=3000, help="Heartbeats por fase de latencia")
+    parser.add_argument("--days", type=float, default=3.0, help="Días simulados para medir memoria")
+    args = parser.parse_args()
+
+    r = connect(args.fake)
+    history = NodeHistory(r)
+    node_ids = [f"bench{i}" for i in range(args.nodes)]
+    r.delete(*[series_key(n, res) for n in node_ids for res, _ in RESOLUTIONS])
+
+    now = time.time()
+    for with_history in (False, True):
+        samples = []
+        for i in range(args.beats):
+            start = time.perf_counter()
+            heartbeat(r, history, node_ids[i % args.nodes], now + i, with_history)
+            samples.append((time.perf_counter() - start) * 1000)
+        label = "con historial" if with_history else "sin historial"
+        print(f"   heartbeat {label}: p50 {percentile(samples, 50):.3f} ms | p99 {percentile(samples, 99):.3f} ms")
+
+    # Días simulados con un heartbeat cada 7 s: la memoria no crece
+    step = 7
+    start_ts = now - args.days * 86400
+    sizes = []
+    for day in range(int(args.days)):
+        for t in range(0, 86400, step):
+            pipe = r.pipeline(transaction=False)
+            for node_id in node_ids[:5]:
+                history.record(node_id, 50.0, 50.0, 50.0, now=start_ts + day * 86400 + t, client=pipe)
+            pipe.execute()
+        sizes.append(memory(r, node_ids[:5]))
+    print("   bytes por nodo al final de cada día: " + ", ".join(f"{size / 1024:.0f} KB" for size in sizes))
+
+    for label, span in (("última hora", 3600), ("último día", 86400)):
+        samples = []
+        for _ in range(200):
+            start = time.perf_counter()
+            history.read(node_ids[0], now - span, now)
+            samples.append((time.perf_counter() - start) * 1000)
+        res, points = history.read(node_ids[0], now - span, now)
+        print(f"   lectura {label}: {len(points)} puntos a {res} s, p50 {percentile(samples, 50):.2f} ms")
+
+    r.delete(*[series_key(n, res) for n in node_ids for res, _ in RESOLUTIONS])
+    r.delete(*[f"bench:node_stats:{n}" for n in node_ids])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+# core/bench/bench_worker_loop.py
+#
+# Tareas/seg que drena un worker con el loop anterior (BLPOP + heartbeat +
+# pausa fija por tarea) contra el loop por lotes (BLPOP + LPOP count, con el
+# heartbeat en su propio temporizador). El procesamiento es un json.loads para
+# medir solo el costo del loop.
+#
+#   python -m bench.bench_worker_loop --tasks 20000 [--fake]
+
+import json
+import time
+
+from bench.common import base_parser, connect, timed
+from utils.heartbeat import HeartbeatTimer
+from utils.queues import pop_batch
+
+QUEUE_KEY = "bench:worker_queue"
+NODE_ID = "bench_worker"
+
+# Pausa fija que tenía cada loop antes de este cambio
+LEGACY_SLEEPS = {
+    "player/scenario_node": 0.05,
+    "nodoMovimiento": 0.1,
+    "DMS node": 1.0,
+}
+
+
+def heartbeat(r):
+    pipe = r.pipeline()
+    pipe.hset(f"node_stats:{NODE_ID}", mapping={"last_heartbeat": time.time(), "status": "available"})
+    pipe.execute()
+
+
+def fill(r, tasks):
+    pipe = r.pipeline(transaction=False)
+    for i in range(tasks):
+        pipe.lpush(QUEUE_KEY, json.dumps({"type": "bench", "i": i}))
+        if i % 1000 == 999:
+            pipe.execute()
+    pipe.execute()
+
+
+def legacy_loop(r, tasks, sleep):
+    done = 0
+    while done < tasks:
+        task = r.blpop(QUEUE_KEY, timeout=1)
+        if task:
+            json.loads(task[1])
+            done += 1
+        heartbeat(r)
+        time.sleep(sleep)
+
+
+def batched_loop(r, tasks, batch):
+    timer = HeartbeatTimer(lambda: heartbeat(r)).start()
+    done = 0
+    while done < tasks:
+        for data in pop_batch(r, QUEUE_KEY, count=batch):
+            json.loads(data)
+            done += 1
+    timer.stop()
+
+
+def main():
+    parser = base_parser("Tareas/seg por worker: loop con pausas fijas vs por lotes")
+    parser.add_argument("--tasks", type=int, default=20000)
+    parser.add_argument("--legacy-seconds", type=float, default=3,
+                        help="Duración aproximada de cada corrida del loop anterior")
+    parser.add_argument("--batch", type=int, default=100)
+    args = parser.parse_args()
+
+    r = connect(args.fake)
+    r.delete(QUEUE_KEY)
+
+    for name, sleep in LEGACY_SLEEPS.items():
+        tasks = max(2, int(args.legacy_seconds / sleep))
+        fill(r, tasks)
+        _, elapsed = timed(legacy_loop, r, tasks, sleep)
+        print(f"antes  {name:>21}: {tasks / elapsed:>10,.1f} tareas/seg")
+
+    fill(r, args.tasks)
+    _, elapsed = timed(batched_loop, r, args.tasks, args.batch)
+    print(f"ahora  {'por lotes':>21}: {args.tasks / elapsed:>10,.1f} tareas/seg (lote={args.batch})")
+    r.delete(QUEUE_KEY, f"node_stats:{NODE_ID}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+# core/bench/bench_ws_fanout.py
+#
+# Prueba de carga del push de /ws/snake. Abre N visores, encola movimientos
+# y mide cuánto tarda cada visor en recibir el nuevo estado, junto con las
+# operaciones/seg que ve Redis mientras tanto.
+#
+# Requiere la API (run_server.py), un player_node y redis-server corriendo:
+#   python -m bench.bench_ws_fanout --viewers 1 10 50 100 --moves 200
+
+import argparse
+import asyncio
+import json
+import time
+
+import websockets
+
+from bench.common import connect, percentile
+
+PLAYER_TASKS_QUEUE = "player_tasks"
+LOOP = ["right", "down", "left", "up"]
+
+
+async def viewer(url, inbox, ready):
+    async with websockets.connect(url, max_size=None) as ws:
+        await ws.recv()  # estado inicial que envía register()
+        ready.set()
+        async for _ in ws:
+            inbox.put_nowait(time.perf_counter())
+
+
+def redis_commands(r):
+    return int(r.info("stats")["total_commands_processed"])
+
+
+async def run_round(r, url, viewers, moves, timeout):
+    inboxes = [asyncio.Queue() for _ in range(viewers)]
+    ready = [asyncio.Event() for _ in range(viewers)]
+    tasks = [asyncio.create_task(viewer(url, inboxes[i], ready[i])) for i in range(viewers)]
+    await asyncio.gather(*(event.wait() for event in ready))
+
+    # Si el estado ya era el inicial el broadcaster no reenvía nada, así que
+    # solo se espera un momento y se vacían las colas
+    r.lpush(PLAYER_TASKS_QUEUE, json.dumps({"type": "reset_game"}))
+    await asyncio.sleep(0.5)
+    for inbox in inboxes:
+        while not inbox.empty():
+            inbox.get_nowait()
+
+    latencies = []
+    commands_before = redis_commands(r)
+    start = time.perf_counter()
+    for i in range(moves):
+        sent = time.perf_counter()
+        r.lpush(PLAYER_TASKS_QUEUE, json.dumps({
+            "type": "snake_move",
+            "player_id": "bench",
+            "direction": LOOP[i % len(LOOP)],
+        }))
+        for inbox in inboxes:
+            received = await asyncio.wait_for(inbox.get(), timeout)
+            latencies.append((received - sent) * 1000)
+    elapsed = time.perf_counter() - start
+    # Se descuentan los propios LPUSH e INFO del benchmark
+    ops = (redis_commands(r) - commands_before - moves - 1) / elapsed
+
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    return ops, latencies
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Carga de /ws/snake con N visores")
+    parser.add_argument("--url", default="ws://127.0.0.1:8000/ws/snake")
+    parser.add_argument("--viewers", type=int, nargs="+", default=[1, 10, 50, 100])
+    parser.add_argument("--moves", type=int, default=100)
+    parser.add_argument("--timeout", type=float, default=5.0)
+    args = parser.parse_args()
+
+    r = connect()
+    print(f"{'visores':>8} {'redis ops/s':>12} {'p50 ms':>8} {'p99 ms':>8}")
+    for viewers in args.viewers:
+        ops, latencies = await run_round(r, args.url, viewers, args.moves, args.timeout)
+        print(f"{viewers:>8} {ops:>12.1f} {percentile(latencies, 50):>8.2f} {percentile(latencies, 99):>8.2f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
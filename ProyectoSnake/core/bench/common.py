@@ -0,0 +1,39 @@
+# core/bench/common.py
+#
+# Utilidades compartidas por los benchmarks. Se ejecutan desde core/ con
+#   python -m bench.<nombre> [--fake]
+
+import argparse
+import time
+
+
+def base_parser(description):
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--fake", action="store_true",
+                        help="Usa fakeredis en memoria en lugar de un redis-server local")
+    return parser
+
+
+def connect(fake=False):
+    """Retorna un cliente Redis real (REDIS_HOST/REDIS_PORT) o uno de fakeredis."""
+    if fake:
+        import fakeredis  # Solo se necesita para correr sin redis-server
+        return fakeredis.FakeRedis(decode_responses=True)
+    from utils import redis_client
+    return redis_client.get_redis()
+
+
+def percentile(values, pct):
+    """Percentil por rango más cercano; suficiente para reportes de benchmark."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def timed(fn, *args, **kwargs):
+    """Ejecuta fn y retorna (resultado, segundos)."""
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
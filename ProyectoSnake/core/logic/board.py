@@ -0,0 +1,206 @@
+# core/logic/board.py
+#
+# Motor del tablero de Snake con operaciones O(1): el cuerpo vive en un deque,
+# la ocupación en bytearrays de BOARD_WIDTH*BOARD_HEIGHT y las celdas libres en
+# un conjunto indexado que permite elegir una al azar sin recorrer el tablero.
+# Se convierte desde y hacia el esquema de snake:state (ver game_state.py).
+
+import json
+import random
+from collections import deque
+
+from logic.game_state import create_game_state
+
+BOARD_WIDTH = 20
+BOARD_HEIGHT = 20
+
+DELTAS = {
+    "up": (0, -1),
+    "down": (0, 1),
+    "left": (-1, 0),
+    "right": (1, 0),
+}
+
+
+class FreeCells:
+    """Conjunto de índices con add/remove/choice en O(1) (lista + posiciones)."""
+
+    def __init__(self, cells=()):
+        self._items = list(cells)
+        self._pos = {cell: i for i, cell in enumerate(self._items)}
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, cell):
+        return cell in self._pos
+
+    def add(self, cell):
+        if cell not in self._pos:
+            self._pos[cell] = len(self._items)
+            self._items.append(cell)
+
+    def discard(self, cell):
+        i = self._pos.pop(cell, None)
+        if i is None:
+            return
+        last = self._items.pop()
+        if i < len(self._items):
+            self._items[i] = last
+            self._pos[last] = i
+
+    def choice(self, rng=random):
+        return self._items[rng.randrange(len(self._items))] if self._items else None
+
+
+class SnakeBoard:
+    def __init__(self, width=BOARD_WIDTH, height=BOARD_HEIGHT):
+        self.width = width
+        self.height = height
+        self.body = deque()                        # (x, y); la cabeza a la izquierda
+        self.snake_cells = bytearray(width * height)  # cuántos segmentos hay en cada celda
+        self.blocked = bytearray(width * height)      # 1 si hay obstáculo
+        self.free = FreeCells(range(width * height))  # ni serpiente, ni obstáculo, ni comida
+        self.food = None
+        self.obstacles = []
+        self.score = 0
+        self.game_over = False
+        self.direction = None
+
+    # --- Celdas ---
+
+    def in_bounds(self, x, y):
+        return 0 <= x < self.width and 0 <= y < self.height
+
+    def index(self, x, y):
+        return y * self.width + x
+
+    def cell(self, index):
+        return list(divmod(index, self.width)[::-1])
+
+    def _release(self, x, y):
+        """Devuelve la celda al conjunto libre si ya nada la ocupa."""
+        if not self.in_bounds(x, y):
+            return
+        i = self.index(x, y)
+        if not self.snake_cells[i] and not self.blocked[i] and (x, y) != self.food:
+            self.free.add(i)
+
+    def _occupy_snake(self, x, y):
+        if self.in_bounds(x, y):
+            i = self.index(x, y)
+            self.snake_cells[i] += 1
+            self.free.discard(i)
+
+    # --- Estado ---
+
+    @classmethod
+    def from_state(cls, state, width=BOARD_WIDTH, height=BOARD_HEIGHT):
+        board = cls(width, height)
+        for x, y in state.get("snake") or []:
+            board.body.append((x, y))
+            board._occupy_snake(x, y)
+        for x, y in state.get("obstacles") or []:
+            board.add_obstacle([x, y])
+        if state.get("food"):
+            board.place_food(state["food"])
+        board.score = state.get("score", 0)
+        board.game_over = state.get("game_over", False)
+        board.direction = state.get("direction")
+        return board
+
+    @classmethod
+    def from_json(cls, data, width=BOARD_WIDTH, height=BOARD_HEIGHT):
+        return cls.from_state(json.loads(data), width, height)
+
+    def to_state(self):
+        """Retorna el dict con el mismo esquema que create_game_state."""
+        food = [list(self.food)] if self.food else []
+        state = create_game_state(
+            [list(cell) for cell in self.body],
+            food,
+            [list(cell) for cell in self.obstacles],
+            self.score,
+            self.game_over,
+        )
+        if self.direction:
+            state["direction"] = self.direction
+        return state
+
+    def to_json(self):
+        return json.dumps(self.to_state())
+
+    # --- Escenario ---
+
+    def remove_food(self):
+        if self.food:
+            old = self.food
+            self.food = None
+            self._release(*old)
+
+    def place_food(self, position=None):
+        """Coloca la comida en position o en una celda libre al azar (O(1))."""
+        self.remove_food()
+        if position is None:
+            i = self.free.choice()
+            if i is None:
+                return None
+            position = self.cell(i)
+        self.food = (position[0], position[1])
+        if self.in_bounds(*self.food):
+            self.free.discard(self.index(*self.food))
+        return list(self.food)
+
+    def add_obstacle(self, position=None):
+        """Agrega un obstáculo en position o en una celda libre al azar (O(1))."""
+        if position is None:
+            i = self.free.choice()
+            if i is None:
+                return None
+            position = self.cell(i)
+        x, y = position[0], position[1]
+        self.obstacles.append((x, y))
+        if self.in_bounds(x, y):
+            i = self.index(x, y)
+            self.blocked[i] = 1
+            self.free.discard(i)
+        return [x, y]
+
+    # --- Movimiento ---
+
+    def step(self, direction=None):
+        """
+        Avanza la serpiente una celda. Retorna (estado, comio) con estado
+        "ok", "wall", "self" o "game_over", igual que el script Lua.
+        """
+        if self.game_over:
+            return "game_over", False
+        direction = direction or self.direction or "right"
+        self.direction = direction
+        dx, dy = DELTAS.get(direction, (0, 0))
+        hx, hy = self.body[0]
+        head = (hx + dx, hy + dy)
+
+        # Como en la versión original, la cola todavía cuenta al chequear el choque
+        if not self.in_bounds(*head):
+            status = "wall"
+        elif self.snake_cells[self.index(*head)]:
+            status = "self"
+        else:
+            status = "ok"
+
+        self.body.appendleft(head)
+        self._occupy_snake(*head)
+        if status != "ok":
+            self.game_over = True
+            return status, False
+
+        if head == self.food:
+            self.score += 1
+            return status, True
+
+        tx, ty = self.body.pop()
+        if self.in_bounds(tx, ty):
+            self.snake_cells[self.index(tx, ty)] -= 1
+        self._release(tx, ty)
+        return status, False
@@ -4,30 +4,52 @@ import random
 
 BOARD_WIDTH = 20
 BOARD_HEIGHT = 20
+# Con menos celdas ocupadas que esto se sortea contra un set (O(1) esperado);
+# con más se enumeran las libres. Para una sola posición es más barato que
+# armar un SnakeBoard (que recorre el tablero entero para construirse)
+SPARSE_LIMIT = BOARD_WIDTH * BOARD_HEIGHT // 2
 
 def random_position(exclude=None):
-    """Genera una posición aleatoria no incluida en exclude."""
-    if exclude is None:
-        exclude = []
-    while True:
-        pos = [random.randint(0, BOARD_WIDTH - 1), random.randint(0, BOARD_HEIGHT - 1)]
-        if pos not in exclude:
-            return pos
+    """Genera una posición aleatoria no incluida en exclude (None si no hay lugar)."""
+    excluded = {tuple(pos) for pos in exclude or []}
+    # Con el tablero mayormente libre basta con sortear; si está lleno se enumera
+    if len(excluded) < SPARSE_LIMIT:
+        while True:
+            pos = [random.randint(0, BOARD_WIDTH - 1), random.randint(0, BOARD_HEIGHT - 1)]
+            if tuple(pos) not in excluded:
+                return pos
+    free = [
+        [x, y]
+        for y in range(BOARD_HEIGHT)
+        for x in range(BOARD_WIDTH)
+        if (x, y) not in excluded
+    ]
+    return random.choice(free) if free else None
 
 def add_food(game_state, position=None):
     """Agrega comida en una posición nueva (aleatoria si no se da)."""
-    exclude = game_state["snake"] + game_state.get("obstacles", [])
-    pos = position if position else random_position(exclude)
-    game_state["food"] = pos
+    if position:
+        game_state["food"] = position
+        return game_state
+    # La comida actual no bloquea: se va a mover
+    exclude = (game_state.get("snake") or []) + (game_state.get("obstacles") or [])
+    pos = random_position(exclude)
+    if pos:
+        game_state["food"] = pos
     return game_state
 
 def add_obstacle(game_state, position=None):
     """Agrega un obstáculo (aleatorio si no se da)."""
     if "obstacles" not in game_state:
         game_state["obstacles"] = []
-    exclude = game_state["snake"] + [game_state["food"]] + game_state["obstacles"]
-    pos = position if position else random_position(exclude)
-    game_state["obstacles"].append(pos)
+    pos = position
+    if not pos:
+        exclude = (game_state.get("snake") or []) + game_state["obstacles"]
+        if game_state.get("food"):
+            exclude.append(game_state["food"])
+        pos = random_position(exclude)
+    if pos:
+        game_state["obstacles"].append(pos)
     return game_state
 
 def remove_food(game_state):
@@ -1,39 +1,49 @@
+import os
 import time
-import json
-from utils import redis_client
+from utils import codec, lanes, metrics, redis_client
+from utils.codec import peek_field
+from utils.dispatch import Dispatcher, NodeView, node_queue
+from utils.heartbeat import LAST_SEEN_KEY
+from utils.sharding import ShardRouter
+from utils.queues import reap_expired
+from utils.ticks import store_input, tick_mode
+from utils.logs import get_logger
 
 # Configuración de Redis
 r = redis_client.get_redis()
+router = ShardRouter()
+log = get_logger("main")
 
 NODE_TIMEOUT = 5  # segundos, tiempo máximo entre heartbeats para considerar un nodo "vivo"
+STATUS_INTERVAL = 2  # segundos entre impresiones del estado de los nodos
+# least_loaded, power_of_two o weighted (ver utils/dispatch.py)
+DISPATCH_POLICY = os.getenv("DISPATCH_POLICY", "least_loaded")
+dispatcher = Dispatcher(NodeView(timeout=NODE_TIMEOUT), DISPATCH_POLICY)
 
-# Cola global de entrada de tareas (donde la API o scripts depositan tareas)
+# Cola global de entrada de tareas (donde la API o scripts depositan tareas),
+# leída por carriles de prioridad (ver utils/lanes.py)
 UNASSIGNED_TASKS_QUEUE = "global:unassigned_tasks"
-  
+incoming = lanes.lane_queue(r, UNASSIGNED_TASKS_QUEUE, "main")
 
-
-  
-# Colas específicas para cada tipo de worker
-PLAYER_TASKS_QUEUE = "player_tasks"
+# Los movimientos van a la cola del player_node dueño de la partida (ver
+# utils/sharding.py) para conservar su orden. El resto de las tareas va a la
+# cola task_queue:{id} del nodo que elija la política entre los vivos con el
+# rol indicado; si no hay ninguno, a la cola compartida del tipo.
 SCENARIO_TASKS_QUEUE = "scenario_tasks"
-
-def check_node_status(node_id):
-    stats = r.hgetall(f"node_stats:{node_id}")
-    if not stats:
-        return False
-    try:
-        last_heartbeat = float(stats.get("last_heartbeat", 0))
-        return time.time() - last_heartbeat <= NODE_TIMEOUT
-    except Exception:
-        return False
+TASK_ROLES = {"scenario_update": "scenario"}
+FALLBACK_QUEUES = {"scenario_update": SCENARIO_TASKS_QUEUE}
 
 def show_node_statuses():
+    """Un ZRANGE de nodes:last_seen y un solo pipeline con los HGETALL, sin SCAN."""
     print("\nEstado actual de los nodos:")
-    node_keys = [key for key in r.scan_iter("node_stats:*")]
-    for key in node_keys:
-        node = key.split(":")[1]
-        stats = r.hgetall(key)
-        if check_node_status(node):
+    now = time.time()
+    seen = r.zrange(LAST_SEEN_KEY, 0, -1, withscores=True)
+    pipe = r.pipeline(transaction=False)
+    for node, _ in seen:
+        pipe.hgetall(f"node_stats:{node}")
+    replies = pipe.execute() if seen else []
+    for (node, last_heartbeat), stats in zip(seen, replies):
+        if stats and now - last_heartbeat <= NODE_TIMEOUT:
             cpu = float(stats.get("cpu", 100))
             ram = float(stats.get("ram", 100))
             status = stats.get("status", "available")
@@ -43,34 +53,65 @@ def show_node_statuses():
         else:
             print(f"🔴 Nodo {node} inactivo o sin heartbeat reciente.")
 
-def distribute_task(task):
-    # Decide a qué cola enviar la tarea según el tipo
-    task_type = task.get("type")
-    if task_type == "snake_move":
-        r.lpush(PLAYER_TASKS_QUEUE, json.dumps(task))
-        print(f"🚀 Tarea de movimiento enviada a {PLAYER_TASKS_QUEUE}")
-    elif task_type == "scenario_update":
-        r.lpush(SCENARIO_TASKS_QUEUE, json.dumps(task))
-        print(f"🚀 Tarea de escenario enviada a {SCENARIO_TASKS_QUEUE}")
+def distribute_task(raw):
+    """
+    Decide a qué cola enviar la tarea según el tipo. El tipo y el game_id se
+    leen sin decodificar la tarea (ver utils/codec.py) y la tarea se reenvía
+    tal como llegó, sin volver a serializarla.
+    """
+    task_type = peek_field(raw, "type")
+    with metrics.task_timer(task_type):
+        route_task(raw, task_type)
+
+def route_task(raw, task_type):
+    if task_type == "snake_move" and tick_mode():
+        # En modo tick solo cuenta la última dirección; la aplica el próximo tick
+        task = codec.loads(raw)
+        pipe = r.pipeline(transaction=False)
+        store_input(pipe, task.get("game_id"), task.get("direction"))
+        with metrics.redis_timer("dispatch"):
+            pipe.execute()
+        log.debug("🚀 Movimiento guardado para el próximo tick")
+    elif task_type in ("snake_move", "reset_game"):
+        router.refresh(r)
+        queue = router.queue_for(peek_field(raw, "game_id"))
+        pipe = r.pipeline(transaction=False)
+        lanes.push(pipe, queue, raw, task_type)
+        with metrics.redis_timer("dispatch"):
+            pipe.execute()
+        log.debug("🚀 Tarea de movimiento enviada a %s", queue)
+    elif task_type in TASK_ROLES:
+        dispatcher.view.refresh(r)
+        node = dispatcher.pick(TASK_ROLES[task_type])
+        queue = node_queue(node.node_id) if node else FALLBACK_QUEUES[task_type]
+        with metrics.redis_timer("dispatch"):
+            r.lpush(queue, raw)
+        log.debug("🚀 Tarea %s enviada a %s (%s)", task_type, queue, dispatcher.policy_name)
     else:
-        print(f"⚠️ Tipo de tarea desconocido: {task_type}")
+        log.warning("⚠️ Tipo de tarea desconocido: %s", task_type)
 
 def main():
     print("📝 Main node iniciado y listo para repartir tareas...\n")
+    incoming.recover()
+    metrics.track_queue(r, incoming)
+    metrics.start_exporter()
+    last_status = 0.0
     while True:
-        show_node_statuses()
-        # Escucha la cola global de entrada y reparte
-        new_task = r.blpop(UNASSIGNED_TASKS_QUEUE, timeout=2)
-        if new_task:
-            _, task_data = new_task
+        # El estado de los nodos se muestra cada STATUS_INTERVAL, no por tarea
+        if time.time() - last_status >= STATUS_INTERVAL:
+            show_node_statuses()
+            reap_expired(r, "main")
+            last_status = time.time()
+        # Escucha la cola global de entrada y reparte por lotes
+        batch = incoming.claim(timeout=STATUS_INTERVAL)
+        if not batch:
+            log.debug("⏳ Esperando tareas...")
+        for source, task_data in batch:
             try:
-                task = json.loads(task_data)
-                distribute_task(task)
+                distribute_task(task_data)
             except Exception as e:
-                print(f"❌ Error al procesar tarea: {e}")
-        else:
-            print("⏳ Esperando tareas...")
-        time.sleep(1)
+                log.error("❌ Error al procesar tarea: %s", e)
+        incoming.ack_many(batch)
 
 if __name__ == "__main__":
     main()
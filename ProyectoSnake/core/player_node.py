@@ -1,7 +1,5 @@
 import time
-import json
-import psutil  # <-- NUEVO
-from utils import redis_client
+from utils import codec, redis_client
 import os
 import sys
 
@@ -12,41 +10,62 @@ if PROYECTO_SNAKE_PATH not in sys.path:
     sys.path.append(PROYECTO_SNAKE_PATH)
 
 from logic.game_state import create_game_state
+from utils.scripts import register_move_script, preload_scripts
+from utils.state_channel import save_state
+from utils.sharding import (
+    PLAYER_NODES_KEY, PLAYER_TASKS_QUEUE, ShardRouter, normalize_game_id, player_queue, state_key,
+    updates_channel,
+)
+from utils.heartbeat import HeartbeatPublisher, HeartbeatTimer
+from utils.timeseries import NodeHistory
+from utils.resources import ResourceSampler
+from utils.lanes import doorbell_key, lane_key, lane_queue
+from utils.queues import reap_expired
+from utils.logs import get_logger
+from utils import metrics
+from utils.ticks import (
+    ACTIVE_GAMES_KEY, INPUTS_KEY, TICK_BATCH, TICK_RATE, TickMetrics, store_input, tick_mode,
+)
 
 r = redis_client.get_redis()
-node_id = "player_node"
+move_script = register_move_script(r)
+# Cada player_node necesita un ID único para tener su propia cola en el anillo
+node_id = os.getenv("NODE_ID", "player_node")
+log = get_logger(node_id)
+router = ShardRouter()
+# CPU/RAM medidos en segundo plano y suavizados (ver utils/resources.py)
+sampler = ResourceSampler()
+# Historial de CPU/RAM en buffers circulares (ver utils/timeseries.py)
+history = NodeHistory(r)
+# Heartbeat con solo los campos que cambiaron + presencia con TTL (ver utils/heartbeat.py)
+heartbeat = HeartbeatPublisher(r, node_id)
+# Cola propia (partidas asignadas por hashing) y compartida, cada una con un
+# carril de control (reset_game) y uno de movimientos (ver utils/lanes.py)
+tasks = lane_queue(r, [player_queue(node_id), PLAYER_TASKS_QUEUE], node_id, lanes=("control", "moves"))
 BOARD_WIDTH = 20
 BOARD_HEIGHT = 20
-PLAYER_TASKS_QUEUE = "player_tasks"
-SNAKE_STATE_KEY = "snake:state"
 GLOBAL_TASKS_QUEUE = "global:unassigned_tasks"  # <- Para enviar tareas de escenario
+SCENARIO_LANE = lane_key(GLOBAL_TASKS_QUEUE, "scenario")
 
-def update_node_status(node_id):
-    cpu = psutil.cpu_percent()
-    ram = psutil.virtual_memory().percent
-    r.hset(f"node_stats:{node_id}", mapping={
+def update_node_status(node_id, extra=None):
+    resources = sampler.snapshot()
+    cpu, ram = resources["cpu"], resources["ram"]
+    pipe = r.pipeline()
+    heartbeat.send({
         "cpu": cpu,
         "ram": ram,
-        "last_heartbeat": time.time(),
         "status": "available",
-        "tasks": 1  # Puedes mejorar esto si manejas concurrencia
-    })
-
-def move_snake(snake, direction):
-    new_snake = [list(pos) for pos in snake]
-    head = new_snake[0].copy()
-    if direction == "up":
-        head[1] -= 1
-    elif direction == "down":
-        head[1] += 1
-    elif direction == "left":
-        head[0] -= 1
-    elif direction == "right":
-        head[0] += 1
-    new_snake.insert(0, head)
-    return new_snake
-
-def reset_game():
+        "role": "player",
+        "tasks": 1,  # Puedes mejorar esto si manejas concurrencia
+        **(extra or {}),
+    }, client=pipe)
+    pipe.zadd(PLAYER_NODES_KEY, {node_id: time.time()})  # membresía en el anillo de partidas
+    history.record(node_id, cpu, ram, client=pipe)
+    with metrics.redis_timer("heartbeat"):
+        pipe.execute()
+    reap_expired(r, node_id)  # reentrega tareas de nodos caídos (un nodo por intervalo)
+
+def reset_game(game_id=None):
     initial_state = create_game_state(
         snake=[[5, 5], [5, 4], [5, 3]],
         food=[[10, 10]],
@@ -54,82 +73,127 @@ def reset_game():
     )
     initial_state["direction"] = "right"
     initial_state["game_over"] = False
-    r.set(SNAKE_STATE_KEY, json.dumps(initial_state))
-    print("🔄 Juego reiniciado.")
+    save_state(r, codec.dumps(initial_state), state_key(game_id), updates_channel(game_id))
+    if tick_mode():
+        r.sadd(ACTIVE_GAMES_KEY, normalize_game_id(game_id))
+    log.info("🔄 Juego %s reiniciado.", normalize_game_id(game_id))
 
 def process_task(data):
-    task = json.loads(data)
+    task = codec.loads(data)
+    task_type = task.get("type")
+    metrics.observe_wait(task_type, task)
+    with metrics.task_timer(task_type):
+        apply_task(task)
+
+def apply_task(task):
+    game_id = task.get("game_id")
     if task.get("type") == "reset_game":
-        reset_game()
+        reset_game(game_id)
         return
 
     if task.get("type") != "snake_move":
-        print(f"⚠️ Tipo de tarea no soportado: {task.get('type')}")
+        log.warning("⚠️ Tipo de tarea no soportado: %s", task.get("type"))
         return
 
-    print(f"🐍 {node_id} procesando tarea: {task}")
-    state_json = r.get(SNAKE_STATE_KEY)
-    if state_json:
-        if isinstance(state_json, bytes):
-            state_json = state_json.decode("utf-8")
-        game_state = json.loads(state_json)
-    else:
-        game_state = {
-            "snake": [[5, 5], [5, 4], [5, 3]],
-            "food": [10, 10],
-            "score": 0,
-            "game_over": False,
-            "obstacles": [],
-            "direction": "right"
-        }
-
-    direction = task.get("direction")
-    if direction is None:
-        direction = game_state.get("direction", "right")
-    snake = game_state.get("snake", [[5, 5], [5, 4], [5, 3]])
-    food = game_state.get("food", [10, 10])
-    obstacles = game_state.get("obstacles", [])
-    score = game_state.get("score", 0)
-    game_over = game_state.get("game_over", False)
-
-    if game_over:
-        print("⛔ El juego ya terminó.")
-        return
+    log.debug("🐍 %s procesando tarea: %s", node_id, task)
+    # Todo el tick (mover, colisiones, comida y encolar scenario_update) corre
+    # dentro de Redis en una sola llamada atómica.
+    direction = task.get("direction") or ""
+    status, ate_food, score, _ = move_script(
+        keys=[state_key(game_id), SCENARIO_LANE, updates_channel(game_id), doorbell_key(GLOBAL_TASKS_QUEUE)],
+        args=[direction, BOARD_WIDTH, BOARD_HEIGHT, game_id or ""],
+    )
 
-    new_snake = move_snake(snake, direction)
-    head = new_snake[0]
-
-    if (
-        head[0] < 0 or head[0] >= BOARD_WIDTH or
-        head[1] < 0 or head[1] >= BOARD_HEIGHT
-    ):
-        print("💀 ¡Game Over! La serpiente chocó con el borde.")
-        game_over = True
-
-    if head in new_snake[1:]:
-        print("💀 ¡Game Over! La serpiente chocó consigo misma.")
-        game_over = True
-
-    ate_food = (head == food)
-    if not game_over:
-        if ate_food:
-            score += 1
-            print(f"🍏 ¡Comida comida en {food}! Enviando tarea para nueva comida.")
-            r.lpush(GLOBAL_TASKS_QUEUE, json.dumps({
-                "type": "scenario_update",
-                "action": "add_food"
-            }))
+    if status == "game_over":
+        log.debug("⛔ El juego ya terminó.")
+        return
+    if status == "wall":
+        log.info("💀 ¡Game Over! La serpiente chocó con el borde.")
+    elif status == "self":
+        log.info("💀 ¡Game Over! La serpiente chocó consigo misma.")
+    elif ate_food:
+        log.info("🍏 ¡Comida comida! Score: %s. Tarea enviada para nueva comida.", score)
+    log.debug("✅ Estado actualizado por %s", node_id)
+
+def drain_queue(limit=1000):
+    """
+    Modo tick: atiende sin bloquear las tareas encoladas. Los movimientos que
+    todavía llegan por cola se guardan como entrada pendiente (se coalescen)
+    en lugar de mover la serpiente fuera del tick.
+    """
+    batch = tasks.claim(limit, timeout=None)
+    if not batch:
+        return
+    pipe = r.pipeline(transaction=False)
+    for _, data in batch:
+        task = codec.loads(data)
+        if task.get("type") == "snake_move":
+            metrics.observe_wait("snake_move", task)
+            store_input(pipe, task.get("game_id"), task.get("direction"))
         else:
-            new_snake.pop()
-
-    new_state = create_game_state(new_snake, [food], obstacles, score, game_over)
-    new_state["direction"] = direction
-    r.set(SNAKE_STATE_KEY, json.dumps(new_state))
-    print(f"✅ Estado actualizado por {node_id}")
+            process_task(data)
+    pipe.execute()
+    tasks.ack_many(batch)
+
+def advance_games(games, tick_metrics):
+    """Avanza un lote de partidas un paso, todas en un solo pipeline."""
+    pipe = r.pipeline(transaction=False)
+    for game_id in games:
+        move_script(
+            keys=[state_key(game_id), SCENARIO_LANE, updates_channel(game_id), doorbell_key(GLOBAL_TASKS_QUEUE),
+                  INPUTS_KEY],
+            args=["", BOARD_WIDTH, BOARD_HEIGHT, game_id, game_id],
+            client=pipe,
+        )
+    with metrics.redis_timer("tick_batch"):
+        results = pipe.execute()
+    now = time.time()
+    finished = []
+    for game_id, (status, ate_food, score, input_ts) in zip(games, results):
+        if input_ts:
+            tick_metrics.record_latency(now - float(input_ts))
+        if status != "ok":
+            finished.append(game_id)
+    if finished:
+        # Las partidas terminadas dejan de avanzar hasta el próximo reset o entrada
+        r.srem(ACTIVE_GAMES_KEY, *finished)
+
+def tick_loop():
+    """Avanza a SNAKE_TICK_RATE ticks/seg las partidas activas que este nodo posee en el anillo."""
+    period = 1.0 / TICK_RATE
+    tick_metrics = TickMetrics()
+    HeartbeatTimer(lambda: update_node_status(node_id, tick_metrics.summary())).start()
+    next_tick = time.perf_counter()
+    print(f"⏱️ {node_id} en modo tick a {TICK_RATE:g} ticks/seg")
+    while True:
+        now = time.perf_counter()
+        if now < next_tick:
+            time.sleep(next_tick - now)
+            now = time.perf_counter()
+        tick_metrics.record_tick(now - next_tick)
+
+        try:
+            drain_queue()
+            router.refresh(r)
+            games = [game for game in r.smembers(ACTIVE_GAMES_KEY) if router.owner(game) == node_id]
+            for i in range(0, len(games), TICK_BATCH):
+                advance_games(games[i:i + TICK_BATCH], tick_metrics)
+        except Exception as e:
+            log.error("❌ Error en el tick: %s", e)
+
+        next_tick += period
+        late = time.perf_counter() - next_tick
+        if late > 0:
+            # El tick tardó más que el período: se saltan los ticks perdidos
+            # en lugar de acumular atraso
+            missed = int(late // period) + 1
+            tick_metrics.overruns += missed
+            next_tick += missed * period
 
 def main():
     print(f"🎤 {node_id} iniciado y esperando tareas...")
-    if not r.exists(SNAKE_STATE_KEY):
+    preload_scripts(r)
+    if not r.exists(state_key()):
         print("🟢 Inicializando estado inicial de Snake en Redis...")
         initial_state = create_game_state(
             snake=[[5, 5], [5, 4], [5, 3]],
@@ -137,15 +201,27 @@ def main():
             obstacles=[]
         )
         initial_state["direction"] = "right"
-        r.set(SNAKE_STATE_KEY, json.dumps(initial_state))
-
+        save_state(r, codec.dumps(initial_state))
+
+    sampler.start()
+    metrics.track_queue(r, tasks)
+    metrics.track_resources(sampler)
+    metrics.start_exporter()
+    # Registrarse antes de escuchar para que el anillo empiece a enviarnos partidas
+    update_node_status(node_id)
+    tasks.recover()
+    if tick_mode():
+        tick_loop()
+        return
+    HeartbeatTimer(lambda: update_node_status(node_id)).start()
     while True:
-        task = r.blpop(PLAYER_TASKS_QUEUE, timeout=1)
-        if task:
-            _, data = task
-            process_task(data)
-        update_node_status(node_id)  # <-- Aquí llamas el update en cada ciclo
-        time.sleep(0.05)
+        for source, data in tasks.claim():
+            try:
+                process_task(data)
+            except Exception as e:
+                log.error("❌ Error al procesar tarea: %s", e)
+            finally:
+                tasks.ack(source, data)
 
 if __name__ == "__main__":
     main()
@@ -1,7 +1,5 @@
 import time
-import json
-import psutil 
-from utils import redis_client
+from utils import codec, redis_client
 import os
 import sys
 
@@ -13,62 +11,108 @@ if LOGIC_PATH not in sys.path:
 
 from logic.game_state import create_game_state 
 from logic.scenario import add_food, add_obstacle  
+from utils.state_channel import save_state
+from utils.heartbeat import HeartbeatPublisher, HeartbeatTimer
+from utils.timeseries import NodeHistory
+from utils.resources import ResourceSampler
+from utils.queues import ReliableQueue, reap_expired
+from utils.dispatch import node_queue
+from utils.sharding import state_key, updates_channel
+from utils.logs import get_logger
+from utils import metrics
 
 r = redis_client.get_redis()
-node_id = "scenario_node"
+# Con varios scenario_nodes cada uno necesita su NODE_ID (y su task_queue)
+node_id = os.getenv("NODE_ID", "scenario_node")
+log = get_logger(node_id)
 
 SCENARIO_TASKS_QUEUE = "scenario_tasks"
-SNAKE_STATE_KEY = "snake:state"
+# Primero la cola propia (la llena el dispatcher), luego la compartida
+tasks = ReliableQueue(r, [node_queue(node_id), SCENARIO_TASKS_QUEUE], node_id)
+# Promedio móvil del tiempo por tarea y tareas en curso, para el dispatcher
+task_stats = {"avg_time": 0.0, "running": 0}
+# CPU/RAM medidos en segundo plano y suavizados (ver utils/resources.py)
+sampler = ResourceSampler()
+# Historial de CPU/RAM en buffers circulares (ver utils/timeseries.py)
+history = NodeHistory(r)
+# Heartbeat con solo los campos que cambiaron + presencia con TTL (ver utils/heartbeat.py)
+heartbeat = HeartbeatPublisher(r, node_id)
 
 def update_node_status(node_id):
-    cpu = psutil.cpu_percent()
-    ram = psutil.virtual_memory().percent
-    r.hset(f"node_stats:{node_id}", mapping={
+    resources = sampler.snapshot()
+    cpu, ram = resources["cpu"], resources["ram"]
+    pipe = r.pipeline()
+    heartbeat.send({
         "cpu": cpu,
         "ram": ram,
-        "last_heartbeat": time.time(),
         "status": "available",
-        "tasks": 1  # Puedes ajustar esto si quieres contar tareas concurrentes reales
-    })
+        "role": "scenario",
+        "tasks": task_stats["running"],
+        "max_tasks": 1,
+        "avg_time": task_stats["avg_time"],
+    }, client=pipe)
+    history.record(node_id, cpu, ram, client=pipe)
+    with metrics.redis_timer("heartbeat"):
+        pipe.execute()
+    reap_expired(r, node_id)  # reentrega tareas de nodos caídos (un nodo por intervalo)
 
 def process_task(data):
-    task = json.loads(data)
+    task = codec.loads(data)
+    task_type = task.get("type")
+    metrics.observe_wait(task_type, task)
+    with metrics.task_timer(task_type):
+        apply_task(task)
+
+def apply_task(task):
     if task.get("type") != "scenario_update":
-        print(f"⚠️ Tipo de tarea no soportado: {task.get('type')}")
+        log.warning("⚠️ Tipo de tarea no soportado: %s", task.get("type"))
         return
 
-    print(f"🍏 {node_id} procesando tarea: {task}")
-    state_json = r.get(SNAKE_STATE_KEY)
-    if state_json:
-        if isinstance(state_json, bytes):
-            state_json = state_json.decode("utf-8")
-        game_state = json.loads(state_json)
-    else:
-        # Cuando no existe el estado, crea snake y comida aleatoria
-        game_state = create_game_state(
-            snake=[[5, 5], [5, 4], [5, 3]],
-            food=[],
-            obstacles=[]
-        )
-        game_state = add_food(game_state)  # ← Comida aleatoria
-
+    log.debug("🍏 %s procesando tarea: %s", node_id, task)
     action = task.get("action")
+    pos = task.get("position")
+    key = state_key(task.get("game_id"))
+    channel = updates_channel(task.get("game_id"))
+
+    def apply_update(pipe):
+        # WATCH sobre el estado: si un player_node lo modifica entre el GET y el
+        # SET, redis-py reintenta la transacción en lugar de pisar el movimiento.
+        state_json = pipe.get(key)
+        if state_json:
+            if isinstance(state_json, bytes):
+                state_json = state_json.decode("utf-8")
+            game_state = codec.loads(state_json)
+        else:
+            # Cuando no existe el estado, crea snake y comida aleatoria
+            game_state = create_game_state(
+                snake=[[5, 5], [5, 4], [5, 3]],
+                food=[],
+                obstacles=[]
+            )
+            game_state = add_food(game_state)  # ← Comida aleatoria
+
+        if action == "add_food":
+            game_state = add_food(game_state, pos)
+        elif action == "add_obstacle":
+            game_state = add_obstacle(game_state, pos)
+        # Puedes agregar más acciones aquí (remover comida, limpiar obstáculos, etc.)
+
+        state_json = codec.dumps(game_state)
+        pipe.multi()
+        pipe.set(key, state_json)
+        pipe.publish(channel, state_json)
+        return game_state
+
+    game_state = r.transaction(apply_update, key, value_from_callable=True)
     if action == "add_food":
-        pos = task.get("position")
-        game_state = add_food(game_state, pos)
-        print(f"🍎 Comida agregada en {game_state['food']}")
+        log.debug("🍎 Comida agregada en %s", game_state["food"])
     elif action == "add_obstacle":
-        pos = task.get("position")
-        game_state = add_obstacle(game_state, pos)
-        print(f"🪨 Obstáculo agregado en {game_state['obstacles'][-1]}")
-    # Puedes agregar más acciones aquí (remover comida, limpiar obstáculos, etc.)
-
-    r.set(SNAKE_STATE_KEY, json.dumps(game_state))
-    print(f"✅ Estado actualizado por {node_id}")
+        log.debug("🪨 Obstáculo agregado en %s", game_state["obstacles"][-1])
+    log.debug("✅ Estado actualizado por %s", node_id)
 
 def main():
     print(f"🎤 {node_id} iniciado y esperando tareas de escenario...")
-    if not r.exists(SNAKE_STATE_KEY):
+    if not r.exists(state_key()):
         print("🟢 Inicializando estado inicial de Snake en Redis...")
         initial_state = create_game_state(
             snake=[[5, 5], [5, 4], [5, 3]],
@@ -76,15 +120,28 @@ def main():
             obstacles=[]
         )
         initial_state = add_food(initial_state)  # ← Comida aleatoria desde el inicio
-        r.set(SNAKE_STATE_KEY, json.dumps(initial_state))
+        save_state(r, codec.dumps(initial_state))
 
+    tasks.recover()
+    sampler.start()
+    metrics.track_queue(r, tasks)
+    metrics.track_resources(sampler)
+    metrics.start_exporter()
+    HeartbeatTimer(lambda: update_node_status(node_id)).start()
     while True:
-        task = r.blpop(SCENARIO_TASKS_QUEUE, timeout=1)
-        if task:
-            _, data = task
-            process_task(data)
-        update_node_status(node_id)  # <--- NUEVO, se llama en cada ciclo
-        time.sleep(0.05)
+        for source, data in tasks.claim():
+            task_stats["running"] = 1
+            start = time.time()
+            try:
+                process_task(data)
+            except Exception as e:
+                log.error("❌ Error al procesar tarea: %s", e)
+            finally:
+                tasks.ack(source, data)
+                elapsed = time.time() - start
+                avg = task_stats["avg_time"]
+                task_stats["avg_time"] = elapsed if avg == 0 else 0.8 * avg + 0.2 * elapsed
+                task_stats["running"] = 0
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,185 @@
+# utils/broadcaster.py
+#
+# Un único suscriptor async por proceso de API (SnakeHub) que reenvía cada
+# cambio de estado publicado por los nodos a los WebSockets de esa partida.
+# Solo se suscribe a los canales de las partidas que tienen visores.
+#
+# Los sockets "full" reciben el JSON completo como siempre; los sockets
+# "delta" reciben mensajes del protocolo de utils/snake_protocol.py.
+
+import asyncio
+import time
+
+from utils.metrics import WS_DROPPED, WS_FANOUT
+from utils.sharding import normalize_game_id, state_key, updates_channel
+from utils.snake_protocol import DeltaEncoder
+
+
+class DeltaClient:
+    def __init__(self, binary=False):
+        self.binary = binary
+        self.seq = -1  # último seq enviado; -1 obliga a mandar una foto
+
+
+class StateBroadcaster:
+    """Sockets y último estado de una partida."""
+
+    def __init__(self, redis_async, state_key):
+        self.r = redis_async
+        self.state_key = state_key
+        self.clients = set()
+        self.delta_clients = {}
+        self.encoder = DeltaEncoder()
+        self.last_state = None
+
+    def empty(self):
+        return not self.clients and not self.delta_clients
+
+    async def register(self, websocket, protocol="full", binary=False):
+        """Agrega el socket y le envía el último estado conocido."""
+        if self.last_state is None:
+            self.last_state = await self.r.get(self.state_key)
+        if protocol == "delta":
+            self.delta_clients[websocket] = DeltaClient(binary)
+            await self.resync(websocket)
+            return
+        self.clients.add(websocket)
+        if self.last_state:
+            await websocket.send_text(self.last_state)
+
+    def unregister(self, websocket):
+        self.clients.discard(websocket)
+        self.delta_clients.pop(websocket, None)
+
+    async def resync(self, websocket):
+        """Envía una foto completa con el seq actual (al conectar o si el cliente la pide)."""
+        client = self.delta_clients.get(websocket)
+        if client is None:
+            return
+        if self.encoder.frame is None:
+            if not self.last_state:
+                return
+            self.encoder.push(self.last_state)
+        frame = self.encoder.frame
+        await self._send(websocket, frame.encode(snapshot=True, binary=client.binary))
+        client.seq = frame.seq
+
+    async def publish(self, state):
+        """Reenvía el estado a todos los sockets; ignora estados repetidos."""
+        if state == self.last_state:
+            return
+        self.last_state = state
+        sends = [self._send(ws, state) for ws in list(self.clients)]
+        if self.delta_clients:
+            frame = self.encoder.push(state)
+            for ws, client in list(self.delta_clients.items()):
+                # Si el socket no vio el seq anterior, se resincroniza con una foto
+                snapshot = client.seq != frame.seq - 1
+                sends.append(self._send(ws, frame.encode(snapshot=snapshot, binary=client.binary)))
+                client.seq = frame.seq
+        else:
+            # Sin clientes delta no se numera nada; el próximo empieza con foto
+            self.encoder.frame = None
+        if sends:
+            start = time.perf_counter()
+            await asyncio.gather(*sends)
+            WS_FANOUT.observe(time.perf_counter() - start)
+
+    async def _send(self, websocket, data):
+        try:
+            if isinstance(data, bytes):
+                await websocket.send_bytes(data)
+            else:
+                await websocket.send_text(data)
+        except Exception:
+            # El socket se cerró; su handler lo terminará de limpiar
+            WS_DROPPED.inc()
+            self.unregister(websocket)
+
+
+class SnakeHub:
+    """Suscriptor Pub/Sub compartido; crea un StateBroadcaster por partida con visores."""
+
+    def __init__(self, redis_async):
+        self.r = redis_async
+        self.games = {}
+        self.channels = {}  # canal -> game_id
+        self.pubsub = None
+        self._task = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def get(self, game_id):
+        return self.games.get(normalize_game_id(game_id))
+
+    async def register(self, websocket, game_id=None, protocol="full", binary=False):
+        game_id = normalize_game_id(game_id)
+        broadcaster = self.games.get(game_id)
+        if broadcaster is None:
+            broadcaster = StateBroadcaster(self.r, state_key(game_id))
+            self.games[game_id] = broadcaster
+            channel = updates_channel(game_id)
+            self.channels[channel] = game_id
+            await self._subscribe(channel)
+        await broadcaster.register(websocket, protocol, binary)
+        return broadcaster
+
+    async def unregister(self, websocket, game_id=None):
+        game_id = normalize_game_id(game_id)
+        broadcaster = self.games.get(game_id)
+        if broadcaster is None:
+            return
+        broadcaster.unregister(websocket)
+        if broadcaster.empty():
+            del self.games[game_id]
+            channel = updates_channel(game_id)
+            self.channels.pop(channel, None)
+            if self.pubsub is not None:
+                try:
+                    await self.pubsub.unsubscribe(channel)
+                except Exception:
+                    pass  # el listener se reconecta solo con los canales vigentes
+
+    async def _subscribe(self, channel):
+        if self.pubsub is not None:
+            try:
+                await self.pubsub.subscribe(channel)
+            except Exception as e:
+                print(f"⚠️ No se pudo suscribir a {channel}: {e}")
+
+    async def _listen(self):
+        while True:
+            self.pubsub = self.r.pubsub()
+            try:
+                if self.channels:
+                    await self.pubsub.subscribe(*self.channels)
+                while True:
+                    if not self.pubsub.subscribed:
+                        await asyncio.sleep(0.1)
+                        continue
+                    # Timeout corto en lugar de listen(): el pool tiene
+                    # socket_timeout y una lectura bloqueante lo dispararía
+                    message = await self.pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                    if message and message["type"] == "message":
+                        broadcaster = self.games.get(self.channels.get(message["channel"]))
+                        if broadcaster is not None:
+                            await broadcaster.publish(message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️ Suscriptor de partidas desconectado: {e}. Reintentando...")
+                await asyncio.sleep(1)
+            finally:
+                pubsub, self.pubsub = self.pubsub, None
+                await pubsub.close()
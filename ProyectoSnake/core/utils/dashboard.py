@@ -0,0 +1,145 @@
+# utils/dashboard.py
+#
+# Agregador compartido del socket de monitoreo (/ws). Un solo task por proceso
+# de API arma la foto de nodos, tareas y resultados una vez por tick, la
+# serializa una vez y la reenvía ya codificada a todos los dashboards.
+#
+# Los resultados viajan completos solo en el primer mensaje de cada socket
+# ("results"); después cada tick lleva únicamente las líneas nuevas
+# ("results_delta").
+
+import asyncio
+import os
+import time
+
+from utils import codec
+from utils.results_index import ResultsIndex
+
+# Set con los IDs de nodos vivos o recientes; lo mantienen los heartbeats
+NODE_INDEX_KEY = "nodes:index"
+
+
+class DashboardAggregator:
+    def __init__(self, redis_async, results_path="finalizadas.txt", interval=None):
+        self.r = redis_async
+        self.results = ResultsIndex(results_path)
+        self.interval = interval or float(os.getenv("DASHBOARD_INTERVAL", 2))
+        self.clients = set()   # ya recibieron el historial completo
+        self.pending = set()   # esperan su primer mensaje completo
+        self.base = None
+        self.updated_at = 0.0
+        self._lock = asyncio.Lock()
+        self._task = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def register(self, websocket):
+        """Agrega el dashboard; recibe el historial completo en su primer mensaje."""
+        async with self._lock:
+            self.pending.add(websocket)
+            if self.base is None or time.time() - self.updated_at > self.interval:
+                await self._tick()
+            else:
+                await self._send_all(self.pending, self.full_payload())
+                self.clients |= self.pending
+                self.pending.clear()
+
+    def unregister(self, websocket):
+        self.clients.discard(websocket)
+        self.pending.discard(websocket)
+
+    async def bootstrap_index(self):
+        """Llena el índice con un único SCAN al arrancar (nodos de versiones previas)."""
+        node_ids = [key.split(":")[1] async for key in self.r.scan_iter("node_stats:*")]
+        if node_ids:
+            await self.r.sadd(NODE_INDEX_KEY, *node_ids)
+
+    async def snapshot(self):
+        """Arma la foto con un SMEMBERS y un solo pipeline, sin KEYS ni HGETALL repetidos."""
+        node_ids = sorted(await self.r.smembers(NODE_INDEX_KEY))
+        pipe = self.r.pipeline(transaction=False)
+        for node in node_ids:
+            pipe.hgetall(f"node_stats:{node}")
+            pipe.lrange(f"task_queue:{node}", 0, -1)
+        replies = await pipe.execute() if node_ids else []
+
+        nodes = {}
+        tasks = {}
+        stale = []
+        for node, stats, queued in zip(node_ids, replies[::2], replies[1::2]):
+            if not stats:
+                stale.append(node)
+                continue
+            nodes[node] = stats
+            # Tareas en cola más las activas embebidas (current_task:*)
+            node_tasks = list(queued) + [stats[k] for k in stats if k.startswith("current_task:")]
+            if node_tasks:
+                tasks[node] = node_tasks
+        if stale:
+            await self.r.srem(NODE_INDEX_KEY, *stale)
+
+        return {"nodes": nodes, "tasks": tasks}
+
+    def full_payload(self):
+        data = dict(self.base, results=self.results.by_node)
+        return codec.dumps(data)
+
+    async def _tick(self):
+        self.base = await self.snapshot()
+        delta, reset = await asyncio.to_thread(self.results.poll)
+        self.updated_at = time.time()
+        if reset:
+            # El archivo cambió por completo: todos vuelven a recibir el historial
+            self.pending |= self.clients
+            self.clients.clear()
+        if self.clients:
+            data = dict(self.base, results_delta=delta)
+            payload = codec.dumps(data)
+            await self._send_all(self.clients, payload)
+        if self.pending:
+            await self._send_all(self.pending, self.full_payload())
+            self.clients |= self.pending
+            self.pending.clear()
+
+    async def _send_all(self, sockets, payload):
+        await asyncio.gather(*(self._send(ws, payload) for ws in list(sockets)))
+
+    async def _send(self, websocket, payload):
+        try:
+            await websocket.send_text(payload)
+        except Exception:
+            self.clients.discard(websocket)
+            self.pending.discard(websocket)
+
+    async def _run(self):
+        try:
+            await self.bootstrap_index()
+        except Exception as e:
+            print(f"⚠️ No se pudo inicializar el índice de nodos: {e}")
+        async with self._lock:
+            await asyncio.to_thread(self.results.bootstrap)
+        while True:
+            try:
+                if self.clients or self.pending:
+                    async with self._lock:
+                        await self._tick()
+                else:
+                    # Sin dashboards solo se sigue el archivo para no acumular lectura
+                    async with self._lock:
+                        await asyncio.to_thread(self.results.poll)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️ Error al agregar el dashboard: {e}")
+            await asyncio.sleep(self.interval)
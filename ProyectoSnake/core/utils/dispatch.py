@@ -0,0 +1,160 @@
+# core/utils/dispatch.py
+#
+# Reparto según carga. El main node mantiene en memoria una vista de los nodos
+# vivos (NodeView) armada con los heartbeats de node_stats:{id} y elige para
+# cada tarea un nodo con una política intercambiable; la tarea va a la cola
+# propia del nodo, task_queue:{id}.
+#
+# Los nodos vivos salen del sorted set nodes:last_seen (ver utils/heartbeat.py):
+# un ZRANGEBYSCORE trae los IDs y su último heartbeat, y los nodos con
+# heartbeat vencido ni siquiera se leen. Entre dos refrescos la
+# vista suma las tareas que el propio main ya asignó, para no mandar una
+# ráfaga entera al mismo nodo.
+
+import os
+import random
+import time
+
+from utils.heartbeat import LAST_SEEN_KEY
+
+NODE_TIMEOUT = 5
+VIEW_REFRESH = float(os.getenv("DISPATCH_REFRESH", "1"))
+
+
+def node_queue(node_id):
+    return f"task_queue:{node_id}"
+
+
+def _number(stats, field, default):
+    try:
+        return float(stats.get(field, default))
+    except (TypeError, ValueError):
+        return default
+
+
+class NodeInfo:
+    """Lo que el dispatcher sabe de un nodo según su último heartbeat."""
+
+    def __init__(self, node_id, stats, queued=0):
+        self.node_id = node_id
+        self.role = stats.get("role", "")
+        self.status = stats.get("status", "available")
+        self.cpu = _number(stats, "cpu", 100.0)
+        self.ram = _number(stats, "ram", 100.0)
+        self.tasks = int(_number(stats, "tasks", 0))
+        self.max_tasks = max(1, int(_number(stats, "max_tasks", 1)))
+        self.avg_time = _number(stats, "avg_time", 0.0)
+        self.last_heartbeat = _number(stats, "last_heartbeat", 0.0)
+        self.queued = queued   # largo de task_queue:{id} al refrescar
+        self.assigned = 0      # tareas enviadas por este main desde el último refresco
+
+    def pending(self):
+        return self.tasks + self.queued + self.assigned
+
+    def load(self):
+        """Trabajo pendiente por lugar de ejecución."""
+        return self.pending() / self.max_tasks
+
+    def expected_wait(self, default_time):
+        """Tiempo estimado hasta terminar una tarea nueva, según avg_time."""
+        avg_time = self.avg_time or default_time
+        return (self.pending() + 1) * avg_time / self.max_tasks
+
+
+# --- Políticas: reciben la lista de candidatos vivos y retornan uno ---
+
+def random_node(nodes, rng=random):
+    """Sin mirar la carga; sirve de línea base."""
+    return rng.choice(nodes)
+
+
+def least_loaded(nodes, rng=random):
+    best = min(node.load() for node in nodes)
+    return rng.choice([node for node in nodes if node.load() == best])
+
+
+def power_of_two(nodes, rng=random):
+    """Dos candidatos al azar y el menos cargado: casi tan bueno como least_loaded
+    y no manda la misma ráfaga al único nodo que parece libre con datos viejos."""
+    if len(nodes) == 1:
+        return nodes[0]
+    a, b = rng.sample(nodes, 2)
+    return a if a.load() <= b.load() else b
+
+
+def weighted_avg_time(nodes, rng=random):
+    """Menor espera estimada: cola pendiente ponderada por el avg_time del nodo."""
+    known = [node.avg_time for node in nodes if node.avg_time > 0]
+    default_time = sum(known) / len(known) if known else 1.0
+    best = min(node.expected_wait(default_time) for node in nodes)
+    return rng.choice([node for node in nodes if node.expected_wait(default_time) == best])
+
+
+POLICIES = {
+    "random": random_node,
+    "least_loaded": least_loaded,
+    "power_of_two": power_of_two,
+    "weighted": weighted_avg_time,
+}
+
+
+class NodeView:
+    """Vista en memoria de los nodos vivos, refrescada desde Redis cada `refresh_every` segundos."""
+
+    def __init__(self, timeout=NODE_TIMEOUT, refresh_every=VIEW_REFRESH):
+        self.timeout = timeout
+        self.refresh_every = refresh_every
+        self.nodes = {}
+        self._refreshed_at = 0.0
+
+    def update(self, node_id, stats, queued=0):
+        self.nodes[node_id] = NodeInfo(node_id, stats, queued)
+
+    def refresh(self, r, force=False):
+        if not force and time.time() - self._refreshed_at < self.refresh_every:
+            return
+        now = time.time()
+        seen = r.zrangebyscore(LAST_SEEN_KEY, now - self.timeout, "+inf", withscores=True)
+        node_ids = [node_id for node_id, _ in seen]
+        pipe = r.pipeline(transaction=False)
+        for node_id in node_ids:
+            pipe.hgetall(f"node_stats:{node_id}")
+            pipe.llen(node_queue(node_id))
+        replies = pipe.execute() if node_ids else []
+        nodes = {}
+        for i, (node_id, seen_at) in enumerate(seen):
+            stats, queued = replies[2 * i], replies[2 * i + 1]
+            if stats:
+                nodes[node_id] = NodeInfo(node_id, dict(stats, last_heartbeat=seen_at), queued)
+        self.nodes = nodes
+        self._refreshed_at = time.time()
+
+    def live(self, role=None, now=None):
+        now = time.time() if now is None else now
+        return [
+            node for node in self.nodes.values()
+            if now - node.last_heartbeat <= self.timeout
+            and node.status != "overloaded"
+            and (role is None or node.role == role)
+        ]
+
+
+class Dispatcher:
+    """Elige el nodo de cada tarea con la política configurada."""
+
+    def __init__(self, view=None, policy="least_loaded", rng=None):
+        if policy not in POLICIES:
+            raise ValueError(f"Política de reparto desconocida: {policy} (opciones: {', '.join(POLICIES)})")
+        self.view = view or NodeView()
+        self.policy_name = policy
+        self.policy = POLICIES[policy]
+        self.rng = rng or random.Random()
+
+    def pick(self, role=None, now=None):
+        """Retorna el NodeInfo elegido o None si no hay nodos vivos con ese rol."""
+        nodes = self.view.live(role, now)
+        if not nodes:
+            return None
+        node = self.policy(nodes, self.rng)
+        node.assigned += 1
+        return node
@@ -0,0 +1,135 @@
+# utils/heartbeat.py
+#
+# Heartbeat en su propio hilo. Los workers ya no reportan su estado en cada
+# vuelta del loop (lo que ataba la frecuencia del heartbeat a la de las tareas
+# y agregaba un round trip por tarea); lo hace este temporizador cada
+# HEARTBEAT_INTERVAL segundos.
+#
+# HeartbeatPublisher arma el heartbeat en sí: escribe en node_stats:{id} solo
+# los campos que cambiaron desde el último envío (todos cada
+# HEARTBEAT_FULL_EVERY envíos, por si el hash se perdió), renueva una clave de
+# presencia con TTL (node_alive:{id}) y actualiza el sorted set
+# nodes:last_seen. Un nodo muerto no necesita que nadie lo marque: su clave
+# de presencia vence sola y quienes listan nodos leen un único ZRANGE en
+# lugar de un HGETALL por nodo. Todo el heartbeat es un solo script Lua, así
+# que cuesta un comando por nodo y por intervalo.
+
+import os
+import threading
+import time
+
+from utils.dashboard import NODE_INDEX_KEY
+
+HEARTBEAT_INTERVAL = float(os.getenv("HEARTBEAT_INTERVAL", "1"))
+# Sin heartbeat durante HEARTBEAT_TTL segundos el nodo se considera muerto
+HEARTBEAT_TTL = float(os.getenv("HEARTBEAT_TTL", "5"))
+HEARTBEAT_FULL_EVERY = int(os.getenv("HEARTBEAT_FULL_EVERY", "30"))
+# Nodos sin heartbeat hace más de esto salen de nodes:last_seen
+LAST_SEEN_RETENTION = 3600
+
+LAST_SEEN_KEY = "nodes:last_seen"
+
+# KEYS = node_stats, presencia, nodes:last_seen, índice de nodos
+# ARGV[1] = ahora, ARGV[2] = TTL en ms, ARGV[3] = nodo, ARGV[4] = 1 si es completo,
+# ARGV[5] = corte de retención, luego pares campo/valor que cambiaron
+HEARTBEAT_LUA = """
+if #ARGV > 5 then
+  redis.call('HSET', KEYS[1], unpack(ARGV, 6))
+end
+redis.call('SET', KEYS[2], ARGV[1], 'PX', ARGV[2])
+redis.call('ZADD', KEYS[3], ARGV[1], ARGV[3])
+if ARGV[4] == '1' then
+  redis.call('SADD', KEYS[4], ARGV[3])
+  redis.call('ZREMRANGEBYSCORE', KEYS[3], '-inf', ARGV[5])
+end
+return 1
+"""
+
+
+def presence_key(node_id):
+    return f"node_alive:{node_id}"
+
+
+class HeartbeatTimer:
+    """Llama a `report()` al arrancar y luego cada `interval` segundos."""
+
+    def __init__(self, report, interval=HEARTBEAT_INTERVAL):
+        self.report = report
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="heartbeat", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 1)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.report()
+            except Exception as e:
+                print(f"⚠️ Error enviando heartbeat: {e}")
+            self._stop.wait(self.interval)
+
+
+class HeartbeatPublisher:
+    """Heartbeat de un nodo con envío de diferencias y presencia por TTL."""
+
+    def __init__(self, r, node_id, ttl=HEARTBEAT_TTL, full_every=HEARTBEAT_FULL_EVERY, precision=1):
+        self.r = r
+        self.node_id = node_id
+        self.ttl = ttl
+        self.full_every = max(1, full_every)
+        self.precision = precision
+        self.sent = {}
+        self.beats = 0
+        self._script = r.register_script(HEARTBEAT_LUA)
+
+    def _normalize(self, stats):
+        # Los floats se redondean para que el ruido de la última cifra no cuente como cambio
+        return {
+            field: round(value, self.precision) if isinstance(value, float) else value
+            for field, value in stats.items()
+        }
+
+    def send(self, stats, client=None, now=None):
+        """
+        Agrega el heartbeat a `client` (el pipeline del nodo) o lo envía solo.
+        Retorna los campos escritos.
+        """
+        now = time.time() if now is None else now
+        stats = self._normalize(stats)
+        full = self.beats % self.full_every == 0
+        changed = stats if full else {k: v for k, v in stats.items() if self.sent.get(k) != v}
+        keys = [f"node_stats:{self.node_id}", presence_key(self.node_id), LAST_SEEN_KEY, NODE_INDEX_KEY]
+        args = [now, int(self.ttl * 1000), self.node_id, int(full), now - LAST_SEEN_RETENTION]
+        for field, value in changed.items():
+            args += [field, value]
+        self._script(keys=keys, args=args, client=client)
+        self.sent.update(changed)
+        self.beats += 1
+        return changed
+
+
+def last_seen(r, since=None):
+    """{nodo: último heartbeat} con un solo ZRANGE (opcionalmente solo desde `since`)."""
+    low = "-inf" if since is None else since
+    return dict(r.zrangebyscore(LAST_SEEN_KEY, low, "+inf", withscores=True))
+
+
+def live_nodes(r, timeout=HEARTBEAT_TTL, now=None):
+    now = time.time() if now is None else now
+    return last_seen(r, now - timeout)
+
+
+def is_alive(r, node_id):
+    """Vive mientras su clave de presencia no haya vencido."""
+    return bool(r.exists(presence_key(node_id)))
@@ -0,0 +1,118 @@
+# utils/lanes.py
+#
+# Carriles de prioridad para las colas de tareas. Una cola lógica
+# (global:unassigned_tasks, player_tasks:{id}...) se reparte en una lista por
+# carril según el tipo de tarea:
+#
+#   control   reset_game
+#   scenario  scenario_update (comida, obstáculos)
+#   moves     snake_move
+#   batch     transcripciones
+#
+# El consumidor (lane_queue) lee los carriles con round robin ponderado
+# (LANE_WEIGHTS): control recibe más lugares por lote que batch, pero ningún
+# carril con tareas se queda sin turno, y los lugares que un carril vacío no
+# usa pasan a los demás. Una ráfaga de movimientos ya no deja esperando a un
+# reset_game ni a la comida detrás de ella.
+#
+# BLMOVE espera sobre una sola lista, así que cada push también toca el
+# timbre de la cola ({cola}:doorbell); el consumidor ocioso espera ahí con
+# BLPOP y despierta con la primera tarea de cualquier carril.
+#
+# Cada carril es FIFO: aquí se encola con LPUSH y ReliableQueue toma por la
+# derecha (ver utils/queues.py), así los movimientos de una partida se
+# aplican en el orden en que llegaron.
+
+import os
+
+from utils.codec import peek_field
+from utils.queues import ReliableQueue
+
+LANES = ("control", "scenario", "moves", "batch")
+TASK_LANES = {
+    "reset_game": "control",
+    "scenario_update": "scenario",
+    "snake_move": "moves",
+    "transcribe": "batch",
+    "transcribe_chunk": "batch",
+}
+DEFAULT_LANE = "batch"
+# Marcas que puede acumular un timbre; alcanza con una por consumidor ocioso
+DOORBELL_MAX = 16
+
+
+def parse_weights(spec):
+    """"control=8,scenario=4" -> {"control": 8, "scenario": 4}"""
+    weights = {}
+    for part in spec.split(","):
+        lane, _, weight = part.partition("=")
+        if lane.strip():
+            weights[lane.strip()] = max(1, int(weight or 1))
+    return weights
+
+
+LANE_WEIGHTS = parse_weights(os.getenv("LANE_WEIGHTS", "control=8,scenario=4,moves=2,batch=1"))
+
+
+def lane_for(task_type):
+    return TASK_LANES.get(task_type, DEFAULT_LANE)
+
+
+def lane_key(queue, lane):
+    return f"{queue}:lane:{lane}"
+
+
+def doorbell_key(queue):
+    return f"{queue}:doorbell"
+
+
+def ring(client, queue):
+    client.lpush(doorbell_key(queue), 1)
+    client.ltrim(doorbell_key(queue), 0, DOORBELL_MAX - 1)
+
+
+def push(client, queue, raw, task_type=None):
+    """
+    Encola la tarea ya serializada en el carril de su tipo y toca el timbre.
+    `client` es un pipeline (sync o async); el tipo se lee de la tarea si no
+    se pasa. Retorna el carril.
+    """
+    lane = lane_for(task_type or peek_field(raw, "type"))
+    client.lpush(lane_key(queue, lane), raw)
+    ring(client, queue)
+    return lane
+
+
+def push_many(client, queue, items):
+    """
+    Encola un lote [(tarea serializada, tipo), ...]: un LPUSH con varios
+    valores por carril y un solo toque de timbre.
+    """
+    by_lane = {}
+    for raw, task_type in items:
+        by_lane.setdefault(lane_for(task_type or peek_field(raw, "type")), []).append(raw)
+    for lane, raws in by_lane.items():
+        client.lpush(lane_key(queue, lane), *raws)
+    if by_lane:
+        ring(client, queue)
+    return by_lane
+
+
+def lane_queue(r, queues, node_id, lanes=LANES, weights=None, extra=None, **kwargs):
+    """
+    ReliableQueue sobre los carriles de `queues` (una o varias colas lógicas).
+    Orden de prioridad: carril por carril y, dentro de cada uno, cola por
+    cola; al final las colas sin carril (tareas de versiones anteriores) y
+    `extra` ({cola: carril}, por ejemplo un sorted set de transcripciones).
+    """
+    queues = [queues] if isinstance(queues, str) else list(queues)
+    weights = weights or LANE_WEIGHTS
+    sources = {lane_key(queue, lane): lane for lane in lanes for queue in queues}
+    sources.update({queue: DEFAULT_LANE for queue in queues})
+    sources.update(extra or {})
+    return ReliableQueue(
+        r, list(sources), node_id,
+        weights={source: weights.get(lane, 1) for source, lane in sources.items()},
+        doorbells=[doorbell_key(queue) for queue in queues],
+        **kwargs,
+    )
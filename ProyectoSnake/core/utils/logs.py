@@ -0,0 +1,64 @@
+# utils/logs.py
+#
+# Logging con niveles para los caminos calientes (una línea por tarea, por
+# tick o por error repetido), en lugar de print. El nivel sale de LOG_LEVEL
+# (INFO por defecto: el detalle por tarea queda en DEBUG). Cada mensaje,
+# identificado por su plantilla, sale a lo sumo LOG_RATE veces por segundo
+# con ráfagas de LOG_BURST; los que se omiten se cuentan y se informan en el
+# siguiente que sale, así un error en bucle no inunda la consola.
+#
+#   log = get_logger("player_node")
+#   log.debug("🐍 %s procesando tarea: %s", node_id, task)
+
+import logging
+import os
+import sys
+import threading
+import time
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_RATE = float(os.getenv("LOG_RATE", "5"))
+LOG_BURST = float(os.getenv("LOG_BURST", "20"))
+LOG_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+
+
+class RateLimitFilter(logging.Filter):
+    """Token bucket por (logger, plantilla del mensaje)."""
+
+    def __init__(self, rate=LOG_RATE, burst=LOG_BURST):
+        super().__init__()
+        self.rate = rate
+        self.burst = burst
+        self._buckets = {}  # clave -> [tokens, última vez, omitidos]
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        key = (record.name, record.msg)
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.setdefault(key, [self.burst, now, 0])
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+            if bucket[0] < 1:
+                bucket[2] += 1
+                return False
+            bucket[0] -= 1
+            skipped, bucket[2] = bucket[2], 0
+        if skipped:
+            record.msg = f"{record.msg} (+{skipped} similares omitidos)"
+        return True
+
+
+_handler = logging.StreamHandler(sys.stdout)
+_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+_handler.addFilter(RateLimitFilter())
+
+
+def get_logger(name):
+    """Logger con el nivel de LOG_LEVEL que escribe en stdout a través del filtro."""
+    logger = logging.getLogger(name)
+    if _handler not in logger.handlers:
+        logger.addHandler(_handler)
+        logger.setLevel(LOG_LEVEL)
+        logger.propagate = False
+    return logger
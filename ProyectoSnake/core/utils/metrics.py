@@ -0,0 +1,323 @@
+# utils/metrics.py
+#
+# Métricas del proceso (contadores, gauges e histogramas) en memoria y su
+# exposición en el formato de texto de Prometheus/OpenMetrics, sin
+# dependencias. La API las sirve en GET /metrics y cada nodo levanta con
+# start_exporter() un servidor HTTP mínimo en METRICS_PORT (0 lo desactiva).
+#
+# Registrar un valor es tomar un lock y sumar; lo costoso (LLEN de las colas,
+# armar el texto) se hace solo cuando alguien lee /metrics. Los valores que
+# hay que ir a buscar se actualizan con collectors que corren antes de
+# exponer (ver track_queue y track_resources).
+#
+#   TASKS.labels("snake_move", "ok").inc()
+#   with TASK_SERVICE.labels("snake_move").time():
+#       ...
+#   print(REGISTRY.expose())
+
+import bisect
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9400"))
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+# Segundos, de medio milisegundo (un round trip a Redis) a 30 s (transcripciones)
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+# Campos con la hora (epoch) en que se creó la tarea, en orden de preferencia
+ENQUEUED_FIELDS = ("enqueued_at", "ingested", "timestamp")
+
+
+def _format(value):
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in (*zip(names, values), *extra)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Registry:
+    """Métricas de un proceso y funciones que las actualizan antes de exponerlas."""
+
+    def __init__(self):
+        self.metrics = {}
+        self.collectors = []
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            if metric.name in self.metrics:
+                raise ValueError(f"Métrica repetida: {metric.name}")
+            self.metrics[metric.name] = metric
+        return metric
+
+    def add_collector(self, collector):
+        self.collectors.append(collector)
+
+    def expose(self):
+        """Texto para /metrics; un collector que falla no impide exponer el resto."""
+        for collector in list(self.collectors):
+            try:
+                collector()
+            except Exception as e:
+                print(f"⚠️ Error actualizando métricas: {e}")
+        lines = []
+        for metric in list(self.metrics.values()):
+            lines.extend(metric.expose())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name, documentation, labels=(), registry=REGISTRY):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labels)
+        self._children = {}
+        self._lock = threading.Lock()
+        if registry is not None:
+            registry.register(self)
+
+    def labels(self, *values):
+        """Serie con esos valores de labels (se crea la primera vez)."""
+        child = self._children.get(values)
+        if child is None:
+            # Camino lento la primera vez (o si algún valor no es str)
+            key = tuple(str(value) for value in values)
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} espera los labels {self.labelnames}")
+            with self._lock:
+                child = self._children.setdefault(key, self._child())
+        return child
+
+    def expose(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for key, child in sorted(self._children.items()):
+            lines.extend(child.expose(self.name, self.labelnames, key))
+        return lines
+
+
+class _Value:
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+    def expose(self, name, labelnames, key):
+        return [f"{name}{_labels(labelnames, key)} {_format(self.value)}"]
+
+
+class _GaugeValue(_Value):
+    def dec(self, amount=1):
+        self.inc(-amount)
+
+    def set(self, value):
+        self.value = float(value)
+
+
+class _HistogramValue:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    @contextmanager
+    def time(self):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+    def expose(self, name, labelnames, key):
+        with self._lock:
+            counts, total = list(self.counts), self.sum
+        lines, cumulative = [], 0
+        for bound, count in zip((*self.buckets, math.inf), counts):
+            cumulative += count
+            lines.append(f"{name}_bucket{_labels(labelnames, key, [('le', _format(bound))])} {cumulative}")
+        lines.append(f"{name}_sum{_labels(labelnames, key)} {_format(total)}")
+        lines.append(f"{name}_count{_labels(labelnames, key)} {cumulative}")
+        return lines
+
+
+class Counter(_Metric):
+    """Valor que solo sube; por convención el nombre termina en _total."""
+
+    kind = "counter"
+
+    def _child(self):
+        return _Value()
+
+    def inc(self, amount=1):
+        self.labels().inc(amount)
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def _child(self):
+        return _GaugeValue()
+
+    def set(self, value):
+        self.labels().set(value)
+
+    def inc(self, amount=1):
+        self.labels().inc(amount)
+
+    def dec(self, amount=1):
+        self.labels().dec(amount)
+
+
+class Histogram(_Metric):
+    """Conteos acumulados por bucket (le), suma y cantidad de observaciones."""
+
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS, registry=REGISTRY):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labels, registry)
+
+    def _child(self):
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value):
+        self.labels().observe(value)
+
+    def time(self):
+        return self.labels().time()
+
+
+# Métricas comunes a la API, el dispatcher y los nodos. Cada proceso expone
+# las suyas; Prometheus distingue de quién son por el target (instance).
+QUEUE_DEPTH = Gauge("queue_depth", "Tareas esperando en cada lista o sorted set", ["queue"])
+TASKS = Counter("tasks_total", "Tareas atendidas por tipo y resultado", ["type", "outcome"])
+TASK_WAIT = Histogram("task_wait_seconds", "Tiempo desde que se creó la tarea hasta que un nodo la toma", ["type"])
+TASK_SERVICE = Histogram("task_service_seconds", "Tiempo de proceso de una tarea", ["type"])
+REDIS_LATENCY = Histogram("redis_roundtrip_seconds", "Round trip a Redis por operación", ["op"])
+WS_FANOUT = Histogram("ws_fanout_seconds", "Tiempo en enviar un estado a todos los sockets de una partida")
+WS_DROPPED = Counter("ws_dropped_frames_total", "Frames que no se pudieron enviar a un socket")
+NODE_RESOURCES = Gauge("node_resource_percent", "CPU, RAM y disco del nodo (suavizados)", ["resource"])
+
+
+def observe_wait(task_type, task, now=None):
+    """Espera en cola de la tarea (si trae la hora en que se creó)."""
+    for field in ENQUEUED_FIELDS:
+        created = task.get(field)
+        if isinstance(created, (int, float)):
+            now = time.time() if now is None else now
+            TASK_WAIT.labels(task_type).observe(max(0.0, now - created))
+            return
+
+
+@contextmanager
+def task_timer(task_type):
+    """Mide el proceso de una tarea y la cuenta como ok o error según cómo termina."""
+    start = time.perf_counter()
+    outcome = "error"
+    try:
+        yield
+        outcome = "ok"
+    finally:
+        TASK_SERVICE.labels(task_type).observe(time.perf_counter() - start)
+        TASKS.labels(task_type, outcome).inc()
+
+
+def redis_timer(op):
+    """with redis_timer("heartbeat"): pipe.execute()"""
+    return REDIS_LATENCY.labels(op).time()
+
+
+def _depth_pipeline(pipe, keys, sorted_sets):
+    for key in keys:
+        if key in sorted_sets:
+            pipe.zcard(key)
+        else:
+            pipe.llen(key)
+
+
+def record_queue_depth(r, keys, sorted_sets=()):
+    pipe = r.pipeline(transaction=False)
+    _depth_pipeline(pipe, keys, sorted_sets)
+    for key, depth in zip(keys, pipe.execute()):
+        QUEUE_DEPTH.labels(key).set(depth)
+
+
+async def record_queue_depth_async(r, keys, sorted_sets=()):
+    pipe = r.pipeline(transaction=False)
+    _depth_pipeline(pipe, keys, sorted_sets)
+    for key, depth in zip(keys, await pipe.execute()):
+        QUEUE_DEPTH.labels(key).set(depth)
+
+
+def track_queue(r, queue, registry=REGISTRY):
+    """Profundidad de las colas de un ReliableQueue, leída en cada scrape."""
+    registry.add_collector(lambda: record_queue_depth(r, queue.sources, queue.priority))
+
+
+def track_resources(sampler, registry=REGISTRY):
+    """CPU/RAM/disco del ResourceSampler del nodo (ver utils/resources.py)."""
+    def collect():
+        snapshot = sampler.snapshot()
+        for resource in ("cpu", "ram", "disk"):
+            NODE_RESOURCES.labels(resource).set(snapshot[resource])
+    registry.add_collector(collect)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = self.server.registry.expose().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # sin una línea por scrape
+
+
+def start_exporter(port=METRICS_PORT, registry=REGISTRY, host="0.0.0.0"):
+    """
+    GET /metrics en un hilo daemon del nodo. Si el puerto está ocupado (varios
+    nodos en la misma máquina) el nodo sigue sin exporter. Retorna el server.
+    """
+    if not port:
+        return None
+    try:
+        server = ThreadingHTTPServer((host, port), _Handler)
+    except OSError as e:
+        print(f"⚠️ No se pudo abrir /metrics en el puerto {port}: {e}")
+        return None
+    server.daemon_threads = True
+    server.registry = registry
+    threading.Thread(target=server.serve_forever, daemon=True, name="metrics-exporter").start()
+    print(f"📈 Métricas en http://{host}:{server.server_address[1]}/metrics")
+    return server
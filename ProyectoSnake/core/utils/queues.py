@@ -0,0 +1,383 @@
+# utils/queues.py
+#
+# Lectura de colas por lotes. En lugar de un BRPOP (y una pausa fija) por
+# tarea, el worker bloquea solo hasta que llega la primera y se lleva el resto
+# de lo que haya encolado con RPOP key count, hasta `count` tareas por vuelta.
+# Las colas se leen en el orden dado, igual que BRPOP con varias claves.
+#
+# Los productores encolan con LPUSH y los consumidores toman por la derecha,
+# así cada cola es FIFO: los movimientos de una partida se aplican en el orden
+# en que llegaron. Lo que vuelve sin procesar (release, reaper) entra por la
+# derecha, a la cabeza de la cola.
+#
+# ReliableQueue agrega entrega confiable: cada tarea se mueve (BLMOVE/LMOVE)
+# de la cola a una lista "en proceso" propia del nodo y queda ahí hasta que el
+# worker la confirma con ack(). Si el nodo muere, el reaper la devuelve a su
+# cola cuando vence su visibility timeout. La entrega es "al menos una vez":
+# una tarea puede procesarse dos veces si el nodo cae después de aplicarla y
+# antes del ack.
+#
+# Una cola también puede ser un sorted set (cola con prioridad, menor score
+# primero): se toma con ZPOPMIN y el score queda guardado junto a la lista en
+# proceso para que el reaper o release() la devuelvan con la misma prioridad.
+#
+# Con `weights` las colas no se leen en orden estricto: cada lote se reparte
+# entre ellas con round robin ponderado (ver utils/lanes.py) y los lugares que
+# una cola vacía no usa pasan a las siguientes. Con `doorbells` el consumidor
+# ocioso espera con BLPOP en esas listas, que los productores tocan en cada
+# push, en lugar de bloquearse solo en la primera cola.
+
+import os
+import time
+
+QUEUE_BATCH_SIZE = int(os.getenv("QUEUE_BATCH_SIZE", "100"))
+# Segundos que una tarea puede estar en proceso sin ack antes de reentregarse
+VISIBILITY_TIMEOUT = float(os.getenv("QUEUE_VISIBILITY_TIMEOUT", "30"))
+REAP_INTERVAL = float(os.getenv("QUEUE_REAP_INTERVAL", "5"))
+
+# Hash lista "en proceso" -> cola de origen; el reaper recorre sus claves
+PROCESSING_SOURCES_KEY = "queues:processing_sources"
+# Lock para que un solo nodo por intervalo recorra las listas vencidas
+REAPER_LOCK_KEY = "queues:reaper_lock"
+
+# Mueve hasta ARGV[1] tareas de la cola a la lista en proceso y les pone plazo.
+# KEYS[1] = cola, KEYS[2] = lista en proceso, KEYS[3] = zset de plazos,
+# KEYS[4] = PROCESSING_SOURCES_KEY
+# ARGV[2] = plazo (epoch), ARGV[3] = tarea ya movida por BLMOVE (opcional)
+CLAIM_LUA = """
+local items = {}
+if ARGV[3] then
+  table.insert(items, ARGV[3])
+end
+for i = 1, tonumber(ARGV[1]) do
+  local item = redis.call('LMOVE', KEYS[1], KEYS[2], 'RIGHT', 'LEFT')
+  if not item then
+    break
+  end
+  table.insert(items, item)
+end
+for _, item in ipairs(items) do
+  redis.call('ZADD', KEYS[3], ARGV[2], item)
+end
+if #items > 0 then
+  redis.call('HSET', KEYS[4], KEYS[2], KEYS[1])
+end
+return items
+"""
+
+# Igual que CLAIM_LUA para una cola con prioridad (sorted set).
+# KEYS[5] = hash tarea -> score original
+CLAIM_PRIORITY_LUA = """
+local popped = redis.call('ZPOPMIN', KEYS[1], tonumber(ARGV[1]))
+local items = {}
+for i = 1, #popped, 2 do
+  local item = popped[i]
+  redis.call('RPUSH', KEYS[2], item)
+  redis.call('ZADD', KEYS[3], ARGV[2], item)
+  redis.call('HSET', KEYS[5], item, popped[i + 1])
+  table.insert(items, item)
+end
+if #items > 0 then
+  redis.call('HSET', KEYS[4], KEYS[2], KEYS[1])
+end
+return items
+"""
+
+# Confirma una tarea. El plazo se borra solo si no quedan copias idénticas.
+# KEYS[1] = lista en proceso, KEYS[2] = zset de plazos, KEYS[3] = hash de scores
+# ARGV[1] = tarea
+ACK_LUA = """
+local removed = redis.call('LREM', KEYS[1], 1, ARGV[1])
+if not redis.call('LPOS', KEYS[1], ARGV[1]) then
+  redis.call('ZREM', KEYS[2], ARGV[1])
+  redis.call('HDEL', KEYS[3], ARGV[1])
+end
+return removed
+"""
+
+# Devuelve una tarea sin procesar a la cabeza de su cola (o con su score si la
+# cola tiene prioridad). Mismas claves que ACK_LUA y KEYS[4] = cola.
+RELEASE_LUA = """
+local removed = redis.call('LREM', KEYS[1], 1, ARGV[1])
+if removed == 0 then
+  return 0
+end
+local score = redis.call('HGET', KEYS[3], ARGV[1])
+if score then
+  redis.call('ZADD', KEYS[4], score, ARGV[1])
+else
+  redis.call('RPUSH', KEYS[4], ARGV[1])
+end
+if not redis.call('LPOS', KEYS[1], ARGV[1]) then
+  redis.call('ZREM', KEYS[2], ARGV[1])
+  redis.call('HDEL', KEYS[3], ARGV[1])
+end
+return removed
+"""
+
+# Devuelve a la cola las tareas vencidas (o todas si ARGV[3] == '1').
+# KEYS[1] = lista en proceso, KEYS[2] = zset de plazos, KEYS[3] = cola,
+# KEYS[4] = hash de scores (las tareas con score vuelven al sorted set)
+# ARGV[1] = ahora, ARGV[2] = visibility timeout
+# Las tareas sin plazo (el nodo cayó entre BLMOVE y el ZADD) reciben uno.
+# La lista en proceso tiene primero lo último que se tomó: recorrerla en orden
+# y devolver con RPUSH deja las tareas en la cabeza de la cola en su orden
+# original.
+REAP_LUA = """
+local expired = {}
+if ARGV[3] ~= '1' then
+  for _, item in ipairs(redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', ARGV[1])) do
+    expired[item] = true
+  end
+end
+local moved = 0
+for _, item in ipairs(redis.call('LRANGE', KEYS[1], 0, -1)) do
+  if ARGV[3] == '1' or expired[item] then
+    local n = redis.call('LREM', KEYS[1], 0, item)
+    local score = redis.call('HGET', KEYS[4], item)
+    if score and n > 0 then
+      redis.call('ZADD', KEYS[3], score, item)
+    else
+      for i = 1, n do
+        redis.call('RPUSH', KEYS[3], item)
+      end
+    end
+    moved = moved + n
+    expired[item] = nil
+    redis.call('ZREM', KEYS[2], item)
+    redis.call('HDEL', KEYS[4], item)
+  end
+end
+for item in pairs(expired) do
+  redis.call('ZREM', KEYS[2], item)
+  redis.call('HDEL', KEYS[4], item)
+end
+for _, item in ipairs(redis.call('LRANGE', KEYS[1], 0, -1)) do
+  if not redis.call('ZSCORE', KEYS[2], item) then
+    redis.call('ZADD', KEYS[2], tonumber(ARGV[1]) + tonumber(ARGV[2]), item)
+  end
+end
+return moved
+"""
+
+
+def drain(r, keys, count=QUEUE_BATCH_SIZE):
+    """Saca sin bloquear hasta `count` tareas de las colas `keys` (RPOP count, Redis >= 6.2)."""
+    if isinstance(keys, str):
+        keys = [keys]
+    batch = []
+    for key in keys:
+        if len(batch) >= count:
+            break
+        items = r.rpop(key, count - len(batch))
+        if items:
+            batch.extend(items)
+    return batch
+
+
+def pop_batch(r, keys, count=QUEUE_BATCH_SIZE, timeout=1):
+    """
+    Espera con BRPOP la primera tarea (hasta `timeout` segundos) y completa
+    el lote con drain(). Retorna [] si no llegó nada.
+    """
+    if isinstance(keys, str):
+        keys = [keys]
+    first = r.brpop(keys, timeout=timeout)
+    if not first:
+        return []
+    _, data = first
+    return [data] + (drain(r, keys, count - 1) if count > 1 else [])
+
+
+def processing_key(source, node_id):
+    return f"{source}:processing:{node_id}"
+
+
+def deadlines_key(processing):
+    return f"{processing}:deadlines"
+
+
+def scores_key(processing):
+    return f"{processing}:scores"
+
+
+def _state_keys(processing):
+    return [processing, deadlines_key(processing), scores_key(processing)]
+
+
+class ReliableQueue:
+    """
+    Consumidor confiable de una o varias colas para un nodo. claim() retorna
+    pares (cola, tarea); cada uno debe confirmarse con ack(cola, tarea).
+
+    BLMOVE no espera sobre varias claves a la vez: sin `doorbells` se
+    bloquea solo en la primera cola y las demás se revisan sin bloquear en
+    cada vuelta. Las colas de `priority` son sorted sets (menor score
+    primero) y nunca bloquean.
+    """
+
+    def __init__(self, r, sources, node_id, visibility_timeout=VISIBILITY_TIMEOUT, priority=(),
+                 weights=None, doorbells=()):
+        self.r = r
+        self.sources = [sources] if isinstance(sources, str) else list(sources)
+        self.node_id = node_id
+        self.visibility_timeout = visibility_timeout
+        self.priority = set(priority)
+        self.weights = {source: weights.get(source, 1) for source in self.sources} if weights else None
+        self.doorbells = list(doorbells)
+        self._credit = dict.fromkeys(self.sources, 0)
+        self._claim = r.register_script(CLAIM_LUA)
+        self._claim_priority = r.register_script(CLAIM_PRIORITY_LUA)
+        self._ack = r.register_script(ACK_LUA)
+        self._release = r.register_script(RELEASE_LUA)
+        self._reap = r.register_script(REAP_LUA)
+
+    def _keys(self, source):
+        processing = processing_key(source, self.node_id)
+        return [source, processing, deadlines_key(processing), PROCESSING_SOURCES_KEY, scores_key(processing)]
+
+    def _claim_call(self, source, count, first=None, client=None):
+        args = [count, time.time() + self.visibility_timeout]
+        if source in self.priority:
+            return self._claim_priority(keys=self._keys(source), args=args, client=client)
+        if first is not None:
+            args.append(first)
+        return self._claim(keys=self._keys(source)[:4], args=args, client=client)
+
+    def _claim_from(self, source, count, first=None):
+        return [(source, item) for item in self._claim_call(source, count, first)]
+
+    def _quotas(self, count):
+        """
+        Lugares del lote para cada cola según su peso. El resto de la división
+        se asigna con round robin ponderado suave, con créditos que persisten
+        entre llamadas: con lotes de 1 las colas igual se turnan según su peso.
+        """
+        total = sum(self.weights.values())
+        quotas = {source: count * weight // total for source, weight in self.weights.items()}
+        for _ in range(count - sum(quotas.values())):
+            for source, weight in self.weights.items():
+                self._credit[source] += weight
+            best = max(self.sources, key=self._credit.get)
+            self._credit[best] -= total
+            quotas[best] += 1
+        return quotas
+
+    def _claim_weighted(self, count):
+        quotas = self._quotas(count)
+        wanted = [source for source in self.sources if quotas[source]]
+        pipe = self.r.pipeline(transaction=False)
+        for source in wanted:
+            self._claim_call(source, quotas[source], client=pipe)
+        batch = []
+        empty = set()
+        for source, items in zip(wanted, pipe.execute() if wanted else []):
+            batch.extend((source, item) for item in items)
+            if len(items) < quotas[source]:
+                empty.add(source)
+        # Los lugares que no usaron las colas vacías pasan a las demás, por prioridad
+        for source in self.sources:
+            if len(batch) >= count:
+                break
+            if source not in empty:
+                batch.extend(self._claim_from(source, count - len(batch)))
+        return batch
+
+    def _claim_ready(self, count):
+        if self.weights:
+            return self._claim_weighted(count)
+        batch = []
+        for source in self.sources:
+            if len(batch) >= count:
+                break
+            batch.extend(self._claim_from(source, count - len(batch)))
+        return batch
+
+    def claim(self, count=QUEUE_BATCH_SIZE, timeout=1):
+        """
+        Toma hasta `count` tareas. Si no hay ninguna espera hasta `timeout`
+        segundos (None = no esperar) en los timbres o, si no hay timbres, en
+        la primera cola. Retorna [] si no llegó nada.
+        """
+        batch = self._claim_ready(count)
+        if batch or timeout is None:
+            return batch
+
+        if self.doorbells:
+            if self.r.blpop(self.doorbells, timeout=timeout) is None:
+                return []
+            return self._claim_ready(count)
+
+        source = self.sources[0]
+        if source in self.priority:
+            time.sleep(timeout)
+            return []
+        first = self.r.blmove(source, processing_key(source, self.node_id), timeout, "RIGHT", "LEFT")
+        if first is None:
+            return []
+        return self._claim_from(source, count - 1, first)
+
+    def ack(self, source, data, client=None):
+        self._ack(keys=_state_keys(processing_key(source, self.node_id)), args=[data], client=client)
+
+    def release(self, source, data, client=None):
+        """Devuelve a su cola una tarea tomada que este nodo no va a procesar."""
+        keys = _state_keys(processing_key(source, self.node_id)) + [source]
+        return self._release(keys=keys, args=[data], client=client)
+
+    def ack_many(self, items):
+        """Confirma un lote [(cola, tarea), ...] en un solo pipeline."""
+        if not items:
+            return
+        pipe = self.r.pipeline(transaction=False)
+        for source, data in items:
+            self.ack(source, data, client=pipe)
+        pipe.execute()
+
+    def extend(self, items):
+        """Renueva el plazo de tareas largas todavía en proceso [(cola, tarea), ...]."""
+        if not items:
+            return
+        deadline = time.time() + self.visibility_timeout
+        pipe = self.r.pipeline(transaction=False)
+        for source, data in items:
+            pipe.zadd(deadlines_key(processing_key(source, self.node_id)), {data: deadline}, xx=True)
+        pipe.execute()
+
+    def recover(self):
+        """
+        Al arrancar, devuelve a sus colas todo lo que este mismo nodo dejó en
+        proceso en una corrida anterior (sin esperar el visibility timeout).
+        """
+        moved = 0
+        for source in self.sources:
+            processing = processing_key(source, self.node_id)
+            moved += self._reap(
+                keys=[processing, deadlines_key(processing), source, scores_key(processing)],
+                args=[time.time(), self.visibility_timeout, "1"],
+            )
+        if moved:
+            print(f"♻️ {self.node_id}: {moved} tareas sin confirmar devueltas a su cola")
+        return moved
+
+
+def reap_expired(r, owner="", visibility_timeout=VISIBILITY_TIMEOUT, interval=REAP_INTERVAL):
+    """
+    Devuelve a su cola las tareas en proceso con el plazo vencido en todos los
+    nodos. Lo puede llamar cualquier nodo (por ejemplo en su heartbeat): un
+    lock con expiración hace que corra como mucho una vez por `interval`.
+    """
+    if not r.set(REAPER_LOCK_KEY, owner or "reaper", nx=True, ex=max(1, int(interval))):
+        return 0
+    sources = r.hgetall(PROCESSING_SOURCES_KEY)
+    if not sources:
+        return 0
+    reap = r.register_script(REAP_LUA)
+    now = time.time()
+    pipe = r.pipeline(transaction=False)
+    for processing, source in sources.items():
+        reap(keys=[processing, deadlines_key(processing), source, scores_key(processing)], args=[now, visibility_timeout, "0"], client=pipe)
+    moved = sum(pipe.execute())
+    if moved:
+        print(f"♻️ {moved} tareas vencidas devueltas a su cola")
+    return moved
@@ -1,7 +1,37 @@
 import redis
+import redis.asyncio as aioredis
 import os
 
+# Pool async compartido por todo el proceso (uno por worker de uvicorn)
+_async_pool = None
+
 def get_redis():
     host = os.getenv('REDIS_HOST', 'localhost')
     port = int(os.getenv('REDIS_PORT', 6379))
-    return redis.Redis(host=host, port=port, decode_responses=True)
\ No newline at end of file
+    return redis.Redis(host=host, port=port, decode_responses=True)
+
+def get_async_redis():
+    """
+    Retorna un cliente redis.asyncio sobre un pool compartido.
+    Configurable con REDIS_POOL_SIZE, REDIS_POOL_TIMEOUT (espera por una
+    conexión libre), REDIS_SOCKET_TIMEOUT y REDIS_CONNECT_TIMEOUT.
+    """
+    global _async_pool
+    if _async_pool is None:
+        _async_pool = aioredis.BlockingConnectionPool(
+            host=os.getenv('REDIS_HOST', 'localhost'),
+            port=int(os.getenv('REDIS_PORT', 6379)),
+            decode_responses=True,
+            max_connections=int(os.getenv('REDIS_POOL_SIZE', 50)),
+            timeout=float(os.getenv('REDIS_POOL_TIMEOUT', 5)),
+            socket_timeout=float(os.getenv('REDIS_SOCKET_TIMEOUT', 5)),
+            socket_connect_timeout=float(os.getenv('REDIS_CONNECT_TIMEOUT', 2)),
+        )
+    return aioredis.Redis(connection_pool=_async_pool)
+
+async def close_async_redis():
+    """Cierra las conexiones del pool async (al apagar la API)."""
+    global _async_pool
+    if _async_pool is not None:
+        await _async_pool.disconnect()
+        _async_pool = None
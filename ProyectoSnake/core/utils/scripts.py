@@ -0,0 +1,134 @@
+# core/utils/scripts.py
+#
+# Scripts Lua que se ejecutan dentro de Redis. Se registran una sola vez con
+# SCRIPT LOAD y luego se invocan con EVALSHA, de modo que cada operación es
+# un único round trip atómico en el servidor.
+
+# Aplica un movimiento de Snake de forma atómica.
+# KEYS[1] = estado del juego (snake:state)
+# KEYS[2] = cola (carril scenario) donde se encola el scenario_update al comer
+# KEYS[3] = canal donde se publica el nuevo estado
+# KEYS[4] = timbre de esa cola (ver utils/lanes.py); se toca junto con el push
+# ARGV[1] = dirección ("" para conservar la dirección actual)
+# ARGV[2] = ancho del tablero, ARGV[3] = alto del tablero
+# ARGV[4] = game_id opcional que se copia en el scenario_update
+# KEYS[5] = (opcional, modo tick) hash de entradas pendientes; se consume el
+#           campo ARGV[5] y su dirección reemplaza a ARGV[1]
+# Retorna {estado, comio, score, ts} donde estado es "ok", "wall", "self" o
+# "game_over" y ts es el timestamp de la entrada consumida ("" si no hubo).
+SNAKE_MOVE_LUA = """
+local direction = ARGV[1]
+local input_ts = ''
+if KEYS[5] then
+  local pending = redis.call('HGET', KEYS[5], ARGV[5])
+  if pending then
+    redis.call('HDEL', KEYS[5], ARGV[5])
+    local input = cjson.decode(pending)
+    if input['direction'] and input['direction'] ~= '' then
+      direction = input['direction']
+    end
+    input_ts = tostring(input['ts'] or '')
+  end
+end
+
+local raw = redis.call('GET', KEYS[1])
+local state
+if raw then
+  state = cjson.decode(raw)
+else
+  state = {
+    snake = {{5, 5}, {5, 4}, {5, 3}},
+    food = {10, 10},
+    score = 0,
+    game_over = false,
+    obstacles = {},
+    direction = 'right'
+  }
+end
+
+if state['game_over'] then
+  return {'game_over', 0, state['score'] or 0, input_ts}
+end
+
+if direction == '' then
+  direction = state['direction'] or 'right'
+end
+local width = tonumber(ARGV[2])
+local height = tonumber(ARGV[3])
+
+local snake = state['snake']
+local head = {snake[1][1], snake[1][2]}
+if direction == 'up' then
+  head[2] = head[2] - 1
+elseif direction == 'down' then
+  head[2] = head[2] + 1
+elseif direction == 'left' then
+  head[1] = head[1] - 1
+elseif direction == 'right' then
+  head[1] = head[1] + 1
+end
+table.insert(snake, 1, head)
+
+local status = 'ok'
+if head[1] < 0 or head[1] >= width or head[2] < 0 or head[2] >= height then
+  status = 'wall'
+else
+  for i = 2, #snake do
+    if snake[i][1] == head[1] and snake[i][2] == head[2] then
+      status = 'self'
+      break
+    end
+  end
+end
+
+local food = state['food']
+if food == nil or food == cjson.null then
+  food = {10, 10}
+end
+
+local ate = 0
+local score = state['score'] or 0
+if status == 'ok' then
+  if food[1] == head[1] and food[2] == head[2] then
+    score = score + 1
+    ate = 1
+    local update = {type = 'scenario_update', action = 'add_food'}
+    if ARGV[4] and ARGV[4] ~= '' then
+      update['game_id'] = ARGV[4]
+    end
+    redis.call('LPUSH', KEYS[2], cjson.encode(update))
+    redis.call('LPUSH', KEYS[4], 1)
+    redis.call('LTRIM', KEYS[4], 0, 15)  -- lanes.DOORBELL_MAX - 1
+  else
+    table.remove(snake)
+  end
+end
+
+state['snake'] = snake
+state['food'] = food
+state['score'] = score
+state['game_over'] = status ~= 'ok'
+state['direction'] = direction
+if state['obstacles'] == nil then
+  state['obstacles'] = {}
+end
+
+-- cjson serializa las tablas vacías como objeto; el esquema espera una lista
+local encoded = string.gsub(cjson.encode(state), '"obstacles":{}', '"obstacles":[]')
+redis.call('SET', KEYS[1], encoded)
+redis.call('PUBLISH', KEYS[3], encoded)
+return {status, ate, score, input_ts}
+"""
+
+
+def register_move_script(r):
+    """
+    Retorna el objeto Script de redis-py para el movimiento de Snake.
+    Cada llamada usa EVALSHA y solo recarga el script si Redis lo perdió.
+    """
+    return r.register_script(SNAKE_MOVE_LUA)
+
+
+def preload_scripts(r):
+    """Carga los scripts con SCRIPT LOAD para que el primer EVALSHA no falle."""
+    r.script_load(SNAKE_MOVE_LUA)
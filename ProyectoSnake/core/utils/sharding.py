@@ -0,0 +1,122 @@
+# core/utils/sharding.py
+#
+# Varias partidas de Snake en paralelo. Cada partida tiene su propio estado y
+# canal (game_id), y se asigna a un player_node con hashing consistente: todos
+# los movimientos de una partida caen en la misma cola y se procesan en orden,
+# mientras que agregar nodos reparte las partidas entre más workers.
+#
+# La partida "default" conserva las claves originales (snake:state,
+# snake:updates) para que los clientes existentes sigan funcionando.
+
+import bisect
+import hashlib
+import time
+
+from utils.state_channel import SNAKE_STATE_KEY, SNAKE_UPDATES_CHANNEL
+
+DEFAULT_GAME_ID = "default"
+
+# Sorted set node_id -> último heartbeat de cada player_node
+PLAYER_NODES_KEY = "player_nodes"
+# Cola compartida de respaldo cuando todavía no hay player_nodes registrados
+PLAYER_TASKS_QUEUE = "player_tasks"
+PLAYER_NODE_TIMEOUT = 5
+
+VIRTUAL_NODES = 100
+
+
+def normalize_game_id(game_id):
+    return str(game_id) if game_id else DEFAULT_GAME_ID
+
+
+def state_key(game_id=None):
+    game_id = normalize_game_id(game_id)
+    return SNAKE_STATE_KEY if game_id == DEFAULT_GAME_ID else f"{SNAKE_STATE_KEY}:{game_id}"
+
+
+def updates_channel(game_id=None):
+    game_id = normalize_game_id(game_id)
+    return SNAKE_UPDATES_CHANNEL if game_id == DEFAULT_GAME_ID else f"{SNAKE_UPDATES_CHANNEL}:{game_id}"
+
+
+def player_queue(node_id):
+    return f"{PLAYER_TASKS_QUEUE}:{node_id}"
+
+
+def _hash(value):
+    return int.from_bytes(hashlib.md5(value.encode("utf-8")).digest()[:8], "big")
+
+
+class HashRing:
+    """Anillo de hashing consistente con nodos virtuales."""
+
+    def __init__(self, nodes=(), replicas=VIRTUAL_NODES):
+        self.replicas = replicas
+        self.nodes = set()
+        self._hashes = []
+        self._owners = {}
+        for node in nodes:
+            self.add(node)
+
+    def add(self, node):
+        if node in self.nodes:
+            return
+        self.nodes.add(node)
+        for i in range(self.replicas):
+            h = _hash(f"{node}#{i}")
+            self._owners[h] = node
+            bisect.insort(self._hashes, h)
+
+    def remove(self, node):
+        if node not in self.nodes:
+            return
+        self.nodes.discard(node)
+        for i in range(self.replicas):
+            h = _hash(f"{node}#{i}")
+            del self._owners[h]
+            self._hashes.remove(h)
+
+    def get(self, key):
+        if not self._hashes:
+            return None
+        i = bisect.bisect(self._hashes, _hash(key)) % len(self._hashes)
+        return self._owners[self._hashes[i]]
+
+
+class ShardRouter:
+    """
+    Decide la cola de cada partida. Mantiene en memoria el anillo de player_nodes
+    vivos y lo refresca como máximo cada `refresh_every` segundos.
+    """
+
+    def __init__(self, refresh_every=1.0, timeout=PLAYER_NODE_TIMEOUT):
+        self.refresh_every = refresh_every
+        self.timeout = timeout
+        self.ring = HashRing()
+        self._refreshed_at = 0.0
+
+    def _stale(self):
+        return time.time() - self._refreshed_at >= self.refresh_every
+
+    def _apply(self, live_nodes):
+        live_nodes = set(live_nodes)
+        for node in self.ring.nodes - live_nodes:
+            self.ring.remove(node)
+        for node in live_nodes - self.ring.nodes:
+            self.ring.add(node)
+        self._refreshed_at = time.time()
+
+    def refresh(self, r):
+        if self._stale():
+            self._apply(r.zrangebyscore(PLAYER_NODES_KEY, time.time() - self.timeout, "+inf"))
+
+    async def refresh_async(self, r):
+        if self._stale():
+            self._apply(await r.zrangebyscore(PLAYER_NODES_KEY, time.time() - self.timeout, "+inf"))
+
+    def owner(self, game_id):
+        return self.ring.get(normalize_game_id(game_id))
+
+    def queue_for(self, game_id):
+        node = self.owner(game_id)
+        return player_queue(node) if node else PLAYER_TASKS_QUEUE
@@ -0,0 +1,150 @@
+# core/utils/snake_protocol.py
+#
+# Protocolo versionado con deltas para /ws/snake (?protocol=delta).
+#
+# Cada mensaje lleva la versión "v" y un número de secuencia "seq". El primer
+# mensaje de un socket (o después de un resync) es una foto completa:
+#   {"v": 1, "seq": 41, "snapshot": {...estado...}}
+# y los siguientes solo las operaciones que llevan del estado seq-1 al seq:
+#   {"v": 1, "seq": 42, "ops": [["h", 6, 5], ["t", 1]]}
+#
+# Operaciones:
+#   ["h", x, y]  nueva cabeza (se inserta al frente, en el orden recibido)
+#   ["t", n]     se quitan n celdas de la cola
+#   ["f", x, y]  la comida se movió
+#   ["o", x, y]  obstáculo agregado
+#   ["s", n]     score
+#   ["g", 0|1]   game_over
+#   ["d", dir]   dirección
+#
+# Con ?encoding=binary los mismos mensajes viajan como frames binarios
+# empaquetados con struct (ver encode_binary).
+
+import struct
+
+from utils import codec
+
+PROTOCOL_VERSION = 1
+
+# Una cabeza nueva por mensaje es lo normal; más que esto se envía como foto
+MAX_HEAD_OPS = 4
+
+DIRECTIONS = ["up", "down", "left", "right"]
+
+# Códigos binarios
+KIND_SNAPSHOT = 0
+KIND_DIFF = 1
+OP_CODES = {"h": 1, "t": 2, "f": 3, "o": 4, "s": 5, "g": 6, "d": 7}
+HEADER = struct.Struct("!BBI")  # versión, tipo, seq
+POINT = struct.Struct("!hh")
+
+
+def diff_states(prev, curr):
+    """
+    Retorna la lista de operaciones que transforma prev en curr, o None si el
+    cambio no se puede expresar como delta (reinicio, obstáculos borrados...).
+    """
+    prev_snake = prev.get("snake") or []
+    snake = curr.get("snake") or []
+
+    # Se busca cuántas cabezas nuevas hay: el resto de la serpiente nueva debe
+    # ser un prefijo de la anterior (la cola solo puede acortarse)
+    heads = None
+    for k in range(min(len(snake), MAX_HEAD_OPS) + 1):
+        body = snake[k:]
+        if len(body) <= len(prev_snake) and prev_snake[:len(body)] == body:
+            heads = k
+            break
+    if heads is None:
+        return None
+
+    ops = []
+    for cell in reversed(snake[:heads]):
+        ops.append(["h", cell[0], cell[1]])
+    removed = len(prev_snake) - (len(snake) - heads)
+    if removed:
+        ops.append(["t", removed])
+
+    prev_obstacles = prev.get("obstacles") or []
+    obstacles = curr.get("obstacles") or []
+    if obstacles[:len(prev_obstacles)] != prev_obstacles:
+        return None
+    for cell in obstacles[len(prev_obstacles):]:
+        ops.append(["o", cell[0], cell[1]])
+
+    food = curr.get("food")
+    if food != prev.get("food"):
+        if not food:
+            return None
+        ops.append(["f", food[0], food[1]])
+    if curr.get("score", 0) != prev.get("score", 0):
+        ops.append(["s", curr.get("score", 0)])
+    if bool(curr.get("game_over")) != bool(prev.get("game_over")):
+        ops.append(["g", int(bool(curr.get("game_over")))])
+    if curr.get("direction") != prev.get("direction") and curr.get("direction") in DIRECTIONS:
+        ops.append(["d", curr["direction"]])
+    return ops
+
+
+def encode_binary(seq, ops=None, snapshot=None):
+    """Empaqueta un mensaje en binario; la foto va como JSON UTF-8 tras el header."""
+    if snapshot is not None:
+        return HEADER.pack(PROTOCOL_VERSION, KIND_SNAPSHOT, seq) + codec.dumpb(snapshot)
+    parts = [HEADER.pack(PROTOCOL_VERSION, KIND_DIFF, seq), struct.pack("!H", len(ops))]
+    for op in ops:
+        code = op[0]
+        parts.append(struct.pack("!B", OP_CODES[code]))
+        if code in ("h", "f", "o"):
+            parts.append(POINT.pack(op[1], op[2]))
+        elif code == "t":
+            parts.append(struct.pack("!H", op[1]))
+        elif code == "s":
+            parts.append(struct.pack("!I", op[1]))
+        elif code == "g":
+            parts.append(struct.pack("!B", op[1]))
+        elif code == "d":
+            parts.append(struct.pack("!B", DIRECTIONS.index(op[1])))
+    return b"".join(parts)
+
+
+class Frame:
+    """
+    Un cambio de estado ya numerado. Las codificaciones se calculan una sola
+    vez y se reutilizan para todos los sockets que las piden.
+    """
+
+    def __init__(self, seq, state, ops):
+        self.seq = seq
+        self.state = state
+        self.ops = ops
+        self._cache = {}
+
+    def encode(self, snapshot=False, binary=False):
+        key = (snapshot or self.ops is None, binary)
+        if key not in self._cache:
+            if key[0]:
+                if binary:
+                    data = encode_binary(self.seq, snapshot=self.state)
+                else:
+                    data = codec.dumps({"v": PROTOCOL_VERSION, "seq": self.seq, "snapshot": self.state})
+            elif binary:
+                data = encode_binary(self.seq, ops=self.ops)
+            else:
+                data = codec.dumps({"v": PROTOCOL_VERSION, "seq": self.seq, "ops": self.ops})
+            self._cache[key] = data
+        return self._cache[key]
+
+
+class DeltaEncoder:
+    """Numera los estados que llegan por Pub/Sub y calcula el delta una vez por cambio."""
+
+    def __init__(self):
+        self.seq = 0
+        self.frame = None
+
+    def push(self, state_json):
+        state = codec.loads(state_json)
+        ops = diff_states(self.frame.state, state) if self.frame else None
+        self.seq += 1
+        self.frame = Frame(self.seq, state, ops)
+        return self.frame
@@ -0,0 +1,75 @@
+# core/utils/ticks.py
+#
+# Modo "tick": el servidor avanza cada partida a una tasa fija en lugar de
+# mover la serpiente con cada POST. Las entradas no se encolan: la API guarda
+# solo la última dirección de cada partida en un hash, así que mil clics
+# entre dos ticks ocupan un solo campo y la cola nunca crece.
+#
+# Se activa con SNAKE_TICK_RATE (ticks por segundo) en la API y en los
+# player_nodes; con 0 (por defecto) todo sigue funcionando por cola.
+
+import os
+import time
+from collections import deque
+
+from utils import codec
+from utils.sharding import normalize_game_id
+
+TICK_RATE = float(os.getenv("SNAKE_TICK_RATE", "0"))
+# Partidas por pipeline dentro de un mismo tick
+TICK_BATCH = int(os.getenv("SNAKE_TICK_BATCH", "500"))
+
+# Hash game_id -> última entrada pendiente {"direction", "ts"}
+INPUTS_KEY = "snake:inputs"
+# Set con las partidas que los player_nodes deben avanzar en cada tick
+ACTIVE_GAMES_KEY = "snake:games"
+
+
+def tick_mode():
+    return TICK_RATE > 0
+
+
+def encode_input(direction):
+    """Entrada pendiente; ts se usa para medir la latencia entrada -> estado."""
+    return codec.dumps({"direction": direction or "", "ts": time.time()})
+
+
+def store_input(pipe, game_id, direction):
+    """Agrega al pipeline la escritura de la entrada (pisa la anterior) y activa la partida."""
+    game_id = normalize_game_id(game_id)
+    pipe.hset(INPUTS_KEY, game_id, encode_input(direction))
+    pipe.sadd(ACTIVE_GAMES_KEY, game_id)
+
+
+class TickMetrics:
+    """Ventanas deslizantes de jitter del tick y latencia entrada -> estado (ms)."""
+
+    def __init__(self, window=2000):
+        self.jitter = deque(maxlen=window)
+        self.latency = deque(maxlen=window)
+        self.overruns = 0
+        self.ticks = 0
+
+    def record_tick(self, jitter_s):
+        self.ticks += 1
+        self.jitter.append(jitter_s * 1000)
+
+    def record_latency(self, latency_s):
+        self.latency.append(latency_s * 1000)
+
+    @staticmethod
+    def percentile(values, pct):
+        if not values:
+            return 0.0
+        ordered = sorted(values)
+        return ordered[min(len(ordered) - 1, int(pct / 100.0 * len(ordered)))]
+
+    def summary(self):
+        return {
+            "ticks": self.ticks,
+            "tick_overruns": self.overruns,
+            "tick_jitter_p50_ms": round(self.percentile(self.jitter, 50), 3),
+            "tick_jitter_p99_ms": round(self.percentile(self.jitter, 99), 3),
+            "input_latency_p50_ms": round(self.percentile(self.latency, 50), 3),
+            "input_latency_p99_ms": round(self.percentile(self.latency, 99), 3),
+        }
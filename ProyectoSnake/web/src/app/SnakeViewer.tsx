@@ -6,16 +6,77 @@ type SnakeState = {
   food: [number, number]
   score: number
   game_over: boolean
+  obstacles?: [number, number][]
+  direction?: string
+}
+
+// Operaciones del protocolo delta de /ws/snake (ver core/utils/snake_protocol.py)
+type DeltaOp =
+  | ["h" | "f" | "o", number, number]
+  | ["t" | "s" | "g", number]
+  | ["d", string]
+
+function applyOps(state: SnakeState, ops: DeltaOp[]): SnakeState {
+  const next: SnakeState = {
+    ...state,
+    snake: [...state.snake],
+    obstacles: [...(state.obstacles ?? [])],
+  }
+  for (const op of ops) {
+    switch (op[0]) {
+      case "h":
+        next.snake.unshift([op[1], op[2]])
+        break
+      case "t":
+        next.snake.splice(next.snake.length - op[1], op[1])
+        break
+      case "f":
+        next.food = [op[1], op[2]]
+        break
+      case "o":
+        next.obstacles!.push([op[1], op[2]])
+        break
+      case "s":
+        next.score = op[1]
+        break
+      case "g":
+        next.game_over = op[1] === 1
+        break
+      case "d":
+        next.direction = op[1]
+        break
+    }
+  }
+  return next
 }
 
 export default function SnakeViewer() {
   const [state, setState] = useState<SnakeState | null>(null)
 
   useEffect(() => {
-    const ws = new WebSocket("ws://localhost:8000/ws/snake")
+    const ws = new WebSocket("ws://localhost:8000/ws/snake?protocol=delta")
+    let current: SnakeState | null = null
+    let lastSeq = -1
+    // Resync pedido y foto todavía sin llegar: los deltas se ignoran para no
+    // pedir una foto más por cada uno
+    let resyncing = false
     ws.onmessage = (event) => {
-      const newState = JSON.parse(event.data)
-      setState(newState)
+      const message = JSON.parse(event.data)
+      if (message.snapshot) {
+        current = message.snapshot
+        resyncing = false
+      } else if (resyncing) {
+        return
+      } else if (current && message.seq === lastSeq + 1) {
+        current = applyOps(current, message.ops)
+      } else {
+        // Se perdió un mensaje: se pide una foto completa
+        resyncing = true
+        ws.send(JSON.stringify({ type: "resync" }))
+        return
+      }
+      lastSeq = message.seq
+      setState(current)
     }
     return () => ws.close()
   }, [])
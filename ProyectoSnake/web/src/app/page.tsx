@@ -95,7 +95,19 @@ export default function Home() {
       const data = JSON.parse(event.data)
       setNodes(data.nodes)
       setTasks(data.tasks)
-      setResults(data.results)
+      // El primer mensaje trae el historial completo; los siguientes solo las líneas nuevas
+      if (data.results) {
+        setResults(data.results)
+      }
+      if (data.results_delta) {
+        setResults((prev) => {
+          const merged: Results = { ...prev }
+          for (const [nodeId, lines] of Object.entries(data.results_delta as Results)) {
+            merged[nodeId] = [...(merged[nodeId] || []), ...lines]
+          }
+          return merged
+        })
+      }
       console.log("Mensaje recibido:", data)
     }
 
@@ -0,0 +1,513 @@
+# bench/e2e.py
+#
+# Benchmark de punta a punta de Snake y DMS con procesos reales:
+#   - un Redis por sistema: redis-server local sin persistencia o, si no está
+#     instalado (o con --redis fake), fakeredis por TCP en un hilo
+#   - Snake: la API (uvicorn), el dispatcher (main.py), --players player_nodes
+#     y --scenarios scenario_nodes
+#   - DMS: --dms-nodes node.py con Whisper "stub" (WHISPER_STUB_DELAY) y sin
+#     Supabase (SUPABASE_URL vacío)
+# Todo corre sin red. La carga es una mezcla configurable de:
+#   movimientos     --games partidas en lazo cerrado por /ws/snake: se manda un
+#                   movimiento y se espera el estado con la cabeza nueva
+#   transcripciones --transcribe-rate tareas/s (lazo abierto) con audios falsos;
+#                   terminan cuando el resultado aparece en results:stream
+# Reporta tareas/s, p50/p95/p99 de latencia y comandos Redis por tarea (neto
+# descuenta lo que el sistema hace en reposo: heartbeats, esperas de cola).
+# El resultado queda en bench/results/e2e-<commit>-<fecha>.json; con
+# --compare se muestran las diferencias contra una corrida anterior.
+#
+# Desde la raíz del repositorio:
+#   python -m bench.e2e --duration 10 --games 16 --transcribe-rate 20
+#   python -m bench.e2e --compare bench/results/e2e-abc1234-20250101-120000.json
+
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import os
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+
+import redis
+import redis.asyncio as aioredis
+import websockets
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CORE_DIR = os.path.join(ROOT, "ProyectoSnake", "core")
+DMS_DIR = os.path.join(ROOT, "DMS")
+RESULTS_DIR = os.path.join(ROOT, "bench", "results")
+
+# Claves que el bench lee o escribe desde afuera, como un cliente más
+# (ver utils/sharding.py, utils/heartbeat.py, utils/lanes.py y DMS/utils/result_store.py)
+PLAYER_NODES_KEY = "player_nodes"
+LAST_SEEN_KEY = "nodes:last_seen"
+BATCH_LANE = "global:unassigned_tasks:lane:batch"
+DOORBELL = "global:unassigned_tasks:doorbell"
+DOORBELL_MAX = 16
+RESULTS_STREAM = "results:stream"
+FAKE_NOTE = ("fakeredis no bloquea en BLMOVE: los consumidores sin timbre (scenario_node) giran en vacío, "
+             "así que las ops por tarea y la CPU incluyen ese giro; para comparar ops usar redis-server")
+
+# Vuelta de 5x5 desde la posición inicial (cabeza en [5, 5]): no sale del
+# tablero, no choca mientras la serpiente mida menos que la vuelta y pasa por
+# la comida inicial en [10, 10], así también trabajan dispatcher y scenario_node
+LOOP = ["right"] * 5 + ["down"] * 5 + ["left"] * 5 + ["up"] * 5
+STEPS = {"up": (0, -1), "down": (0, 1), "left": (-1, 0), "right": (1, 0)}
+START_HEAD = [5, 5]
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def percentile(values, pct):
+    """Percentil por rango más cercano (igual que bench/common.py de cada proyecto)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[index]
+
+
+_fake_counts = None
+
+
+def count_fake_commands():
+    """
+    fakeredis no implementa INFO: los comandos se cuentan en este proceso,
+    que es el que atiende el servidor falso. Depende de un método interno de
+    fakeredis; si no está, las operaciones por tarea se reportan como null.
+    """
+    global _fake_counts
+    if _fake_counts is None:
+        try:
+            from fakeredis._socket._base import BaseFakeSocket
+        except ImportError:
+            return None
+        counts, lock = {}, threading.Lock()
+        process_command = BaseFakeSocket._process_command
+
+        def counted(sock, fields):
+            with lock:
+                counts[id(sock._server)] = counts.get(id(sock._server), 0) + 1
+            return process_command(sock, fields)
+
+        BaseFakeSocket._process_command = counted
+        _fake_counts = counts
+    return _fake_counts
+
+
+class RedisServer:
+    """redis-server propio en un puerto libre o fakeredis por TCP en un hilo."""
+
+    def __init__(self, kind):
+        self.kind = kind
+        self.port = free_port()
+        self.proc = None
+        self.server = None
+        if kind == "server":
+            self.proc = subprocess.Popen(
+                ["redis-server", "--port", str(self.port), "--save", "", "--appendonly", "no"],
+                stdout=subprocess.DEVNULL,
+            )
+        else:
+            from fakeredis import TcpFakeServer
+            count_fake_commands()
+            self.server = TcpFakeServer(("127.0.0.1", self.port), server_type="redis")
+            self.server.daemon_threads = True
+            threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.client = redis.Redis(port=self.port, decode_responses=True)
+        deadline = time.time() + 10
+        while True:
+            try:
+                self.client.ping()
+                break
+            except redis.ConnectionError:
+                if time.time() > deadline:
+                    raise
+                time.sleep(0.05)
+
+    def commands(self):
+        """Comandos atendidos hasta ahora (None si no se pueden contar)."""
+        if self.proc:
+            return int(self.client.info("stats")["total_commands_processed"])
+        counts = count_fake_commands()
+        return None if counts is None else counts.get(id(self.server.fake_server), 0)
+
+    def stop(self):
+        if self.proc:
+            self.proc.terminate()
+            self.proc.wait(timeout=10)
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+
+
+class Cluster:
+    """Procesos del sistema, cada uno en su grupo para terminar también sus hijos."""
+
+    def __init__(self, workdir):
+        self.workdir = workdir
+        self.procs = []  # (nombre, proceso, puerto de métricas)
+
+    def spawn(self, name, cmd, env, metrics_port=None):
+        log = open(os.path.join(self.workdir, f"{name}.log"), "w")
+        env = dict(env, METRICS_PORT=str(metrics_port or 0))
+        proc = subprocess.Popen(cmd, cwd=self.workdir, env=env, stdout=log, stderr=subprocess.STDOUT,
+                                start_new_session=True)
+        self.procs.append((name, proc, metrics_port))
+
+    def check(self):
+        for name, proc, _ in self.procs:
+            if proc.poll() is not None:
+                raise RuntimeError(f"{name} terminó con código {proc.returncode} (ver {self.workdir}/{name}.log)")
+
+    def stop(self):
+        for _, proc, _ in self.procs:
+            if proc.poll() is None:
+                os.killpg(proc.pid, signal.SIGTERM)
+        for _, proc, _ in self.procs:
+            try:
+                proc.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                os.killpg(proc.pid, signal.SIGKILL)
+                proc.wait()
+
+
+def start_cluster(args, snake, dms, workdir):
+    cluster = Cluster(workdir)
+    base = dict(os.environ, REDIS_HOST="127.0.0.1", PYTHONUNBUFFERED="1", LOG_LEVEL=args.log_level)
+    snake_env = dict(base, REDIS_PORT=str(snake.port))
+    dms_env = dict(base, REDIS_PORT=str(dms.port), SUPABASE_URL="", WHISPER_MODEL="stub",
+                   WHISPER_STUB_DELAY=str(args.transcribe_ms / 1000), CPU_WORKERS=str(args.cpu_workers))
+    python = sys.executable
+
+    args.api_port = free_port()
+    cluster.spawn("api", [python, "-m", "uvicorn", "api:app", "--app-dir", CORE_DIR,
+                          "--port", str(args.api_port), "--log-level", "warning"],
+                  dict(snake_env, SNAKE_MOVE_RATE="1e9", SNAKE_MOVE_BURST="1e9"))
+    cluster.spawn("dispatcher", [python, os.path.join(CORE_DIR, "main.py")], snake_env, free_port())
+    for i in range(args.players):
+        cluster.spawn(f"player{i}", [python, os.path.join(CORE_DIR, "player_node.py")],
+                      dict(snake_env, NODE_ID=f"bench-player{i}"), free_port())
+    for i in range(args.scenarios):
+        cluster.spawn(f"scenario{i}", [python, os.path.join(CORE_DIR, "scenario_node.py")],
+                      dict(snake_env, NODE_ID=f"bench-scenario{i}"), free_port())
+    for i in range(args.dms_nodes):
+        cluster.spawn(f"dms{i}", [python, os.path.join(DMS_DIR, "node.py")], dms_env, free_port())
+    return cluster
+
+
+def wait_ready(cluster, args, snake, dms, timeout=60):
+    """Espera la API y los heartbeats de todos los nodos."""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        cluster.check()
+        try:
+            socket.create_connection(("127.0.0.1", args.api_port), timeout=0.2).close()
+            api_up = True
+        except OSError:
+            api_up = False
+        if (api_up and snake.client.zcard(PLAYER_NODES_KEY) >= args.players
+                and snake.client.zcard(LAST_SEEN_KEY) >= args.players + args.scenarios
+                and dms.client.zcard(LAST_SEEN_KEY) >= args.dms_nodes):
+            return
+        time.sleep(0.2)
+    raise RuntimeError(f"El sistema no arrancó en {timeout} s (logs en {cluster.workdir})")
+
+
+async def http_post(port, path, payload):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    body = json.dumps(payload).encode()
+    writer.write((
+        f"POST {path} HTTP/1.1\r\nHost: 127.0.0.1\r\nConnection: close\r\n"
+        f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n"
+    ).encode() + body)
+    await writer.drain()
+    await reader.read()
+    writer.close()
+
+
+async def wait_state(ws, head, timeout):
+    """Siguiente estado con la cabeza en `head`; ignora acks y estados de otras tareas (comida)."""
+    deadline = time.perf_counter() + timeout
+    while True:
+        remaining = deadline - time.perf_counter()
+        if remaining <= 0:
+            return None
+        try:
+            message = json.loads(await asyncio.wait_for(ws.recv(), remaining))
+        except asyncio.TimeoutError:
+            return None
+        if isinstance(message, dict) and message.get("snake") and message["snake"][0] == head:
+            return message
+
+
+async def play(game, args, deadline, result):
+    """Una partida en lazo cerrado: movimiento, estado publicado, siguiente movimiento."""
+    url = f"ws://127.0.0.1:{args.api_port}/ws/snake?game_id={game}"
+    async with websockets.connect(url, max_size=None) as ws:
+        head, step = START_HEAD, 0
+        while time.perf_counter() < deadline:
+            direction = LOOP[step % len(LOOP)]
+            dx, dy = STEPS[direction]
+            expected = [head[0] + dx, head[1] + dy]
+            sent = time.perf_counter()
+            await ws.send(json.dumps({"type": "move", "direction": direction, "player_id": game}))
+            state = await wait_state(ws, expected, args.timeout)
+            if state is None:
+                result["timeouts"] += 1
+                return
+            result["latencies"].append((time.perf_counter() - sent) * 1000)
+            head, step = expected, step + 1
+            if state.get("game_over"):
+                # La serpiente creció lo suficiente para chocar: se reinicia la partida
+                result["resets"] += 1
+                await http_post(args.api_port, "/snake/move", {"type": "reset_game", "game_id": game})
+                if await wait_state(ws, START_HEAD, args.timeout) is None:
+                    result["timeouts"] += 1
+                    return
+                head, step = START_HEAD, 0
+
+
+def make_audios(workdir, count, size_kb):
+    """Audios falsos de contenido distinto (el cache por hash no los confunde)."""
+    directory = os.path.join(workdir, "audios")
+    os.makedirs(directory, exist_ok=True)
+    audios = []
+    for i in range(count):
+        path = os.path.join(directory, f"bench{i:05d}.mp3")
+        data = os.urandom(size_kb * 1024)
+        with open(path, "wb") as f:
+            f.write(data)
+        audios.append((path, hashlib.sha256(data).hexdigest(), len(data)))
+    return audios
+
+
+async def feed_transcriptions(r, audios, rate, deadline, sent):
+    """Encola `rate` transcripciones por segundo en el carril batch y toca el timbre."""
+    start = time.perf_counter()
+    for n, (path, digest, size) in enumerate(audios):
+        due = start + n / rate
+        if due >= deadline:
+            break
+        await asyncio.sleep(max(0.0, due - time.perf_counter()))
+        now = time.time()
+        task = {"type": "transcribe", "file": path, "hash": digest, "size": size, "duration": 0.0, "enqueued_at": now}
+        pipe = r.pipeline(transaction=False)
+        pipe.lpush(BATCH_LANE, json.dumps(task))
+        pipe.lpush(DOORBELL, 1)
+        pipe.ltrim(DOORBELL, 0, DOORBELL_MAX - 1)
+        await pipe.execute()
+        sent[path] = now
+
+
+async def collect_results(r, sent, result, stop):
+    """Lee results:stream; la latencia es de la tarea encolada al resultado terminado (hora del nodo)."""
+    last_id = "0-0"
+    while not (stop.is_set() and len(result["latencies"]) >= len(sent)):
+        reply = await r.xread({RESULTS_STREAM: last_id}, count=500, block=200)
+        for _, entries in reply or []:
+            for entry_id, fields in entries:
+                last_id = entry_id
+                enqueued = sent.get(fields.get("file"))
+                if enqueued is not None:
+                    result["latencies"].append((float(fields["finished"]) - enqueued) * 1000)
+
+
+async def run_load(args, snake, dms, workdir):
+    moves = {"latencies": [], "resets": 0, "timeouts": 0}
+    transcriptions = {"latencies": []}
+    sent = {}
+    audios = make_audios(workdir, math.ceil(args.transcribe_rate * args.duration), args.audio_kb)
+    dms_async = aioredis.Redis(port=dms.port, decode_responses=True)
+
+    before = (snake.commands(), dms.commands())
+    start = time.perf_counter()
+    deadline = start + args.duration
+    stop = asyncio.Event()
+    collector = asyncio.create_task(collect_results(dms_async, sent, transcriptions, stop))
+    jobs = [play(f"bench{i}", args, deadline, moves) for i in range(args.games)]
+    if args.transcribe_rate > 0:
+        jobs.append(feed_transcriptions(dms_async, audios, args.transcribe_rate, deadline, sent))
+    await asyncio.gather(*jobs)
+    moves_elapsed = time.perf_counter() - start
+    stop.set()
+    # Las transcripciones encoladas al final tienen --drain segundos para terminar
+    try:
+        await asyncio.wait_for(collector, args.drain)
+    except asyncio.TimeoutError:
+        pass
+    elapsed = time.perf_counter() - start
+    after = (snake.commands(), dms.commands())
+    await dms_async.aclose()
+    return moves, transcriptions, len(sent), moves_elapsed, elapsed, before, after
+
+
+def idle_rate(server, seconds):
+    """Comandos por segundo del sistema en reposo (heartbeats, esperas de cola)."""
+    before = server.commands()
+    if before is None:
+        return None
+    time.sleep(seconds)
+    return (server.commands() - before) / seconds
+
+
+def summarize(latencies, elapsed, ops, idle, idle_elapsed):
+    count = len(latencies)
+    summary = {
+        "count": count,
+        "per_s": round(count / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "redis_ops_per_task": None,
+        "redis_ops_per_task_net": None,
+    }
+    if ops is not None and count:
+        summary["redis_ops_per_task"] = round(ops / count, 2)
+        if idle is not None:
+            summary["redis_ops_per_task_net"] = round(max(0.0, ops - idle * idle_elapsed) / count, 2)
+    return summary
+
+
+def scrape_tasks(cluster):
+    """tasks_total de cada proceso con exporter (ver utils/metrics.py)."""
+    tasks = {}
+    for name, _, port in cluster.procs:
+        if not port:
+            continue
+        try:
+            text = urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=2).read().decode()
+        except OSError:
+            continue
+        for line in text.splitlines():
+            if line.startswith("tasks_total{"):
+                labels, value = line[len("tasks_total{"):].rsplit("} ", 1)
+                key = "/".join(part.split("=", 1)[1].strip('"') for part in labels.split(","))
+                tasks.setdefault(name, {})[key] = int(float(value))
+    return tasks
+
+
+def git_commit():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=ROOT,
+                               capture_output=True, text=True).stdout.strip()
+        return commit + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def print_report(report):
+    print(f"\n   commit {report['commit']} | redis {report['redis']} | {report['config']['duration']:g} s")
+    print(f"   {'':>15} {'tareas':>7} {'tareas/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}"
+          f" {'ops/tarea':>10} {'neto':>6}")
+    for section in ("moves", "transcriptions"):
+        s = report[section]
+        ops = "-" if s["redis_ops_per_task"] is None else f"{s['redis_ops_per_task']:g}"
+        net = "-" if s["redis_ops_per_task_net"] is None else f"{s['redis_ops_per_task_net']:g}"
+        print(f"   {section:>15} {s['count']:>7} {s['per_s']:>9.1f} {s['p50_ms']:>8.1f} {s['p95_ms']:>8.1f}"
+              f" {s['p99_ms']:>8.1f} {ops:>10} {net:>6}")
+    print(f"   movimientos: {report['moves']['resets']} reinicios, {report['moves']['timeouts']} sin respuesta;"
+          f" transcripciones: {report['transcriptions']['sent']} encoladas")
+    for note in report["notes"]:
+        print(f"   ⚠️ {note}")
+
+
+def print_comparison(old, new):
+    print(f"\n   {old['commit']} -> {new['commit']}")
+    for section in ("moves", "transcriptions"):
+        for key in ("per_s", "p50_ms", "p95_ms", "p99_ms", "redis_ops_per_task_net"):
+            before, after = old.get(section, {}).get(key), new[section].get(key)
+            if before is None or after is None:
+                continue
+            change = f"{(after - before) / before * 100:+.1f}%" if before else "-"
+            print(f"   {section:>15} {key:>22}: {before:>9.2f} -> {after:>9.2f} ({change})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de punta a punta (Snake + DMS)")
+    parser.add_argument("--redis", choices=["auto", "server", "fake"], default="auto",
+                        help="auto usa redis-server si está instalado y si no fakeredis")
+    parser.add_argument("--players", type=int, default=2)
+    parser.add_argument("--scenarios", type=int, default=1)
+    parser.add_argument("--dms-nodes", type=int, default=2)
+    parser.add_argument("--cpu-workers", type=int, default=1, help="Procesos de transcripción por nodo DMS")
+    parser.add_argument("--games", type=int, default=16, help="Partidas jugando a la vez (0 = sin movimientos)")
+    parser.add_argument("--transcribe-rate", type=float, default=10, help="Transcripciones por segundo (0 = ninguna)")
+    parser.add_argument("--transcribe-ms", type=float, default=50, help="Lo que tarda el Whisper stub por audio")
+    parser.add_argument("--audio-kb", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--idle", type=float, default=2, help="Segundos en reposo para medir comandos de fondo")
+    parser.add_argument("--drain", type=float, default=30, help="Espera máxima por las transcripciones pendientes")
+    parser.add_argument("--timeout", type=float, default=5, help="Espera máxima por el estado de un movimiento")
+    parser.add_argument("--log-level", default="WARNING")
+    parser.add_argument("--output", help="Archivo JSON del resultado")
+    parser.add_argument("--compare", help="JSON de una corrida anterior para comparar")
+    args = parser.parse_args()
+
+    kind = args.redis
+    if kind == "auto":
+        kind = "server" if shutil.which("redis-server") else "fake"
+    workdir = tempfile.mkdtemp(prefix="bench-e2e-")
+    snake, dms = RedisServer(kind), RedisServer(kind)
+    cluster = start_cluster(args, snake, dms, workdir)
+    try:
+        print(f"⏳ Levantando {len(cluster.procs)} procesos (redis {kind}, logs en {workdir})...")
+        wait_ready(cluster, args, snake, dms)
+        idle = (idle_rate(snake, args.idle), idle_rate(dms, args.idle))
+        print(f"🚀 Carga por {args.duration:g} s: {args.games} partidas, {args.transcribe_rate:g} transcripciones/s")
+        moves, transcriptions, sent, moves_elapsed, elapsed, before, after = asyncio.run(
+            run_load(args, snake, dms, workdir))
+        cluster.check()
+        tasks = scrape_tasks(cluster)
+    finally:
+        cluster.stop()
+        snake.stop()
+        dms.stop()
+
+    ops = [None if b is None or a is None else a - b for b, a in zip(before, after)]
+    report = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "redis": kind,
+        "config": {key: getattr(args, key) for key in (
+            "players", "scenarios", "dms_nodes", "cpu_workers", "games", "transcribe_rate",
+            "transcribe_ms", "audio_kb", "duration")},
+        "moves": {**summarize(moves["latencies"], moves_elapsed, ops[0], idle[0], moves_elapsed),
+                  "resets": moves["resets"], "timeouts": moves["timeouts"]},
+        "transcriptions": {**summarize(transcriptions["latencies"], elapsed, ops[1], idle[1], elapsed),
+                           "sent": sent},
+        "tasks": tasks,
+        "notes": [FAKE_NOTE] if kind == "fake" else [],
+    }
+    print_report(report)
+
+    output = args.output
+    if not output:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, f"e2e-{report['commit']}-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"💾 Resultado en {output}")
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            print_comparison(json.load(f), report)
+    shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()